@@ -0,0 +1,48 @@
+#%%
+import time
+import numpy as np
+import pandas as pd
+import prot.size as size
+
+# Compare the exact growth laws in prot.size against the tabulated backend
+# for a large, unsorted array of growth rates.
+n_rates = int(1E6)
+n_repeats = 5
+lambda_bounds = [0, 2]
+rng = np.random.default_rng(42)
+growth_rate = rng.uniform(lambda_bounds[0], lambda_bounds[1], n_rates)
+
+funcs = {'width': size.lambda2width,
+         'length': size.lambda2length,
+         'size': size.lambda2size,
+         'SA': size.lambda2SA,
+         'SV': size.lambda2SV,
+         'P': size.lambda2P}
+
+def best_time(fn, *args, **kwargs):
+    times = []
+    for _ in range(n_repeats):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    return np.min(times)
+
+#%%
+dfs = []
+for n_points in [201, 2001, 20001]:
+    start = time.perf_counter()
+    table = size.GrowthLawTable(lambda_bounds=lambda_bounds, n_points=n_points)
+    build_time = time.perf_counter() - start
+    for k, fn in funcs.items():
+        exact = fn(growth_rate)
+        approx = fn(growth_rate, tabulated=table)
+        dfs.append(pd.DataFrame({'function': k,
+                                 'n_points': n_points,
+                                 'build_time_ms': 1E3 * build_time,
+                                 'exact_time_ms': 1E3 * best_time(fn, growth_rate),
+                                 'table_time_ms': 1E3 * best_time(fn, growth_rate, tabulated=table),
+                                 'reported_max_rel_error': table.max_rel_error[k],
+                                 'observed_max_rel_error': np.max(np.abs(approx - exact) / np.abs(exact))},
+                                 index=[0]))
+df = pd.concat(dfs, sort=False)
+print(df.to_string(index=False))
@@ -108,8 +108,16 @@ for g, d in tqdm.tqdm(complexes.groupby(['cog_letter', 'complex', 'complex_annot
 cplx_desc.to_csv('./complex_annotations.csv', index=False)
 
 #%%  Condense the complex data
-grouped = complexes.groupby(['complex_annotation', 'dataset', 'dataset_name', 'condition', 'growth_rate_hr']
-                             )['n_units'].agg(('min', 'max', 'median', 'mean')).reset_index()
+# One row per complex annotation, pooling the subunits of all complexes
+# which share it.
+grouped = pd.read_csv('../../../data/compiled_complex_annotation_abundance.csv')
+grouped = grouped[['complex_annotation', 'dataset', 'dataset_name', 'condition',
+                   'growth_rate_hr', 'n_units_min', 'n_units_max', 'n_units_median',
+                   'n_units_mean', 'n_units_mean_lower', 'n_units_mean_upper']]
+grouped = grouped.rename(columns={'n_units_min': 'min', 'n_units_max': 'max',
+                                  'n_units_median': 'median', 'n_units_mean': 'mean',
+                                  'n_units_mean_lower': 'mean_lower',
+                                  'n_units_mean_upper': 'mean_upper'})
 grouped['color'] = [dataset_colors[k] for k in grouped['dataset'].values]
 grouped['condition'] = [condition_dict[k] for k in grouped['condition'].values]
 grouped['complex_annotation'] = [rename(str(k)) for k in grouped['complex_annotation'].values]
@@ -128,6 +136,14 @@ prots_numeric['condition'] = _conditions
 prots_numeric['abundance'] = proteins['tot_per_cell']
 prots_numeric['dataset_name'] = proteins['dataset_name']
 prots_numeric['color'] = _colors
+
+# Add the growth-rate trajectory cluster of each protein in each dataset.
+clusters = pd.read_csv('../../../data/compiled_trajectory_clusters.csv')
+prots_numeric['dataset'] = proteins['dataset'].values
+prots_numeric = prots_numeric.merge(clusters[['dataset', 'gene_name', 'cluster', 'supercluster']],
+                                    left_on=['dataset', 'protein'],
+                                    right_on=['dataset', 'gene_name'],
+                                    how='left').drop(columns=['gene_name'])
 prots_numeric.to_csv('./proteins_compressed.csv', index=False)
 
 
@@ -5,11 +5,28 @@ import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
 import prot.viz
 import prot.size as size
+import prot.stats
+import prot.genesets
 colors, palette = prot.viz.bokeh_theme()
 dataset_colors = {'li_2014':colors['purple'], 'schmidt_2016':colors['light_blue'],
                    'peebo_2015':colors['green'], 'valgepea_2013':colors['red']}
 prot.viz.plotting_style()
 
+# Use the population-averaged cell geometry computed from the single-cell
+# measurements (code/processing/size_data_literature/population_geometry.py)
+# for the E. coli data rather than the geometry of the mean cell.
+use_population_geometry = False
+if use_population_geometry:
+    pop_geometry = pd.read_csv('../../data/cell_size_literature/population_cell_geometry.csv')
+    # Only the MG1655 conditions, consistent with the size fits used otherwise.
+    # These only span 0.15 - 0.54 hr^-1; conditions outside of this range fall
+    # back to the MG1655 growth laws and are reported below.
+    pop_geometry = pop_geometry[(pop_geometry['dataset'] == 'Si et al. 2019') &
+                                (pop_geometry['strain'] == 'MG1655')]
+    pop_lambda_range = (pop_geometry['growth_rate_hr'].min(),
+                        pop_geometry['growth_rate_hr'].max())
+    fallback = set()
+
 
 ######################
 # plot configuration #
@@ -102,13 +119,22 @@ ax1.fill_between(Ps_resp_, y1 = SA_V_ratio_sphere_, y2 = SA_V_ratio_rod_,
 data = pd.read_csv('../../data/compiled_absolute_measurements.csv')
 
 for g, d in data.groupby(['dataset', 'condition', 'growth_rate_hr']):
-    V = size.lambda2size(g[2])
+    if use_population_geometry:
+        if pop_lambda_range[0] <= g[2] <= pop_lambda_range[1]:
+            V = size.interpolate_geometry(g[2], pop_geometry, 'volume_um3')
+            SV = size.interpolate_geometry(g[2], pop_geometry, 'SV_um')
+        else:
+            V = size.lambda2size(g[2])
+            SV = size.lambda2SV(g[2])
+            fallback.add(g)
+    else:
+        V = size.lambda2size(g[2])
+        # assume aspect ratio of 4 (length/width), which is
+        # appoximately correct for E. coli
+        SA_rod = 2 * np.pi *  V**(2/3)
+        SV = SA_rod/V
     # ATP equivalents demand w.r.t. volume ; 1E6 ATP/(um3 s)
     Pv = 1E6 * V
-    # assume aspect ratio of 4 (length/width), which is
-    # appoximately correct for E. coli
-    SA_rod = 2 * np.pi *  V**(2/3)
-    SV = SA_rod/V
 
     ax1.plot(Pv, SV, 'o', color=dataset_colors[g[0]],
                     alpha=0.75, markeredgecolor='k', markeredgewidth=0.25,
@@ -146,7 +172,7 @@ ax1.add_artist(legend)
 # Plot 2
 ######################
 # total fg per cell of inner membrane proteins, GO:0005886
-data_membrane = data[data.go_terms.str.contains('GO:0005886')]
+data_membrane = data[prot.stats.has_annotation(data, 'GO:0005886')]
 
 data_membrane_fg_summary = pd.DataFrame()
 for c, d in data_membrane.groupby(['dataset', 'condition', 'growth_rate_hr']):
@@ -155,10 +181,17 @@ for c, d in data_membrane.groupby(['dataset', 'condition', 'growth_rate_hr']):
 
     # V = 0.28 * np.exp(1.33 * c[2])
     # SA = 2 * np.pi *  V**(2/3)
-    w = size.lambda2width(c[2])
-    l = size.lambda2length(c[2])
-    V = size.lambda2size(c[2])
-    SA = size.rod_SA(l, w, V)
+    if use_population_geometry:
+        if pop_lambda_range[0] <= c[2] <= pop_lambda_range[1]:
+            SA = size.interpolate_geometry(c[2], pop_geometry, 'surface_area_um2')
+        else:
+            SA = size.lambda2SA(c[2])
+            fallback.add(c)
+    else:
+        w = size.lambda2width(c[2])
+        l = size.lambda2length(c[2])
+        V = size.lambda2size(c[2])
+        SA = size.rod_SA(l, w, V)
 
     fg_tot = d_.fg_per_cell.sum()
     fg_SA = fg_tot / SA
@@ -171,6 +204,13 @@ for c, d in data_membrane.groupby(['dataset', 'condition', 'growth_rate_hr']):
             data_membrane_fg_summary.append(data_list,
             ignore_index = True)
 
+if use_population_geometry and len(fallback) > 0:
+    print(f'No population geometry for {len(fallback)} conditions outside of '
+          f'{pop_lambda_range[0]:.2f} - {pop_lambda_range[1]:.2f} hr^-1; '
+          'used the MG1655 growth laws instead:')
+    for g in sorted(fallback):
+        print('   ', g)
+
 for g, d in data_membrane_fg_summary.groupby(['dataset', 'condition', 'growth_rate_hr']):
     ax3.plot(g[2], d['fg per um2'], 'o', color=dataset_colors[g[0]],
                     alpha=0.75, markeredgecolor='k', markeredgewidth=0.25,
@@ -189,20 +229,14 @@ ax3.yaxis.set_tick_params(labelsize=5)
 # Plot distribution of inner membrane proteins, GO:0005886
 # Load the complex subunit counts.
 subunits = pd.read_csv('../../data/compiled_annotated_complexes.csv')
-complex_energy = ['NADH-DHI-CPLX', 'CPLX0-8160', 'CYT-O-UBIOX-CPLX', 'CYT-D-UBIOX-CPLX', 'ATPSYN-CPLX']
+genesets = prot.genesets.default_genesets().compile(subunits, complexes=subunits)
 
 # df_mem = data_membrane[data_membrane.dataset == 'schmidt_2016']
 df_mem = data_membrane
-df_mem = df_mem[df_mem.gene_name != 'tufA']
-df_mem = df_mem[df_mem.gene_name != 'tufB']
-
-genes_respiration = []
-for c, d in subunits.groupby('complex'):
-    if c in complex_energy:
-        for gene, d_ in d.groupby('gene_name'):
-            genes_respiration = np.append(genes_respiration, gene)
+df_mem = df_mem[~genesets.contains(df_mem, 'ef_tu')]
 
-genes_carbon = subunits[subunits.go_terms.str.contains('GO:0008643')].gene_name.unique()
+genes_respiration = list(genesets.members('respiration'))
+genes_carbon = list(genesets.members('carbon_uptake'))
 
 df_mem = df_mem.replace(genes_respiration, 'respiration')
 df_mem = df_mem.replace(genes_carbon, 'carbon_uptake')
@@ -7,6 +7,7 @@ from matplotlib.lines import Line2D
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 import prot.viz
 import prot.size as size
+import prot.stats
 colors, palette = prot.viz.bokeh_theme()
 dataset_colors = {'li_2014':colors['purple'], 'schmidt_2016':colors['light_blue'],
                    'peebo_2015':colors['green'], 'valgepea_2013':colors['red']}
@@ -32,7 +33,7 @@ ax2 = fig.add_subplot(spec[2:,0])
 data = pd.read_csv('../../data/compiled_absolute_measurements.csv')
 
 # total fg per cell cytosol GO:0005829 - cytosol
-data_cytosol = data[data.go_terms.str.contains('GO:0005829')]
+data_cytosol = data[prot.stats.has_annotation(data, 'GO:0005829')]
 
 data_cytosol = data_cytosol.replace('Not Assigned', 'poorly characterized or not assigned')
 data_cytosol = data_cytosol.replace('poorly characterized', 'poorly characterized or not assigned')
@@ -4,6 +4,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import prot.viz
 import prot.estimate
+import prot.cellcycle
+import prot.genesets
 colors = prot.viz.plotting_style()
 constants = prot.estimate.load_constants()
 dataset_colors = prot.viz.dataset_colors()
@@ -17,15 +19,9 @@ data = pd.read_csv('../../data/compiled_absolute_measurements.csv')
 
 L_R = 7459.0 # length of all subunits in ribosomes, in amino acids
 
-ribosome_genes = ['rpsA', 'rpsB', 'rpsC', 'rpsD', 'rpsE',
-              'rpsF', 'rpsG', 'rpsH', 'rpsI', 'rpsJ', 'rpsK',
-              'rpsL', 'rpsM', 'rpsN', 'rpsO', 'rpsP', 'rpsQ',
-              'rpsR', 'rpsS', 'rpsT', 'rpsU', 'sra', 'rplA', 'rplB',
-              'rplC', 'rplD', 'rplE', 'rplF', 'rplJ',
-              'rplL', 'rplI', 'rplK', 'rplM', 'rplN', 'rplO', 'rplP', 'rplQ',
-              'rplR', 'rplS','rplT', 'rplU', 'rplV', 'rplW', 'rplX', 'rplY',
-              'rpmA', 'rpmB', 'rpmC', 'rpmD', 'rpmE', 'rpmF', 'rpmG', 'rpmH',
-              'rpmI', 'rpmJ', 'ykgM', 'ykgO']
+# Ribosomal proteins, compiled once over the genes of the data.
+genesets = prot.genesets.GeneSets().add('ribosome', genes=prot.genesets.RIBOSOME_GENES)
+genesets = genesets.compile(data)
 
 # %%
 ######################
@@ -85,18 +81,9 @@ R_P_dai = dai_nut_df.RNA_P_ratio.values
         [1.39, 0.391],
         [1.73, 0.471]]).T
 
-df_ribo_frac = pd.DataFrame()
-for c, d in data.groupby(['dataset', 'condition', 'growth_rate_hr']):
-    mass_ribo = d[d['gene_name'].isin(ribosome_genes)].fg_per_cell.sum()
-    frac_ribo = (mass_ribo )/ d.fg_per_cell.sum()
-
-    data_list = {'frac_ribo' : frac_ribo,
-                'dataset' : c[0],
-                'condition' : c[1],
-                'growth_rate_hr' : c[2]}
-
-    df_ribo_frac = df_ribo_frac.append(data_list,
-                                        ignore_index = True)
+df_ribo_frac = genesets.sector_fractions(data, by=['dataset', 'condition', 'growth_rate_hr'],
+                                         names=['ribosome'])
+df_ribo_frac = df_ribo_frac.rename(columns={'frac_mass': 'frac_ribo'})
 
 #
 # Plot the prediction.
@@ -121,25 +108,8 @@ ax2.set_ylabel('growth rate [hr$^{-1}$]', fontsize=6)
 # Plot 3 - active ribosomal fraction
 ############################
 
-# Load the full Si 2017 SI
-data_si = pd.read_csv('../../data/si_2017_raw/si2017_full.csv')
-
-# consider the mean values for each strain/condition they considered
-data_si_mean = pd.DataFrame()
-for c, d in data_si.groupby(['strain type (background)', 'growth media', 'inducer or drug added', 'concentration ', 'type of perturbation']):
-    data_list = {'strain' : c[0],
-                 'growth media' : c[1],
-                 'inducer or drug added' : c[2],
-                 'concentration': c[3],
-                 'number of origins' :d['number of origins'].mean(),
-                 'RNA/protein' : d['RNA/protein'].mean(),
-                 'DNA content per cell (genome equivalents)' : d['DNA content per cell (genome equivalents)'].mean(),
-                 'type of perturbation' :c[4],
-                 'C+D period (minutes)' : d['C+D period (minutes)'].mean(),
-                 'C period (minutes)' : d['C period (minutes)' ].mean(),
-                 'growth_rate_hr' : d['growth rate (1/hours)'].mean()}
-    data_si_mean = data_si_mean.append(data_list,
-                                      ignore_index = True)
+# Mean values of the Si et al. 2017 measurements for each strain/condition
+data_si_mean = prot.cellcycle.condition_means()
 
 # fit measurements of active fraction from Dai et al. data
 dai_nut_df = dai_nut_df.sort_values(by='growth_rate_hr', ascending = True)
@@ -8,58 +8,27 @@ from mpl_toolkits.axes_grid1 import make_axes_locatable
 import matplotlib
 import prot.viz
 import prot.size as size
+import prot.cellcycle
 colors, palette = prot.viz.bokeh_theme()
 
 dataset_colors = {'li_2014':colors['purple'], 'schmidt_2016':colors['light_blue'],
                    'peebo_2015':colors['green'], 'valgepea_2013':colors['red']}
 prot.viz.plotting_style()
 
-from scipy.optimize import curve_fit
-def func_lin(l, a, b):
-    x = 60*(np.log(2)/l)
-    return a*x + b
-
-# Load the full Si 2017 SI
-data_si = pd.read_csv('../../data/si_2017_raw/si2017_full.csv')
+from prot.cellcycle import func_lin
 
 # consider the mean values for each strain/condition they considered
-data_si_mean = pd.DataFrame()
-for c, d in data_si.groupby(['strain type (background)', 'growth media', 'inducer or drug added', 'concentration ', 'type of perturbation']):
-    data_list = {'strain' : c[0],
-                 'growth media' : c[1],
-                 'inducer or drug added' : c[2],
-                 'concentration': c[3],
-                 'number of origins' :d['number of origins'].mean(),
-                 'RNA/protein' : d['RNA/protein'].mean(),
-                 'DNA content per cell (genome equivalents)' : d['DNA content per cell (genome equivalents)'].mean(),
-                 'type of perturbation' :c[4],
-                 'C+D period (minutes)' : d['C+D period (minutes)'].mean(),
-                 'C period (minutes)' : d['C period (minutes)' ].mean(),
-                 'growth_rate_hr' : d['growth rate (1/hours)'].mean(),
-                 'doubling time (minutes)' : d['doubling time (minutes)'].mean() }
-    data_si_mean = data_si_mean.append(data_list,
-                                      ignore_index = True)
-
-# perform fit of growth rate vs. t_cyc so that we can estimate number of
-# origins (2**(t_cyc/tau)) where tau is the doubling time.
-data_si_mean = data_si_mean.sort_values(by='growth_rate_hr')
-data_si_mean['tau'] = 60*(np.log(2)/data_si_mean['growth_rate_hr'])
+data_si_mean = prot.cellcycle.condition_means()
 data_si_mean = data_si_mean[data_si_mean.strain != 'tCRISPRi (MG1655)']
 data_si_mean = data_si_mean[data_si_mean['type of perturbation'] == 'nutrient conditions']
 
-
-#### piecewise fit for t_C- piecewise fit works well with transition at 40 min
-t_C_const = data_si_mean[data_si_mean.tau <=40]['C period (minutes)'].mean()
-t_C_lin = data_si_mean[data_si_mean.tau > 40]['C period (minutes)'].values
-l_lin =  data_si_mean[data_si_mean.tau > 40]['growth_rate_hr'].values
-popt_tC_lin, pcov_tC_lin = curve_fit(func_lin, l_lin, t_C_lin, p0=(1, 1))
+# Piecewise fits of t_C (transition at 40 min) and t_cyc (transition at 43 min)
+# to the nutrient-limited conditions of Si et al. 2017, used to estimate the
+# number of origins (2**(t_cyc/tau)) where tau is the doubling time.
+cell_cycle = prot.cellcycle.fit_cell_cycle()
+t_C_const, popt_tC_lin = cell_cycle['tC']['const'], cell_cycle['tC']['popt']
+t_cyc_const, popt_tcyc_lin = cell_cycle['tcyc']['const'], cell_cycle['tcyc']['popt']
 print('t_C: constant regime, ' , t_C_const, 'linear fit:', popt_tC_lin)
-
-#### piecewise fit for t_cyc - piecewise fit works well with transition at 43 min
-t_cyc_const = data_si_mean[data_si_mean.tau <=43]['C+D period (minutes)'].mean()
-t_cyc_lin = data_si_mean[data_si_mean.tau > 43]['C+D period (minutes)'].values
-l_lin =  data_si_mean[data_si_mean.tau > 43]['growth_rate_hr'].values
-popt_tcyc_lin, pcov_tcyc_lin = curve_fit(func_lin, l_lin, t_cyc_lin, p0=(1, 1))
 print('t_cyc: constant regime, ' , t_cyc_const, 'linear fit:', popt_tcyc_lin)
 
 # %%
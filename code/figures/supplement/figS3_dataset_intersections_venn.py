@@ -4,9 +4,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
 import tqdm
-# import upsetplot
-from venn import venn
 import prot.viz
+import prot.stats
 colors, palette = prot.viz.bokeh_theme()
 prot.viz.plotting_style()
 dataset_colors = {'li_2014':colors['purple'], 'schmidt_2016':colors['light_blue'],
@@ -41,18 +40,35 @@ ax.set_ylabel('total number of\nproteins quantified')
 plt.savefig('../../figures/intersections_venn_summed.pdf', bbox_inches='tight')
 
 # %%
-# Venn Diagram
-fig = plt.figure()
-
-datasets = {
-    'Schmidt et al. 2016':  set(data[data['dataset']=='schmidt_2016']['gene_name'].unique()),
-    'Peebo et al. 2015': set(data[data['dataset']=='peebo_2015']['gene_name'].unique()),
-    'Li et al. 2014': set(data[data['dataset']=='li_2014']['gene_name'].unique()),
-    'Valgepea et al. 2013' :  set(data[data['dataset']=='valgepea_2013']['gene_name'].unique())
-}
-venn(datasets, cmap = [colors['light_blue'], colors['green'], colors['purple'], colors['red']])
-
-plt.savefig('../../figures/figS3_intersections_venn.pdf', bbox_inches='tight')
+# Intersections of the gene coverage of all data sets, including those with
+# copy numbers only (Soufi et al. 2015, Taniguchi et al. 2010).
+coverage = pd.concat([data] + [
+    pd.read_csv(f'../../data/{auth}_longform_annotated.csv') for auth in ['soufi2015', 'taniguchi2010']],
+    sort=False)
+coverage['tot_per_cell'] = coverage['tot_per_cell'].fillna(coverage['reported_tot_per_cell'])
+# Genes are matched by b-number, as the gene names of Soufi et al. and Taniguchi
+# et al. are lowercase.
+intersections = prot.stats.coverage_intersections(coverage, by='dataset', gene_key='b_number')
+intersections = intersections[intersections['n_exclusive'] > 0]
+intersections = intersections.sort_values('n_exclusive', ascending=False).reset_index(drop=True)
+
+# UpSet-style plot: number of genes measured in exactly each combination of
+# data sets, with the combination shown as a dot matrix below.
+datasets = sorted(coverage['dataset'].unique())
+fig, ax = plt.subplots(2, 1, figsize=(6, 4), sharex=True,
+                       gridspec_kw={'height_ratios': [3, 2]})
+ax[0].bar(np.arange(len(intersections)), intersections['n_exclusive'], color='k',
+          width=0.6)
+ax[0].set_ylabel('number of proteins')
+for i, members in enumerate(intersections['members'].str.split(' & ')):
+    y = [datasets.index(m) for m in members]
+    ax[1].plot(np.full(len(datasets), i), np.arange(len(datasets)), 'o',
+               color='lightgrey', ms=4)
+    ax[1].plot(np.full(len(y), i), y, 'o-', color='k', ms=4, lw=1)
+ax[1].set_yticks(np.arange(len(datasets)))
+ax[1].set_yticklabels(datasets)
+ax[1].set_xticks([])
+plt.savefig('../../figures/figS3_intersections_upset.pdf', bbox_inches='tight')
 
 
 # %%
@@ -1,7 +1,5 @@
 import numpy as np
 import pandas as pd
-from scipy import stats
-import glob
 import matplotlib.pyplot as plt
 import matplotlib.ticker
 import prot.viz
@@ -10,104 +8,28 @@ colors, palette = prot.viz.bokeh_theme()
 # dataset_colors = prot.viz.dataset_colors()
 prot.viz.plotting_style()
 
-# Exponential fit functions
-from scipy.optimize import curve_fit
-def func(x, a, c, d):
-    return a*np.exp(-c*x)+d
-
-def func2(x, a, c):
-    return a*np.exp(-c*x)
-
-##############################################
-##############################################
-# gather cell size information from Si et al.
-# 2017, 2019
-##############################################
-##############################################
-
-# %% Si et al. 2019 data
-Si_filelist = glob.glob('../../data/si_2019_raw/*.csv')
-
-Si_2019 = pd.DataFrame()
-for f in Si_filelist:
-    Si_temp = pd.read_csv(f)
-    Si_temp['condition'] = f.split('supplemental_')[-1].split('.')[0]
-    Si_temp['strain type (background)'] = f.split('supplemental_')[-1].split('.')[0].split('_')[0]
-    Si_2019 = Si_2019.append(Si_temp)
-
-Si_2019['length'] = Si_2019['newborn size (micron)'] * (2**(Si_2019['elongation rate (1/hour)']*Si_2019['generation time (minute)']/60.0) - 1)/(Si_2019['elongation rate (1/hour)']*(Si_2019['generation time (minute)']/60.0)*np.log(2))
-Si_2019['growth_rate_hr'] = np.log(2) * (Si_2019['elongation rate (1/hour)'])
-
-# Size following equation from Basan et al. 2015
-Si_2019['size'] = np.pi * (Si_2019['cell width (micron)']/2)**2 * (Si_2019['length'] - 2*(Si_2019['cell width (micron)']/2)/3)
-
-Si_2019_avg = pd.DataFrame()
-
-# calculate average size values for each growth condition/ cell strain
-for c, d in Si_2019.groupby('condition'):
-    data_list = {'cell size (μm3)' : d['size'].mean(),
-                 'cell width (μm)' : d['cell width (micron)'].mean(),
-                 'cell length (μm)' : d['length'].mean(),
-                 'growth rate (1/hours)' : d.growth_rate_hr.mean(),
-                'dataset': 'Si et al. 2019',
-                'strain type (background)' : d['strain type (background)'].unique()[0],
-                'condition' : c}
-    Si_2019_avg = Si_2019_avg.append(data_list,
-                                    ignore_index = True)
-
-
-# %% Si et al. 2017 data
-Si_filelist = glob.glob('../../data/si_2017_raw/*.csv')
-Si_2017 = pd.DataFrame()
-for f in Si_filelist:
-    Si_temp = pd.read_csv(f)
-    Si_2017 = Si_2017.append(Si_temp)
-
-Si_2017 = Si_2017[Si_2017['type of perturbation'] == 'nutrient conditions']
-Si_2017 = Si_2017[Si_2017['strain type (background)'] != 'tCRISPRi (MG1655)']
-
-Si_avg_vol = Si_2019_avg
-for c, d in Si_2017.groupby(['experiment name', 'growth media']):
-    data_list = {'growth rate (1/hours)' : d['growth rate (1/hours)'].unique()[0],
-                 'cell size (μm3)' : d['cell size (μm3)'].unique()[0],
-                 'cell length (μm)' : d['cel length (μm)'].unique()[0],
-                 'cell width (μm)' : d['cel width (μm)'].unique()[0],
-                 'strain type (background)' : d['strain type (background)'].unique()[0],
-                 'dataset' : 'Si et al. 2017',
-                 'condition' : c[1],
-                'experiment' : d['experiment name'].unique()[0]}
-    Si_avg_vol = Si_avg_vol.append(data_list,
-                         ignore_index = True)
-
-
-
 ##############################################
 ##############################################
-# Fit strain MG1655 to exponential function
+# Load the condition-averaged cell size data from
+# Si et al. 2017, 2019 and the size fits generated by
+# code/processing/size_data_literature/fit_si_size_coefficients.py
 ##############################################
 ##############################################
 
-Si_avg_vol_MG1655 = Si_avg_vol[Si_avg_vol['strain type (background)'] == 'MG1655']
-
-popt_vol_MG1655, pcov_vol_MG1655 = \
-        curve_fit(func2, Si_avg_vol_MG1655['growth rate (1/hours)'].values,
-                  Si_avg_vol_MG1655['cell size (μm3)'].values, p0=(1, 1e-6))
-
-popt_length_MG1655, pcov_length_MG1655 = \
-        curve_fit(func, Si_avg_vol_MG1655[Si_avg_vol_MG1655.experiment !='MG_20160101']['growth rate (1/hours)'].values,
-                  Si_avg_vol_MG1655[Si_avg_vol_MG1655.experiment !='MG_20160101']['cell length (μm)'].values, p0=(1, 1e-6,1))
-
-popt_width_MG1655, pcov_width_MG1655 = \
-        curve_fit(func2, Si_avg_vol_MG1655[Si_avg_vol_MG1655.experiment !='MG_20160101']['growth rate (1/hours)'].values,
-                  Si_avg_vol_MG1655[Si_avg_vol_MG1655.experiment !='MG_20160101']['cell width (μm)'].values, p0=(1, 1e-6))
-
+Si_avg_vol = pd.read_csv('../../data/cell_size_literature/si_size_condition_averages.csv')
+Si_avg_vol = Si_avg_vol.rename(columns={'growth_rate_hr': 'growth rate (1/hours)',
+                                        'volume_um3': 'cell size (μm3)',
+                                        'length_um': 'cell length (μm)',
+                                        'width_um': 'cell width (μm)',
+                                        'strain': 'strain type (background)'})
 
+size_params, _, _ = prot.size.load_size_params('MG1655')
 
 x = np.linspace(0,2.2,100)
 si_avg_fit_MG1655 = pd.DataFrame({'growth rate (1/hours)' : x,
-                        'cell size (μm3)' : func2(x, *popt_vol_MG1655),
-                        'cell length (μm)' : func(x, *popt_length_MG1655),
-                        'cell width (μm)' : func2(x, *popt_width_MG1655),
+                        'cell size (μm3)' : prot.size.func2(x, *size_params['volume']),
+                        'cell length (μm)' : prot.size.func(x, *size_params['length']),
+                        'cell width (μm)' : prot.size.func2(x, *size_params['width']),
                         'dataset' : ['fit to Si et al. 2017, 2019; MG1655' for i in np.arange(len(x))]},
                      columns = ['growth rate (1/hours)', 'cell size (μm3)', 'cell length (μm)', 'cell width (μm)',
                                'dataset'])
@@ -1,17 +1,16 @@
 import numpy as np
 import pandas as pd
-from scipy import stats
 import glob
 import matplotlib.pyplot as plt
 import matplotlib.ticker
 import prot.viz
 import prot.size
+import prot.cache
 colors, palette = prot.viz.bokeh_theme()
 # dataset_colors = prot.viz.dataset_colors()
 prot.viz.plotting_style()
 
 # Exponential fit function
-from scipy.optimize import curve_fit
 def func(x, a, c, d):
     return a*np.exp(-c*x)+d
 
@@ -24,7 +23,7 @@ basan_df = pd.read_csv('../../data/basan2015_raw_data/basan2015_data.csv')
 ##############################################
 ##############################################
 
-popt_fg, pcov_fg = curve_fit(func, basan_df.growth_rate_hr.values, basan_df.protein_fg.values, p0=(1, 1e-6, 1))
+popt_fg, pcov_fg = prot.cache.curve_fit(func, basan_df.growth_rate_hr.values, basan_df.protein_fg.values, p0=(1, 1e-6, 1))
 
 ##############################################
 ##############################################
@@ -94,13 +93,13 @@ dai_df = pd.read_csv('../../data/dai2016_raw_data/dai2016_summary.csv')
 dai_df_slow = dai_df[dai_df.growth_rate_hr < 0.7]
 dai_df_fast = dai_df[dai_df.growth_rate_hr >= 0.7]
 
-slope_dia_RP_A, intercept_dia_RP_A, r_value, p_value, std_err = stats.linregress(dai_df_slow.growth_rate_hr.values,
+slope_dia_RP_A, intercept_dia_RP_A, r_value, p_value, std_err = prot.cache.linregress(dai_df_slow.growth_rate_hr.values,
                                             dai_df_slow.RNA_P_ratio.values)
-slope_dia_RP_B, intercept_dia_RP_B, r_value, p_value, std_err = stats.linregress(dai_df_fast.growth_rate_hr.values,
+slope_dia_RP_B, intercept_dia_RP_B, r_value, p_value, std_err = prot.cache.linregress(dai_df_fast.growth_rate_hr.values,
                                             dai_df_fast.RNA_P_ratio.values)
 
 basan_df = pd.read_csv('../../data/basan2015_raw_data/basan2015_data.csv')
-popt_dna, pcov_dna = curve_fit(func, basan_df.growth_rate_hr.values, basan_df.dna_fg.values, p0=(1, 1e-6, 1))
+popt_dna, pcov_dna = prot.cache.curve_fit(func, basan_df.growth_rate_hr.values, basan_df.dna_fg.values, p0=(1, 1e-6, 1))
 
 
 schmidt_gr = data_orig.sort_values(by='growth_rate_hr', ascending = True).growth_rate_hr.unique()
@@ -0,0 +1,18 @@
+# %%
+import numpy as np
+import pandas as pd
+import prot.stats
+
+# Load the compiled absolute measurements.
+data = pd.read_csv('../../../data/compiled_absolute_measurements.csv')
+
+# %%
+# Interpolate the copy number of every gene in every dataset onto a common
+# growth-rate grid. Load the result with prot.stats.AbundanceGrid.load.
+growth_rate = np.linspace(0, 2, 201)
+grid = prot.stats.interpolate_abundance(data, growth_rate, value_key='tot_per_cell',
+                                        method='pchip')
+grid.save('../../../data/compiled_abundance_growth_rate_grid.npz')
+print(grid)
+
+# %%
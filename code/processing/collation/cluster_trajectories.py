@@ -0,0 +1,18 @@
+# %%
+import pandas as pd
+import prot.cluster
+
+# Load the compiled absolute measurements.
+data = pd.read_csv('../../../data/compiled_absolute_measurements.csv')
+
+# %%
+# Cluster the genes of each dataset by how their mass fraction changes with
+# growth rate. Only genes measured in at least 80% of the conditions of a
+# dataset are clustered.
+clusters = prot.cluster.cluster_trajectories(data, n_clusters=20, n_groups=5,
+                                             by='dataset', value_key='fg_per_cell',
+                                             min_coverage=0.8, seed=42)
+clusters.to_csv('../../../data/compiled_trajectory_clusters.csv', index=False)
+print(clusters.groupby(['dataset', 'supercluster']).size())
+
+# %%
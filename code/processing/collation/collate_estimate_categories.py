@@ -3,6 +3,7 @@ import pandas as pd
 import tqdm
 import numpy as np
 import prot.size
+import prot.stats
 
 # Load  the necessary datasets.
 data = pd.read_csv('../../../data/compiled_annotated_complexes.csv', comment='#')
@@ -146,45 +147,44 @@ complexes = {'dnap': {'name': 'DNA polymerase III (holo enzyme)',
                     'category':'synthesis'}}
 
 # %%
-complex_df = pd.DataFrame([])
-for g, d in tqdm.tqdm(data.groupby(['dataset', 'dataset_name', 'condition', 'growth_rate_hr'])):
-    for k, v in complexes.items():
-        if 'complexes' in list(v.keys()):
-            _d = d[d['complex'].isin(v['complexes'])]
-        if 'go_terms' in list(v.keys()):
-            cplxs = []
-            for t in v['go_terms']:
-                __d = d[d['go_terms'].str.contains(t)]
-                for kplx in __d['complex'].unique():
-                    cplxs.append(kplx)
-            _d = d[d['complex'].isin(cplxs)]
-        if 'gene_name' in list(v.keys()):
-            _d = d[d['gene_name'].isin(v['gene_name'])]
-        if len(_d) > 0:
-            _d = _d.drop_duplicates(subset=['gene_name'])
-            _d = _d.groupby(['complex'])['n_units'].mean().reset_index()
-            if v['method'] == 'sum':
-                units = _d['n_units'].sum()
-                _method = 'sum total'
-            if v['method'] == 'avg':
-                units = _d['n_units'].mean()
-                _method = 'average'
+groups = ['dataset', 'dataset_name', 'condition', 'growth_rate_hr']
+dfs = []
+for k, v in tqdm.tqdm(complexes.items()):
+    if 'complexes' in list(v.keys()):
+        _d = data[data['complex'].isin(v['complexes'])]
+    if 'go_terms' in list(v.keys()):
+        # Complexes with a measured subunit carrying one of the terms.
+        cplxs = data[prot.stats.has_annotation(data, v['go_terms'])]
+        cplxs = cplxs[groups + ['complex']].drop_duplicates()
+        _d = data.merge(cplxs, on=groups + ['complex'])
+    if 'gene_name' in list(v.keys()):
+        _d = data[data['gene_name'].isin(v['gene_name'])]
+    if len(_d) == 0:
+        continue
+    # Every subunit is counted once in each category: a subunit of several
+    # complexes is assigned to the first of them, and the subunits of each
+    # complex are averaged.
+    _d = _d.drop_duplicates(subset=groups + ['gene_name'])
+    _d = prot.stats.complex_abundance(_d, by=groups, n_boot=0)
+    if v['method'] == 'sum':
+        _d = _d.groupby(groups)['n_units_mean'].sum().reset_index()
+        _method = 'sum total'
+    if v['method'] == 'avg':
+        _d = _d.groupby(groups)['n_units_mean'].mean().reset_index()
+        _method = 'average'
 
-            # assemble a dictionary
-            volume = np.round(prot.size.lambda2size(g[3]), 2)
-            _data = {'dataset':g[0], 'dataset_name':g[1],
-                     'condition':g[2], 'growth_rate_hr':g[3],
-                     'volume': volume,
-                     'n_complex':units,
-                     'rate': v['rate_per_sec'],
-                     'rate_units': v['units'],
-                     'shorthand': k,
-                     'name': v['name'],
-                     'aggregation_method': _method,
-                     'category': v['category'],
-                     'concentration_uM': 1E6 * (units / 6.022E23) / (volume * 1E-15)}
-
-            complex_df = complex_df.append(_data, ignore_index=True)
+    # assemble the category
+    _d = _d.rename(columns={'n_units_mean': 'n_complex'})
+    _d['volume'] = np.round(prot.size.lambda2size(_d['growth_rate_hr'].values), 2)
+    _d['rate'] = v['rate_per_sec']
+    _d['rate_units'] = v['units']
+    _d['shorthand'] = k
+    _d['name'] = v['name']
+    _d['aggregation_method'] = _method
+    _d['category'] = v['category']
+    _d['concentration_uM'] = 1E6 * (_d['n_complex'] / 6.022E23) / (_d['volume'] * 1E-15)
+    dfs.append(_d)
+complex_df = pd.concat(dfs, sort=False, ignore_index=True)
 
 complex_df.to_csv('../../../data/compiled_estimate_categories.csv', index=False)
 
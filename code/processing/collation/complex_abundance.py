@@ -0,0 +1,26 @@
+# %%
+import pandas as pd
+import prot.stats
+
+# Load the subunit copy numbers of each complex.
+data = pd.read_csv('../../../data/compiled_annotated_complexes.csv', comment='#')
+
+# %%
+# Estimate the copy number of every complex in every dataset and condition,
+# with bootstrap intervals over the subunits.
+cplx = prot.stats.complex_abundance(data, by=['dataset', 'dataset_name', 'condition',
+                                              'growth_rate_hr', 'complex_annotation'],
+                                    n_boot=1000, seed=666)
+cplx.to_csv('../../../data/compiled_complex_abundance.csv', index=False)
+
+# %%
+# Estimate the same for every complex annotation, pooling the subunits of all
+# complexes which share it, as shown in the complex explorer.
+data = data[data['complex'] != 'none assigned']
+annotated = prot.stats.complex_abundance(data, by=['dataset', 'dataset_name', 'condition',
+                                                   'growth_rate_hr'],
+                                         complex_key='complex_annotation',
+                                         n_boot=1000, seed=666)
+annotated.to_csv('../../../data/compiled_complex_annotation_abundance.csv', index=False)
+
+# %%
@@ -0,0 +1,33 @@
+# %%
+import numpy as np
+import pandas as pd
+import prot.stats
+
+# Load the compiled absolute measurements.
+data = pd.read_csv('../../../data/compiled_absolute_measurements.csv')
+
+# The datasets do not share condition names, so conditions are matched by
+# growth rate, in bins of 0.1 hr^-1.
+bin_width = 0.1
+data['growth_rate_bin'] = np.round(np.round(data['growth_rate_hr'] / bin_width) * bin_width, 2)
+
+# %%
+# Compute the consensus copy number and mass of each gene across datasets.
+dfs = []
+for value_key in ['tot_per_cell', 'fg_per_cell']:
+    consensus = prot.stats.consensus_abundance(data, by='growth_rate_bin',
+                                               value_key=value_key)
+    consensus['quantity'] = value_key
+    consensus.rename(columns={f'{value_key}_median': 'median',
+                              f'{value_key}_huber': 'huber'}, inplace=True)
+    dfs.append(consensus)
+consensus = pd.concat(dfs, sort=False)
+
+# Add the annotations of each gene.
+annotation = data.groupby('gene_name')[['b_number', 'cog_class', 'cog_category',
+                                        'cog_letter']].first()
+consensus = consensus.merge(annotation, left_on='gene_name', right_index=True,
+                            how='left')
+consensus.to_csv('../../../data/compiled_consensus_abundance.csv', index=False)
+
+# %%
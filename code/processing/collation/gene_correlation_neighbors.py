@@ -0,0 +1,16 @@
+# %%
+import pandas as pd
+import prot.stats
+
+# Load the compiled absolute measurements.
+data = pd.read_csv('../../../data/compiled_absolute_measurements.csv')
+
+# %%
+# Find the 10 genes whose copy number co-varies most with that of each gene
+# across all conditions of all datasets.
+neighbors = prot.stats.correlation_neighbors(data, k=10, value_key='tot_per_cell',
+                                             condition_key=['dataset', 'condition',
+                                                            'growth_rate_hr'])
+neighbors.to_csv('../../../data/compiled_gene_correlation_neighbors.csv', index=False)
+
+# %%
@@ -0,0 +1,19 @@
+# %%
+import pandas as pd
+import prot.stats
+
+# Load the compiled absolute measurements.
+data = pd.read_csv('../../../data/compiled_absolute_measurements.csv')
+
+# %%
+# Regress the log copy number of every gene in every dataset against the
+# growth rate and classify its growth-rate dependence.
+scaling = prot.stats.growth_scaling(data, value_key='tot_per_cell')
+annotation = data.groupby('gene_name')[['b_number', 'cog_class', 'cog_category',
+                                        'cog_letter']].first()
+scaling = scaling.merge(annotation, left_on='gene_name', right_index=True,
+                        how='left')
+scaling.to_csv('../../../data/compiled_growth_rate_scaling.csv', index=False)
+print(scaling.groupby(['dataset', 'classification']).size())
+
+# %%
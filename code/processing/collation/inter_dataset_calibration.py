@@ -0,0 +1,24 @@
+# %%
+import pandas as pd
+import prot.size as size
+import prot.stats
+
+# Load the reported (uncorrected) measurements of the absolute datasets.
+authors = ['schmidt2016', 'li2014', 'valgepea2013', 'peebo2015']
+data = pd.concat([
+    pd.read_csv(f'../../../data/{auth}_longform_annotated.csv') for auth in authors],
+    sort=False)
+
+# %%
+# Calibrate all datasets jointly. The Schmidt et al. conditions are rescaled to
+# the total protein mass at their growth rate, and every other condition is
+# rescaled such that its genes agree with those of the Schmidt condition with
+# the nearest growth rate.
+scales, residuals = prot.stats.calibrate(data, reference='schmidt_2016',
+                                         total=size.lambda2P,
+                                         value_key='reported_fg_per_cell',
+                                         gene_key='b_number')
+scales.to_csv('../../../data/compiled_calibration_scales.csv', index=False)
+residuals.to_csv('../../../data/compiled_calibration_residuals.csv', index=False)
+
+# %%
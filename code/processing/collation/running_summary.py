@@ -0,0 +1,39 @@
+# %%
+import os
+import pandas as pd
+import prot.stats
+
+# Per-gene and per-COG-class summaries over all conditions of all datasets,
+# kept as running moments so that a new dataset only needs to be added rather
+# than recomputing everything from the compiled measurements.
+authors = ['schmidt2016', 'li2014', 'valgepea2013', 'peebo2015']
+state = {'gene': '../../../data/running_summary_gene_state.npz',
+         'sector': '../../../data/running_summary_sector_state.npz'}
+if os.path.exists(state['gene']) and os.path.exists(state['sector']):
+    genes = prot.stats.RunningMoments.load(state['gene'])
+    sectors = prot.stats.RunningMoments.load(state['sector'])
+else:
+    genes = prot.stats.RunningMoments(keys='gene_name',
+                                      values=['tot_per_cell', 'fg_per_cell'])
+    sectors = prot.stats.RunningMoments(keys='cog_class',
+                                        values=['tot_per_cell', 'fg_per_cell'],
+                                        sum_by=['dataset', 'condition', 'growth_rate_hr'])
+
+# %%
+# Add the datasets not yet included.
+for auth in authors:
+    if auth in genes.batches:
+        continue
+    print(f'Adding {auth}...')
+    data = pd.read_csv(f'../../../data/{auth}_longform_annotated.csv')
+    data = data[~data['condition'].str.contains('stationary_')]
+    genes.update(data, label=auth)
+    sectors.update(data, label=auth)
+genes.save(state['gene'])
+sectors.save(state['sector'])
+
+# %%
+genes.to_frame().to_csv('../../../data/compiled_gene_summary.csv', index=False)
+sectors.to_frame().to_csv('../../../data/compiled_sector_summary.csv', index=False)
+
+# %%
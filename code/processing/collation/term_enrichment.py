@@ -0,0 +1,35 @@
+# %%
+import pandas as pd
+import prot.stats
+
+# Load the compiled absolute measurements and the GO annotations.
+data = pd.read_csv('../../../data/compiled_absolute_measurements.csv')
+go = pd.read_csv('../../../data/escherichia_coli_go_terms.csv')
+
+# The query sets are the most abundant 10% (by mass) of the measured proteins
+# in each dataset and condition, tested against all measured proteins. The
+# growth rate tells apart the chemostat conditions, which share one name.
+queries = prot.stats.top_genes(data, by=['dataset', 'condition', 'growth_rate_hr'],
+                               value_key='fg_per_cell', fraction=0.1)
+universe = data['gene_name'].unique()
+
+# %%
+# Test the enrichment of all GO terms and COG categories at once.
+dfs = []
+for annotation, source, key, sep in [('go', go, 'go_number', None),
+                                     ('cog', data, 'cog_letter', '')]:
+    incidence, genes, terms = prot.stats.incidence_matrix(source, key=key, sep=sep)
+    enriched = prot.stats.enrichment(queries, incidence, genes, terms,
+                                     query_key=['dataset', 'condition', 'growth_rate_hr'],
+                                     universe=universe)
+    enriched['annotation'] = annotation
+    dfs.append(enriched)
+enriched = pd.concat(dfs, sort=False)
+
+# Add the description of each term.
+go_desc = go.groupby('go_number')['go_term'].first()
+cog_desc = data.groupby('cog_letter')['cog_category'].first()
+enriched['description'] = enriched['term'].map(pd.concat([go_desc, cog_desc]))
+enriched.to_csv('../../../data/compiled_term_enrichment.csv', index=False)
+
+# %%
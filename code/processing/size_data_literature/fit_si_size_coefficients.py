@@ -0,0 +1,96 @@
+#%%
+import glob
+import datetime
+import os
+import numpy as np
+import pandas as pd
+import prot.size as size
+
+##############################################
+##############################################
+# Average cell size for each growth condition
+# in Si et al. 2017, 2019
+##############################################
+##############################################
+
+# %% Si et al. 2019 single-cell data
+Si_filelist = glob.glob('../../../data/si_2019_raw/*.csv')
+dfs = []
+for f in Si_filelist:
+    Si_temp = pd.read_csv(f)
+    Si_temp['condition'] = f.split('supplemental_')[-1].split('.')[0]
+    Si_temp['strain'] = Si_temp['condition'].values[0].split('_')[0]
+    dfs.append(Si_temp)
+Si_2019 = pd.concat(dfs, sort=False)
+
+# Average length over the cell cycle given exponential elongation
+gen_time = Si_2019['generation time (minute)'] / 60.0
+elong = Si_2019['elongation rate (1/hour)']
+Si_2019['length_um'] = Si_2019['newborn size (micron)'] * (2**(elong * gen_time) - 1) / \
+                            (elong * gen_time * np.log(2))
+Si_2019['width_um'] = Si_2019['cell width (micron)']
+Si_2019['growth_rate_hr'] = np.log(2) * elong
+
+# Size following equation from Basan et al. 2015
+Si_2019['volume_um3'] = np.pi * (Si_2019['width_um'] / 2)**2 * \
+                            (Si_2019['length_um'] - 2 * (Si_2019['width_um'] / 2) / 3)
+
+Si_2019_avg = Si_2019.groupby(['strain', 'condition'])[
+                ['growth_rate_hr', 'width_um', 'length_um', 'volume_um3']].mean().reset_index()
+Si_2019_avg['dataset'] = 'Si et al. 2019'
+Si_2019_avg['experiment'] = 'si_2019'
+
+# %% Si et al. 2017 condition-averaged data
+Si_2017 = pd.read_csv('../../../data/si_2017_raw/si2017_si.csv')
+Si_2017 = Si_2017[(Si_2017['type of perturbation'] == 'nutrient conditions') &
+                  (Si_2017['strain type (background)'] != 'tCRISPRi (MG1655)')]
+Si_2017_avg = Si_2017.groupby(['experiment name', 'growth media']).first().reset_index()
+Si_2017_avg = pd.DataFrame({'strain': Si_2017_avg['strain type (background)'],
+                            'condition': Si_2017_avg['growth media'],
+                            'growth_rate_hr': Si_2017_avg['growth rate (1/hours)'],
+                            'width_um': Si_2017_avg['cel width (μm)'],
+                            'length_um': Si_2017_avg['cel length (μm)'],
+                            'volume_um3': Si_2017_avg['cell size (μm3)'],
+                            'dataset': 'Si et al. 2017',
+                            'experiment': Si_2017_avg['experiment name']})
+
+Si_avg = pd.concat([Si_2019_avg, Si_2017_avg], sort=False, ignore_index=True)
+Si_avg.to_csv('../../../data/cell_size_literature/si_size_condition_averages.csv',
+              index=False)
+
+##############################################
+##############################################
+# Fit width, length, and volume for every
+# strain at once
+##############################################
+##############################################
+
+# The length and width of experiment MG_20160101 are not included in the fits.
+fit_data = Si_avg.copy()
+fit_data.loc[fit_data['experiment'] == 'MG_20160101', ['width_um', 'length_um']] = np.nan
+coeffs = size.fit_size_laws(fit_data, groupby='strain')
+
+# Append the fit as a new version of the coefficient table if it changed.
+path = size.SIZE_COEFFICIENTS
+if os.path.exists(path):
+    table = pd.read_csv(path)
+    latest = table[table['version'] == table['version'].max()]
+    cols = ['a', 'c', 'd']
+    unchanged = (len(latest) == len(coeffs)) and np.allclose(
+                    latest.sort_values(['strain', 'quantity'])[cols].values,
+                    coeffs.sort_values(['strain', 'quantity'])[cols].values,
+                    rtol=1E-8, equal_nan=True)
+    version = table['version'].max() + (0 if unchanged else 1)
+else:
+    table, unchanged, version = pd.DataFrame([]), False, 1
+
+if unchanged:
+    print(f'Size coefficients unchanged from version {version}.')
+else:
+    coeffs['version'] = version
+    coeffs['date'] = datetime.date.today().isoformat()
+    table = pd.concat([table, coeffs], sort=False, ignore_index=True)
+    table.to_csv(path, index=False)
+    print(f'Wrote version {version} of the size coefficients.')
+print(coeffs[['strain', 'quantity', 'model', 'a', 'c', 'd', 'n_obs']])
+# %%
@@ -0,0 +1,50 @@
+#%%
+import numpy as np
+import pandas as pd
+import prot.size as size
+
+##############################################
+##############################################
+# Cross-validated comparison of candidate forms
+# of the growth laws used in prot.size
+##############################################
+##############################################
+
+# %% Cell dimensions, averaged per growth condition (Si et al. 2017, 2019)
+si = pd.read_csv('../../../data/cell_size_literature/si_size_condition_averages.csv')
+si = si.melt(id_vars=['strain', 'growth_rate_hr'],
+             value_vars=['width_um', 'length_um', 'volume_um3'],
+             var_name='quantity', value_name='value')
+si['dataset'] = 'si_2017_2019_' + si['strain']
+
+# %% RNA/protein ratio (Dai et al. 2016, data used in prot.size)
+rp = pd.DataFrame({'growth_rate_hr': size.LAMBDA_DAI, 'value': size.R_P_DAI})
+rp['quantity'] = 'RNA_P_ratio'
+rp['dataset'] = 'dai_2016'
+
+# %% DNA mass per cell (Basan et al. 2015, data used in prot.size)
+dna = pd.DataFrame({'growth_rate_hr': size.LAMBDA_BASAN_DNA, 'value': size.DNA_BASAN})
+dna['quantity'] = 'DNA_fg'
+dna['dataset'] = 'basan_2015'
+
+# %% Score the candidates. The DNA data only has six growth rates, which is
+# too few for the piecewise forms, so it is scored with leave-one-out folds.
+reports = [size.model_selection(pd.concat([si, rp], sort=False),
+                                'growth_rate_hr', 'value',
+                                ['dataset', 'quantity'], seed=42),
+           size.model_selection(dna, 'growth_rate_hr', 'value',
+                                ['dataset', 'quantity'],
+                                models=['linear', 'exponential',
+                                        'exponential_offset'],
+                                n_folds=len(dna), n_repeats=1, seed=42)]
+report = pd.concat(reports, ignore_index=True)
+report.to_csv('../../../data/cell_size_literature/growth_law_model_selection.csv',
+              index=False)
+
+# %%
+for g, d in report.groupby(['dataset', 'quantity']):
+    best = d[d['rank'] == 1]
+    print(f"{g[0]}, {g[1]}: {best['model'].values[0]} "
+          f"(cv rmse = {best['cv_rmse'].values[0]:0.3g})")
+
+# %%
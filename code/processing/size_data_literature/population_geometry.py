@@ -0,0 +1,62 @@
+#%%
+import glob
+import numpy as np
+import pandas as pd
+import prot.size as size
+
+##############################################
+##############################################
+# Population-averaged cell geometry from the
+# single-cell measurements of Si et al. 2019 and
+# Taheri-Araghi et al. 2015
+##############################################
+##############################################
+
+# %% Si et al. 2019; lengths and widths are measured for every cell.
+dfs = []
+for f in glob.glob('../../../data/si_2019_raw/*.csv'):
+    cells = pd.read_csv(f)
+    condition = f.split('supplemental_')[-1].split('.')[0]
+    dfs.append(pd.DataFrame({
+            'dataset': 'Si et al. 2019',
+            'strain': condition.split('_')[0],
+            'condition': condition,
+            'growth_rate_hr': np.log(2) * cells['elongation rate (1/hour)'],
+            'length_um': size.cycle_averaged_length(cells['newborn size (micron)'],
+                                                    cells['elongation rate (1/hour)'],
+                                                    cells['generation time (minute)'] / 60),
+            'width_um': cells['cell width (micron)']}))
+
+# %% Taheri-Araghi et al. 2015 (strain NCM3722); only lengths are measured,
+# so the width of each condition is taken from the NCM3722 size fit at the
+# mean growth rate. Elongation rates are given in doublings per minute.
+NCM3722 = size.GrowthLaw(strain='NCM3722')
+for f in glob.glob('../../../data/taheri_araghi_2015_raw/*.txt'):
+    cells = pd.read_csv(f, sep='\t')
+    growth_rate = np.log(2) * 60 * cells['elongation_rate_ss']
+    dfs.append(pd.DataFrame({
+            'dataset': 'Taheri-Araghi et al. 2015',
+            'strain': 'NCM3722',
+            'condition': f.split('2015_')[-1].split('.')[0],
+            'growth_rate_hr': growth_rate,
+            'length_um': size.cycle_averaged_length(cells['s_b_um_ss'],
+                                                    cells['elongation_rate_ss'],
+                                                    cells['gen_time_min_ss']),
+            'width_um': NCM3722.width(growth_rate.mean())}))
+cells = pd.concat(dfs, sort=False, ignore_index=True)
+
+#%%
+# Compute the geometry of every condition in a single pass over all cells.
+conditions = cells.groupby(['dataset', 'strain', 'condition'])['growth_rate_hr'].mean().reset_index()
+conditions['group'] = conditions['dataset'] + '|' + conditions['condition']
+geometry = size.population_geometry(cells['length_um'].values, cells['width_um'].values,
+                    groups=(cells['dataset'] + '|' + cells['condition']).values)
+geometry = conditions.merge(geometry, on='group').drop(columns='group')
+
+# Compare to the geometry of the mean cell.
+V_mean_cell = size.rod_volume(geometry['length_um'], geometry['width_um'])
+geometry['SV_mean_cell_um'] = size.rod_SA(geometry['length_um'], geometry['width_um'],
+                                          V_mean_cell) / V_mean_cell
+geometry.to_csv('../../../data/cell_size_literature/population_cell_geometry.csv', index=False)
+print(geometry[['dataset', 'condition', 'growth_rate_hr', 'n_cells', 'SV_um', 'SV_mean_cell_um']])
+# %%
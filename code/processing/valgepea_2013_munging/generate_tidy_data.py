@@ -3,6 +3,7 @@ import numpy as np
 import pandas as pd
 import tqdm
 import prot.size as size
+import prot.stats
 
 # Load the data quantifying absolute protein synthesis rates.
 counts = pd.read_csv('../../../data/valgepea2013_raw_data/valgepea2013_copynums.csv')
@@ -55,49 +56,39 @@ df = pd.concat(dfs, sort=False)
 
 
 #%%
-# Iterate through the conditions and correct fg and tot_per_cell as necessary.
-# Note that for this dataset we need to be more careful. If we consider the set
-# of genes quantified here relative to Schmidt et al., the total protein
-# only amounts to about 93% of the total in Schmidt - though this varies somewhat
-# with the growth condition (92-97%). In addition to renormalizing total protein
-# mass, we will also compare the total mass fraction to the best-matching growth
-# condition in Schmidt to determine the relative amount quantified here.
+# Calibrate the abundances against Schmidt et al. Note that for this dataset we
+# need to be more careful. If we consider the set of genes quantified here
+# relative to Schmidt et al., the total protein only amounts to about 93% of the
+# total in Schmidt - though this varies somewhat with the growth condition
+# (92-97%). Rather than renormalizing the total protein mass, we therefore
+# rescale each growth rate such that the genes shared with the best-matching
+# growth condition in Schmidt agree, solving for all scales at once by least
+# squares.
 
 # load Schmidt data:
 data_schmidt = pd.read_csv('../../../data/schmidt2016_longform_annotated.csv')
 
-# for c, d in data[data.dataset == 'valgepea_2013'].groupby(['condition', 'growth_rate_hr']):
-
-for g in df['growth_rate_hr'].unique():
-    print(g)
-    d = df[df.growth_rate_hr == g]
-
-    # determine Schmidt dataset with most similar growth rate
-    d_schmidt_ = data_schmidt.copy()
-    d_schmidt_['lambda_diff'] = abs(d_schmidt_['growth_rate_hr'] - g)
-    d_schmidt_ = d_schmidt_.sort_values(by='lambda_diff', ascending = True)
-
-    gr_schmidt = d_schmidt_.growth_rate_hr.values[0]
-    cond_schmidt = d_schmidt_.condition.values[0]
-
-    d_schmidt_ = d_schmidt_[d_schmidt_.growth_rate_hr == gr_schmidt]
-    d_schmidt_ = d_schmidt_[d_schmidt_.condition == cond_schmidt]
-
-    schmidt_genes = d_schmidt_[d_schmidt_.b_number.isin(d.b_number.unique())]
-    rel_schmidt = schmidt_genes.fg_per_cell.sum() / d_schmidt_.fg_per_cell.sum()
-
-    rel_corr_fg = df[df['growth_rate_hr'] == g]['reported_fg_per_cell'].sum() / \
-            size.lambda2P(g)
-
+df['dataset'] = 'valgepea_2013'
+combined = pd.concat([df.assign(calib_fg_per_cell=df['reported_fg_per_cell']),
+                      data_schmidt.assign(calib_fg_per_cell=data_schmidt['fg_per_cell'])],
+                     sort=False)
+scales, residuals = prot.stats.calibrate(combined, reference='schmidt_2016',
+                                         value_key='calib_fg_per_cell',
+                                         gene_key='b_number')
+scales = scales[scales['dataset'] == 'valgepea_2013']
+df = df.merge(scales[['condition', 'growth_rate_hr', 'scale']],
+              on=['condition', 'growth_rate_hr'], how='left')
+df['tot_per_cell'] = df['reported_tot_per_cell'] * df['scale']
+df['fg_per_cell'] = df['reported_fg_per_cell'] * df['scale']
+
+for g, d in df.groupby('growth_rate_hr'):
     print(g, ': total mass fg: ', np.round(size.lambda2P(g),2),
             ' volume: ', np.round(size.lambda2size(g),2),
-            ' relative change in total fg: ', np.round(1/rel_corr_fg, 2),
-            ' abundance relative to Schmidt: ', np.round(rel_schmidt,2))
-
-    df.loc[df['growth_rate_hr']==g, 'tot_per_cell'] = \
-                    (df.loc[df['growth_rate_hr']==g]['reported_tot_per_cell'] / rel_corr_fg) * rel_schmidt
-    df.loc[df['growth_rate_hr']==g, 'fg_per_cell'] =  \
-                    (df.loc[df['growth_rate_hr']==g]['reported_fg_per_cell'] / rel_corr_fg) * rel_schmidt
+            ' calibrated total fg: ', np.round(d['fg_per_cell'].sum(), 2),
+            ' scale: ', np.round(d['scale'].values[0], 2))
+print('median rms residual (log10) of the shared genes: ',
+      np.round(residuals[residuals['dataset'] == 'valgepea_2013']['rms_residual_log10'].median(), 2))
+df.drop(columns=['scale'], inplace=True)
 
 #%%
 df['dataset'] = 'valgepea_2013'
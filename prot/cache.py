@@ -0,0 +1,153 @@
+import os
+import hashlib
+import inspect
+import functools
+import tempfile
+import numpy as np
+import pandas as pd
+from scipy import stats
+from scipy import optimize
+
+# Fitted parameters are stored on disk as one .npz file per fit, keyed by a
+# hash of the fitting routine, the model function, the input arrays, and all
+# other arguments (e.g. the initial guess). A change in the source data
+# therefore changes the key, so stale fits are never reused. The location can
+# be changed through the PROT_CACHE_DIR environment variable; setting it to an
+# empty string switches the cache off.
+CACHE_DIR = os.environ.get('PROT_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'prot'))
+
+
+def _update(h, obj):
+    """
+    Feeds an argument into the hash `h`. Only types that can be hashed from
+    their contents are accepted; anything else raises a TypeError rather than
+    being hashed through its (possibly truncated or address-bearing) repr.
+    """
+    if isinstance(obj, pd.DataFrame):
+        h.update(f'DataFrame{obj.shape}'.encode())
+        _update(h, [str(c) for c in obj.columns])
+        _update(h, [str(t) for t in obj.dtypes])
+        h.update(pd.util.hash_pandas_object(obj).values.tobytes())
+    elif isinstance(obj, (np.ndarray, pd.Series, pd.Index)) or \
+       (isinstance(obj, (list, tuple)) and len(obj) > 0 and
+        all(isinstance(o, (int, float, np.number)) for o in obj)):
+        arr = np.ascontiguousarray(np.asarray(obj))
+        h.update(f'array{arr.dtype.str}{arr.shape}'.encode())
+        if arr.dtype.hasobject:
+            # The bytes of an object array are pointers; hash the contents.
+            h.update(pd.util.hash_array(arr.ravel()).tobytes())
+        else:
+            h.update(arr.tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(f'{type(obj).__name__}{len(obj)}'.encode())
+        for o in obj:
+            _update(h, o)
+    elif isinstance(obj, dict):
+        for k in sorted(obj):
+            h.update(repr(k).encode())
+            _update(h, obj[k])
+    elif callable(obj):
+        h.update(f'{getattr(obj, "__module__", "")}.{getattr(obj, "__qualname__", "")}'.encode())
+        try:
+            h.update(inspect.getsource(obj).encode())
+        except (OSError, TypeError):
+            code = getattr(obj, '__code__', None)
+            if code is not None:
+                h.update(code.co_code)
+                h.update(repr(code.co_consts).encode())
+    elif obj is None or isinstance(obj, (bool, int, float, complex, str, bytes,
+                                         np.generic)):
+        h.update(f'{type(obj).__name__}:{obj!r}'.encode())
+    else:
+        raise TypeError(f'Cannot compute a cache key for an argument of type '
+                        f'{type(obj).__name__}.')
+
+
+def fit_key(fn, *args, **kwargs):
+    """
+    Computes the cache key of a call of the fitting routine `fn`.
+
+    Returns
+    -------
+    key : str
+        Hexadecimal SHA-1 digest.
+    """
+    h = hashlib.sha1()
+    _update(h, fn)
+    _update(h, list(args))
+    _update(h, kwargs)
+    return h.hexdigest()
+
+
+def cached(fn):
+    """
+    Decorator storing the results of a fitting routine on disk. The routine
+    must return an array or a tuple of arrays and scalars.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not CACHE_DIR:
+            return fn(*args, **kwargs)
+        key = fit_key(fn, *args, **kwargs)
+        path = os.path.join(CACHE_DIR, f'{fn.__name__}_{key}.npz')
+        if os.path.exists(path):
+            try:
+                with np.load(path) as stored:
+                    values = [stored[f'arr_{i}'][()] for i in range(len(stored.files) - 1)]
+                    is_tuple = bool(stored['is_tuple'])
+                return tuple(values) if is_tuple else values[0]
+            except (OSError, ValueError, KeyError):
+                pass
+        result = fn(*args, **kwargs)
+        is_tuple = isinstance(result, tuple)
+        values = result if is_tuple else (result,)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Write to a temporary file first so that concurrent scripts never
+            # read a partially written fit.
+            with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix='.npz',
+                                             delete=False) as f:
+                np.savez(f, *values, is_tuple=is_tuple)
+            os.replace(f.name, path)
+        except OSError:
+            pass
+        return result
+    return wrapper
+
+
+def clear():
+    """
+    Removes all fits stored in the cache directory.
+    """
+    if CACHE_DIR and os.path.isdir(CACHE_DIR):
+        for f in os.listdir(CACHE_DIR):
+            if f.endswith('.npz'):
+                os.remove(os.path.join(CACHE_DIR, f))
+
+
+@cached
+def curve_fit(f, xdata, ydata, p0=None, **kwargs):
+    """
+    Cached version of scipy.optimize.curve_fit.
+
+    Returns
+    -------
+    popt, pcov : arrays of floats
+        Optimal parameters and their covariance.
+    """
+    return optimize.curve_fit(f, xdata, ydata, p0=p0, **kwargs)
+
+
+@cached
+def linregress(x, y):
+    """
+    Cached version of scipy.stats.linregress.
+
+    Returns
+    -------
+    slope, intercept, rvalue, pvalue, stderr : floats
+        Results of the linear regression.
+    """
+    fit = stats.linregress(x, y)
+    return (fit.slope, fit.intercept, fit.rvalue, fit.pvalue, fit.stderr)
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from . import cache
+
+# Condition-level measurements of Si et al. 2017, Current Biology,
+# http://doi.org/10.1016/j.cub.2017.03.022.
+SI_2017_DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                            'data', 'si_2017_raw', 'si2017_si.csv')
+
+# Doubling times (min) at which the C period and the C+D period switch from a
+# constant value (fast growth) to a linear dependence on the doubling time
+# (slow growth).
+TAU_C = 40
+TAU_CYC = 43
+
+_GROUPS = ['strain type (background)', 'growth media', 'inducer or drug added',
+           'concentration ', 'type of perturbation']
+_COLUMNS = {'number of origins': 'number of origins',
+            'RNA/protein': 'RNA/protein',
+            'DNA content per cell (genome equivalents)': 'DNA content per cell (genome equivalents)',
+            'C+D period (minutes)': 'C+D period (minutes)',
+            'C period (minutes)': 'C period (minutes)',
+            'growth rate (1/hours)': 'growth_rate_hr',
+            'doubling time (minutes)': 'doubling time (minutes)'}
+
+def func_lin(l, a, b):
+    """
+    Linear function of the doubling time (min), evaluated at the growth rate
+    `l` (1/hr).
+    """
+    x = 60*(np.log(2)/l)
+    return a*x + b
+
+def condition_means(path=SI_2017_DATA):
+    """
+    Averages the measurements of Si et al. 2017 over the replicates of each
+    strain and growth condition.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Si et al. 2017 supplementary table.
+
+    Returns
+    -------
+    data_si_mean : pandas DataFrame
+        Mean values per strain and condition, sorted by growth rate, with the
+        doubling time in minutes as `tau`.
+    """
+    data_si = pd.read_csv(path)
+    columns = {k: v for k, v in _COLUMNS.items() if k in data_si.columns}
+    data_si_mean = data_si.groupby(_GROUPS, dropna=False)[list(columns)].mean()
+    data_si_mean = data_si_mean.rename(columns=columns).reset_index()
+    data_si_mean = data_si_mean.rename(columns={'strain type (background)': 'strain',
+                                                'concentration ': 'concentration'})
+    data_si_mean = data_si_mean.sort_values(by='growth_rate_hr')
+    data_si_mean['tau'] = 60*(np.log(2)/data_si_mean['growth_rate_hr'])
+    return data_si_mean.reset_index(drop=True)
+
+def _fit_piecewise(data, column, tau_transition):
+    """
+    Fits the constant regime (tau <= tau_transition) and the linear regime
+    (tau > tau_transition) of a cell-cycle period.
+    """
+    const = data[data.tau <= tau_transition][column].mean()
+    lin = data[data.tau > tau_transition]
+    popt, pcov = cache.curve_fit(func_lin, lin['growth_rate_hr'].values,
+                                 lin[column].values, p0=(1, 1))
+    return const, popt, pcov
+
+@lru_cache(maxsize=None)
+def fit_cell_cycle(path=SI_2017_DATA):
+    """
+    Fits the piecewise dependence of the C period and of the C+D period on
+    the doubling time to the nutrient-limited conditions of Si et al. 2017.
+    The fits are computed once per session.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Si et al. 2017 supplementary table.
+
+    Returns
+    -------
+    params : dict
+        For each of 'tC' and 'tcyc', a dictionary with the constant value in
+        the fast-growth regime ('const'), the slope and intercept of the
+        linear regime ('popt') with their covariance ('pcov'), and the
+        transition doubling time ('tau').
+    """
+    data = condition_means(path)
+    data = data[data.strain != 'tCRISPRi (MG1655)']
+    data = data[data['type of perturbation'] == 'nutrient conditions']
+    params = {}
+    for key, column, tau in [('tC', 'C period (minutes)', TAU_C),
+                             ('tcyc', 'C+D period (minutes)', TAU_CYC)]:
+        const, popt, pcov = _fit_piecewise(data, column, tau)
+        params[key] = {'const': const, 'popt': popt, 'pcov': pcov, 'tau': tau}
+    return params
+
+def _period(key, growth_rate):
+    p = fit_cell_cycle()[key]
+    growth_rate = np.asarray(growth_rate, dtype=float)
+    with np.errstate(divide='ignore'):
+        tau = 60*(np.log(2)/growth_rate)
+    return np.where(tau <= p['tau'], p['const'], p['popt'][0] * tau + p['popt'][1])
+
+def lambda2tC(growth_rate):
+    """
+    Computes the C period (min) at the given growth rate (1/hr).
+    """
+    return _period('tC', growth_rate)[()]
+
+def lambda2tcyc(growth_rate):
+    """
+    Computes the C+D period (min) at the given growth rate (1/hr).
+    """
+    return _period('tcyc', growth_rate)[()]
+
+def lambda2Nori(growth_rate):
+    """
+    Computes the average number of origins per cell, 2**(t_cyc / tau), at
+    the given growth rate (1/hr).
+    """
+    p = fit_cell_cycle()['tcyc']
+    growth_rate = np.asarray(growth_rate, dtype=float)
+    # t_cyc / tau, written so that it stays finite as the growth rate goes to
+    # zero.
+    inv_tau = growth_rate / (60*np.log(2))
+    ratio = np.where(inv_tau >= 1 / p['tau'], p['const'] * inv_tau,
+                     p['popt'][0] + p['popt'][1] * inv_tau)
+    return (2**ratio)[()]
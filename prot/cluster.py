@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from scipy.cluster import hierarchy
+
+def trajectory_matrix(df, value_key='fg_per_cell', gene_key='gene_name',
+                      condition_key='condition', growth_rate_key='growth_rate_hr',
+                      min_coverage=1.0):
+    """
+    Builds the matrix of normalized proteome trajectories of one dataset: the
+    log10 mass fraction of each gene in each condition, with conditions
+    ordered by growth rate, centered and scaled to unit variance per gene.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with the measurements of a single dataset.
+    value_key : str
+        Key of the abundance from which the fractions are computed.
+    gene_key, condition_key, growth_rate_key : str
+        Keys identifying the genes, conditions, and growth rates. Each
+        condition and growth rate pair is a column of the matrix.
+    min_coverage : float
+        Minimum fraction of the conditions in which a gene must be measured.
+        Missing entries of the remaining genes are set to the gene mean.
+
+    Returns
+    -------
+    X : 2d-array
+        Normalized trajectories, with shape (genes, conditions).
+    genes : pandas Index
+        Genes of the rows.
+    conditions : pandas DataFrame
+        Condition and growth rate of the columns.
+    """
+    keys = [condition_key, growth_rate_key]
+    data = df[(df[value_key] > 0) & df[[gene_key] + keys].notna().all(axis=1)]
+    frac = data[value_key] / data.groupby(keys)[value_key].transform('sum')
+    conditions = data[keys].drop_duplicates().sort_values([growth_rate_key, condition_key])
+    conditions = conditions.reset_index(drop=True)
+    gene_codes, genes = pd.factorize(data[gene_key], sort=True)
+    cond_codes = pd.MultiIndex.from_frame(conditions).get_indexer(
+                                        pd.MultiIndex.from_frame(data[keys]))
+    flat = gene_codes * len(conditions) + cond_codes
+    size = len(genes) * len(conditions)
+    counts = np.bincount(flat, minlength=size)
+    sums = np.bincount(flat, weights=np.log10(frac.values), minlength=size)
+    with np.errstate(invalid='ignore'):
+        X = (sums / counts).reshape(len(genes), len(conditions))
+
+    measured = ~np.isnan(X)
+    keep = measured.mean(axis=1) >= min_coverage
+    X, genes = X[keep], genes[keep]
+    mean = np.nanmean(X, axis=1)[:, None]
+    std = np.nanstd(X, axis=1)[:, None]
+    X = np.where(np.isnan(X), 0, (X - mean) / np.where(std > 0, std, 1))
+    return X, pd.Index(genes), conditions
+
+
+def _assign(X, centers, chunk_size=4096):
+    """
+    Assigns each row of X to its nearest center, in chunks of rows.
+    """
+    labels = np.empty(len(X), dtype=int)
+    dist = np.empty(len(X))
+    c2 = (centers**2).sum(axis=1)
+    for a in range(0, len(X), chunk_size):
+        x = X[a:a + chunk_size]
+        d = (x**2).sum(axis=1)[:, None] - 2 * x @ centers.T + c2[None, :]
+        labels[a:a + chunk_size] = np.argmin(d, axis=1)
+        dist[a:a + chunk_size] = np.maximum(d[np.arange(len(x)), labels[a:a + chunk_size]], 0)
+    return labels, dist
+
+def minibatch_kmeans(X, n_clusters, batch_size=1024, max_iter=200, tol=1E-4,
+                     seed=None):
+    """
+    Clusters the rows of X by mini-batch k-means (Sculley 2010). Each
+    iteration only touches one batch of rows, so memory does not grow with
+    the number of rows.
+
+    Parameters
+    ----------
+    X : 2d-array
+        Data, with one row per observation.
+    n_clusters : int
+        Number of clusters.
+    batch_size : int
+        Number of rows per mini-batch.
+    max_iter : int
+        Maximum number of mini-batches.
+    tol : float
+        The iterations stop when the centers move by less than `tol` (mean
+        squared distance) over ten consecutive batches.
+    seed : int or None
+        Seed of the random number generator.
+
+    Returns
+    -------
+    labels : 1d-array of ints
+        Cluster of each row.
+    centers : 2d-array
+        Cluster centers.
+    inertia : float
+        Sum of the squared distances of the rows to their centers.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    n_clusters = min(n_clusters, n)
+
+    # k-means++ initialization on a subsample.
+    sample = X[rng.choice(n, size=min(n, max(10 * n_clusters, batch_size)),
+                          replace=False)]
+    centers = [sample[rng.integers(len(sample))]]
+    d = ((sample - centers[0])**2).sum(axis=1)
+    for _ in range(1, n_clusters):
+        p = d / d.sum() if d.sum() > 0 else None
+        centers.append(sample[rng.choice(len(sample), p=p)])
+        d = np.minimum(d, ((sample - centers[-1])**2).sum(axis=1))
+    centers = np.array(centers, dtype=float)
+
+    counts = np.zeros(n_clusters)
+    stalled = 0
+    for _ in range(max_iter):
+        batch = X[rng.choice(n, size=min(batch_size, n), replace=False)]
+        labels, _ = _assign(batch, centers)
+        old = centers.copy()
+        # Per-center learning rate of 1 / (number of rows seen).
+        batch_counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        counts += batch_counts
+        seen = batch_counts > 0
+        eta = batch_counts[seen] / counts[seen]
+        centers[seen] = (1 - eta[:, None]) * centers[seen] + \
+                        eta[:, None] * sums[seen] / batch_counts[seen, None]
+        shift = ((centers - old)**2).sum(axis=1).mean()
+        stalled = stalled + 1 if shift < tol else 0
+        if stalled >= 10:
+            break
+
+    labels, dist = _assign(X, centers)
+    return labels, centers, dist.sum()
+
+def approximate_hierarchy(centers, labels, n_groups, method='average'):
+    """
+    Approximate hierarchical clustering, obtained by agglomerating the
+    k-means centers rather than the individual rows.
+
+    Parameters
+    ----------
+    centers : 2d-array
+        Cluster centers from `minibatch_kmeans`.
+    labels : 1d-array of ints
+        Cluster of each row.
+    n_groups : int
+        Number of groups at which the hierarchy is cut.
+    method : str
+        Linkage method, see scipy.cluster.hierarchy.linkage.
+
+    Returns
+    -------
+    groups : 1d-array of ints
+        Group of each row, numbered from 1.
+    linkage : 2d-array
+        Linkage matrix of the centers.
+    """
+    if len(centers) < 2:
+        return np.ones(len(labels), dtype=int), np.zeros((0, 4))
+    linkage = hierarchy.linkage(centers, method=method)
+    center_groups = hierarchy.fcluster(linkage, n_groups, criterion='maxclust')
+    return center_groups[labels], linkage
+
+
+def _cluster_dataset(d, n_clusters, n_groups, trajectory_kwargs, kmeans_kwargs):
+    X, genes, conditions = trajectory_matrix(d, **trajectory_kwargs)
+    if len(genes) == 0:
+        return pd.DataFrame([])
+    labels, centers, _ = minibatch_kmeans(X, n_clusters, **kmeans_kwargs)
+    dist = ((X - centers[labels])**2).sum(axis=1)
+    result = pd.DataFrame({'gene_name': genes, 'cluster': labels + 1,
+                           'distance': np.sqrt(dist), 'n_conditions': X.shape[1]})
+    if n_groups is not None:
+        result['supercluster'] = approximate_hierarchy(centers, labels, n_groups)[0]
+    return result
+
+def cluster_trajectories(df, n_clusters=20, n_groups=None, by='dataset',
+                         n_jobs=None, seed=None, batch_size=1024, max_iter=200,
+                         **kwargs):
+    """
+    Clusters the normalized growth-rate trajectories of the proteome of each
+    dataset by mini-batch k-means, and optionally groups the clusters
+    further by hierarchical clustering of their centers. The datasets are
+    processed in parallel.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    n_clusters : int
+        Number of k-means clusters per dataset.
+    n_groups : int or None
+        If given, the number of superclusters obtained by cutting the
+        hierarchy of the k-means centers.
+    by : str
+        Key identifying the datasets, which are clustered separately.
+    n_jobs : int or None
+        Number of datasets processed at once. If None, one per dataset.
+    seed : int or None
+        Seed of the random number generator.
+    batch_size, max_iter : int
+        Passed to `minibatch_kmeans`.
+    **kwargs
+        Passed to `trajectory_matrix` (e.g. value_key, min_coverage).
+
+    Returns
+    -------
+    clusters : pandas DataFrame
+        One row per dataset and gene with the cluster (numbered from 1), the
+        distance of the trajectory to its cluster center, the number of
+        conditions, and the supercluster if `n_groups` is given.
+    """
+    gene_key = kwargs.get('gene_key', 'gene_name')
+    groups = list(df.groupby(by))
+    kmeans_kwargs = {'batch_size': batch_size, 'max_iter': max_iter, 'seed': seed}
+    with ThreadPoolExecutor(max_workers=n_jobs or max(len(groups), 1)) as pool:
+        results = list(pool.map(lambda g: _cluster_dataset(g[1], n_clusters, n_groups,
+                                                           kwargs, kmeans_kwargs),
+                                groups))
+    dfs = []
+    for (g, _), result in zip(groups, results):
+        result.insert(0, by, g[0] if type(g) == tuple else g)
+        dfs.append(result.rename(columns={'gene_name': gene_key}))
+    return pd.concat(dfs, ignore_index=True)
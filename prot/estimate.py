@@ -1,32 +1,173 @@
 import numpy as np
+from collections.abc import Mapping
 from . import size
+from . import cellcycle
 
-def load_constants(lambda_bounds = [0, 2]):
+# Constants which do not depend on the growth rate.
+_BASAL = {
+    'density': {'value':1.1, 'units': 'pg/um^3', 'source': 'BNID:103875'},
+    'dry_mass_frac': {'value': 0.3, 'units':'fractional', 'source': 'BNID:100214'},
+    'theta_C':  {'value': 0.5, 'units':'fractional', 'source': 'BNID:100649'},
+    'theta_P': {'value': 0.03, 'units': 'fractional', 'source': 'BNID:100653'},
+    'theta_S': {'value': 0.01, 'units': 'fractional', 'source': 'BNID:100655'},
+    'theta_prot': {'value': 0.5, 'units': 'fractional', 'source': 'BNID:101436'},
+    'theta_DNA': {'value': 0.03, 'units': 'fractional', 'source': 'BNID:101436'},
+    'theta_lipid': {'value':0.1, 'units': 'fractional', 'source': 'BNID:101436'},
+    'theta_RNA': {'value': 0.2, 'units': 'fractional', 'source': 'BNID:101436'},
+    'rate_DNAP': {'value': 600, 'units':'nt/s', 'source': 'BNID:104928'},
+    'rate_RNAP': {'value': 40, 'units': 'nt/s', 'source': 'BNID:101904'},
+    'L_genome': {'value': 4.6E6, 'units': 'bp', 'source': 'BNID:100269'},
+    }
+
+# Values of the derived quantities already computed, keyed by the growth rate
+# range and the name. The arrays are read-only; registries hand out copies.
+_COMPUTED = {}
+
+# Derived quantities, keyed by name, as (dependencies, function, units, source).
+# The function is called with the values of the dependencies in order.
+_DERIVED = {}
+
+def _derived(name, deps, units, source):
+    def register(fn):
+        _DERIVED[name] = (deps, fn, units, source)
+        return fn
+    return register
+
+@_derived('protein_mass', ['growth_rate'], 'fg/cell', 'calculated_quantity')
+def _protein_mass(growth_rate):
+    return size.lambda2P(growth_rate)
+
+@_derived('n_aa', ['protein_mass'], 'amino acids /cell', 'calculated_quantity')
+def _n_aa(protein_mass):
+    return protein_mass * 1E-3/ (110 / 6E11)
+
+@_derived('volume', ['growth_rate'], 'um^3', 'defined quantity')
+def _volume(growth_rate):
+    return size.lambda2size(growth_rate)
+
+@_derived('t_double', ['growth_rate'], 's', 'calculated quantity')
+def _t_double(growth_rate):
+    return 3600 * np.log(2) / growth_rate
+
+@_derived('cell_mass', ['density', 'volume'], 'pg', 'calculated quantity')
+def _cell_mass(density, volume):
+    return density * volume
+
+@_derived('t_div', ['L_genome', 'rate_DNAP'], 's', 'calculated quantity')
+def _t_div(L_genome, rate_DNAP):
+    return L_genome / rate_DNAP / 2
+
+@_derived('N_ori', ['growth_rate'], 'number', 'calculated quantity (see Si et al. 2017)')
+def _N_ori(growth_rate):
+    return cellcycle.lambda2Nori(growth_rate)
+
+@_derived('surface_area', ['growth_rate'], 'um^2', 'calculated quantity')
+def _surface_area(growth_rate):
+    return size.lambda2SA(growth_rate)
+
+
+class ConstantsRegistry(Mapping):
     """
-    Loads and returns a dictionary with a variety of numeric constants
+    Dictionary-like collection of constants in which each derived quantity
+    is computed from its declared dependencies on first access. The computed
+    values are shared between registries over the same growth rate range,
+    but every registry holds its own copies, so that modifying an entry does
+    not affect other callers.
 
     Parameters
     ----------
     lambda_bounds : list
         List of length=2 entries that define the upper and lower bounds of the
         grwoth rate range to consider. Should be in units of hr^-1
+    n_points : int
+        Number of growth rates in the range.
+    """
+    def __init__(self, lambda_bounds=(0, 2), n_points=200):
+        self.lambda_bounds = tuple(lambda_bounds)
+        self.n_points = n_points
+        self._entries = {}
+
+    def _value(self, key):
+        # Computes (or looks up) the shared, read-only value of a quantity.
+        if key in _BASAL:
+            return _BASAL[key]['value']
+        cache_key = (self.lambda_bounds, self.n_points, key)
+        if cache_key not in _COMPUTED:
+            if key == 'growth_rate':
+                value = np.linspace(self.lambda_bounds[0],
+                                    self.lambda_bounds[1], self.n_points)
+            else:
+                deps, fn, _, _ = _DERIVED[key]
+                value = fn(*[self._value(d) for d in deps])
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            _COMPUTED[cache_key] = value
+        return _COMPUTED[cache_key]
+
+    def __getitem__(self, key):
+        if key not in self._entries:
+            if key in _BASAL:
+                self._entries[key] = dict(_BASAL[key])
+            elif key == 'growth_rate':
+                self._entries[key] = {'value': self._value(key).copy(),
+                                      'units':'hr^-1',
+                                      'source':'defined quantity'}
+            elif key in _DERIVED:
+                _, _, units, source = _DERIVED[key]
+                value = self._value(key)
+                if isinstance(value, np.ndarray):
+                    value = value.copy()
+                self._entries[key] = {'value': value,
+                                      'units': units, 'source': source}
+            else:
+                raise KeyError(key)
+        return self._entries[key]
+
+    def __iter__(self):
+        yield 'growth_rate'
+        yield from _BASAL
+        yield from _DERIVED
+
+    def __len__(self):
+        return 1 + len(_BASAL) + len(_DERIVED)
+
+    def __repr__(self):
+        computed = [k for k in self if k in self._entries]
+        return (f'ConstantsRegistry(lambda_bounds={list(self.lambda_bounds)}, '
+                f'n_points={self.n_points}, computed={computed})')
+
+
+def load_constants(lambda_bounds = [0, 2], n_points=200):
+    """
+    Loads and returns a dictionary with a variety of numeric constants. Derived
+    quantities are computed on first access and reused by later calls with the
+    same growth rate range; every call returns a new registry that the caller
+    is free to modify.
+
+    Parameters
+    ----------
+    lambda_bounds : list
+        List of length=2 entries that define the upper and lower bounds of the
+        grwoth rate range to consider. Should be in units of hr^-1
+    n_points : int
+        Number of growth rates in the range. Default is 200.
 
     Returns
     -------
-    constants : dict
-        A dictonary of commonly used constants. Each entry is a dictionary 
-        with three keys -- value, units, and  source. Source will include either the BNID 
+    constants : ConstantsRegistry
+        A dictonary of commonly used constants. Each entry is a dictionary
+        with three keys -- value, units, and  source. Source will include either the BNID
         associated with that entry or the literature source
-        
+
         density : Cell density in units of pg / cubic micron
         volume : Cell volume in units of cubic micron. Given as a function of
-                growth rate 
+                growth rate
         growth_rate : User provided range of growth rates
-        dry_mass_frac : Fraction of dry mass 
+        dry_mass_frac : Fraction of dry mass
         theta_C : Fraction of dry mass that is carbon
         theta_P : Fraction of dry mass that is phosphorus
         theta_S : Fraction of dry mass that is sulfur
-        theta_prot: Fraction of dry mass that is protein        
+        theta_prot: Fraction of dry mass that is protein
         theta_DNA: Fraction of dry mass that is DNA
         theta_RNA : Fraction of dry mass that is RNA
         theta_lipid: Fraction of dry mass that is lipid
@@ -36,43 +177,4 @@ def load_constants(lambda_bounds = [0, 2]):
         L_genome: Length of single E. coli chromosome
         t_div: Time required to copy a single genome
     """
-    growth_rate = np.linspace(lambda_bounds[0], lambda_bounds[1], 200)
-
-    # Define basal sources
-    constants = {
-        'density': {'value':1.1, 'units': 'pg/um^3', 'source': 'BNID:103875'},
-        'protein_mass': {'value':size.lambda2P(growth_rate), 
-                         'units': 'fg/cell', 'source':'calculated_quantity'},
-        'n_aa': {'value':size.lambda2P(growth_rate) * 1E-3/ (110 / 6E11), 
-                         'units': 'amino acids /cell', 'source':'calculated_quantity'},                
-        'volume': {'value':size.lambda2size(growth_rate), 
-                    'units':'um^3', 'source':'defined quantity'},
-        'growth_rate': {'value': growth_rate, 
-                    'units':'hr^-1', 'source':'defined quantity'},
-        'dry_mass_frac': {'value': 0.3, 'units':'fractional', 'source': 'BNID:100214'},
-        'theta_C':  {'value': 0.5, 'units':'fractional', 'source': 'BNID:100649'},
-        'theta_P': {'value': 0.03, 'units': 'fractional', 'source': 'BNID:100653'},
-        'theta_S': {'value': 0.01, 'units': 'fractional', 'source': 'BNID:100655'},
-        'theta_prot': {'value': 0.5, 'units': 'fractional', 'source': 'BNID:101436'},
-        'theta_DNA': {'value': 0.03, 'units': 'fractional', 'source': 'BNID:101436'},
-        'theta_lipid': {'value':0.1, 'units': 'fractional', 'source': 'BNID:101436'},
-        'theta_RNA': {'value': 0.2, 'units': 'fractional', 'source': 'BNID:101436'},
-        'rate_DNAP': {'value': 600, 'units':'nt/s', 'source': 'BNID:104928'},
-        'rate_RNAP': {'value': 40, 'units': 'nt/s', 'source': 'BNID:101904'},
-        'L_genome': {'value': 4.6E6, 'units': 'bp', 'source': 'BNID:100269'},
-        }
-
-    # Define calculated quanities
-    constants['t_double'] = {'value':3600 * np.log(2) / constants['growth_rate']['value'],
-                              'units': 's', 'source':'calculated quantity'}
-    constants['cell_mass'] = {'value': constants['density']['value'] * constants['volume']['value'],
-                              'units': 'pg', 'source':'calculated quantity'}
-    constants['t_div'] = {'value': constants['L_genome']['value'] / constants['rate_DNAP']['value'] / 2,
-                          'units': 's', 'source': 'calculated quantity'}
-    constants['N_ori'] = {'value': 2**(4200/ constants['t_double']['value']),
-                          'units': 'number', 'source':'calculated quantity (see Si et al. 2017)'}
-    constants['surface_area'] = {'value': size.lambda2SA(constants['growth_rate']['value']),
-                                 'units': 'um^2', 'source': 'calculated quantity'}
-    return constants
-
-     
+    return ConstantsRegistry(lambda_bounds, n_points)
@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from . import stats
+
+# Structural proteins of the 30S and 50S ribosomal subunits.
+RIBOSOME_GENES = ['rpsA', 'rpsB', 'rpsC', 'rpsD', 'rpsE',
+                  'rpsF', 'rpsG', 'rpsH', 'rpsI', 'rpsJ', 'rpsK',
+                  'rpsL', 'rpsM', 'rpsN', 'rpsO', 'rpsP', 'rpsQ',
+                  'rpsR', 'rpsS', 'rpsT', 'rpsU', 'sra', 'rplA', 'rplB',
+                  'rplC', 'rplD', 'rplE', 'rplF', 'rplJ',
+                  'rplL', 'rplI', 'rplK', 'rplM', 'rplN', 'rplO', 'rplP', 'rplQ',
+                  'rplR', 'rplS', 'rplT', 'rplU', 'rplV', 'rplW', 'rplX', 'rplY',
+                  'rpmA', 'rpmB', 'rpmC', 'rpmD', 'rpmE', 'rpmF', 'rpmG', 'rpmH',
+                  'rpmI', 'rpmJ', 'ykgM', 'ykgO']
+
+# Elongation factor Tu.
+EF_TU_GENES = ['tufA', 'tufB']
+
+# NADH dehydrogenase I, succinate dehydrogenase, the cytochrome bo3 and bd-I
+# oxidases, and the F1-F0 ATP synthase.
+RESPIRATION_COMPLEXES = ['NADH-DHI-CPLX', 'CPLX0-8160', 'CYT-O-UBIOX-CPLX',
+                         'CYT-D-UBIOX-CPLX', 'ATPSYN-CPLX']
+
+# Carbohydrate transport.
+CARBON_UPTAKE_GO = ['GO:0008643']
+
+
+class GeneSets(object):
+    """
+    Registry of named gene sets, defined by lists of genes, GO terms,
+    complexes, or COG letters. Once compiled against an annotation table,
+    every set is a column of a boolean membership matrix over an integer
+    index of the genes, so that the mass of all sets in all conditions is
+    obtained with a single matrix product.
+    """
+    def __init__(self):
+        self.definitions = {}
+        self.genes = None
+        self.names = None
+        self.mask = None
+
+    def __repr__(self):
+        status = 'not compiled' if self.mask is None else \
+                    f'compiled over {len(self.genes)} genes'
+        return f'GeneSets({list(self.definitions)}, {status})'
+
+    def __contains__(self, name):
+        return name in self.definitions
+
+    def add(self, name, genes=None, go_terms=None, complexes=None,
+            cog_letters=None):
+        """
+        Registers a gene set. A gene belongs to the set if it satisfies any of
+        the given criteria.
+
+        Parameters
+        ----------
+        name : str
+            Name of the set.
+        genes : list of str or None
+            Gene names.
+        go_terms : list of str or None
+            GO terms, matched against the `go_terms` annotations.
+        complexes : list of str or None
+            Complexes (EcoCyc identifiers) of which the genes are subunits.
+        cog_letters : str or None
+            COG letters, matched against the `cog_letter` annotations.
+
+        Returns
+        -------
+        self : GeneSets
+        """
+        if genes is None and go_terms is None and complexes is None and \
+            cog_letters is None:
+            raise ValueError(f'No definition given for gene set {name}.')
+        if type(genes) == str:
+            genes = [genes]
+        if type(go_terms) == str:
+            go_terms = [go_terms]
+        if type(complexes) == str:
+            complexes = [complexes]
+        self.definitions[name] = {'genes': genes, 'go_terms': go_terms,
+                                  'complexes': complexes,
+                                  'cog_letters': cog_letters}
+        # Any previous compilation is out of date.
+        self.mask = None
+        return self
+
+    def compile(self, df, complexes=None, gene_key='gene_name',
+                go_key='go_terms', cog_key='cog_letter', complex_key='complex'):
+        """
+        Evaluates every registered set over the genes of an annotation table.
+
+        Parameters
+        ----------
+        df : pandas DataFrame
+            Table with the genes and their GO and COG annotations, e.g. the
+            compiled absolute measurements.
+        complexes : pandas DataFrame or None
+            Table with the complex of each subunit, e.g. the compiled
+            annotated complexes. Required if any set is defined by complexes.
+        gene_key, go_key, cog_key, complex_key : str
+            Keys of the gene names and annotations.
+
+        Returns
+        -------
+        self : GeneSets
+        """
+        annotation = df.drop_duplicates(gene_key)
+        annotation = annotation[annotation[gene_key].notna()]
+        genes = pd.Index(annotation[gene_key].values)
+        if complexes is not None:
+            genes = genes.union(pd.Index(complexes[gene_key].dropna().unique()))
+        genes = genes.sort_values()
+        annotation = annotation.set_index(gene_key).reindex(genes).reset_index()
+
+        mask = np.zeros((len(genes), len(self.definitions)), dtype=bool)
+        for i, defn in enumerate(self.definitions.values()):
+            if defn['genes'] is not None:
+                mask[:, i] |= genes.isin(defn['genes'])
+            if defn['go_terms'] is not None and go_key in annotation:
+                mask[:, i] |= stats.has_annotation(annotation, defn['go_terms'],
+                                                   key=go_key)
+            if defn['cog_letters'] is not None and cog_key in annotation:
+                mask[:, i] |= stats.has_annotation(annotation, list(defn['cog_letters']),
+                                                   key=cog_key, sep='')
+            if defn['complexes'] is not None:
+                if complexes is None:
+                    raise ValueError('A complex table is required to compile sets defined by complexes.')
+                subunits = complexes[complexes[complex_key].isin(defn['complexes'])]
+                mask[:, i] |= genes.isin(subunits[gene_key])
+        self.genes = genes
+        self.names = pd.Index(list(self.definitions))
+        self.mask = mask
+        return self
+
+    def _check_compiled(self):
+        if self.mask is None:
+            raise RuntimeError('The gene sets must be compiled first, see GeneSets.compile.')
+
+    def members(self, name):
+        """
+        Returns the genes of a compiled set.
+        """
+        self._check_compiled()
+        return self.genes[self.mask[:, self.names.get_loc(name)]]
+
+    def contains(self, df, name, gene_key='gene_name'):
+        """
+        Evaluates the membership of each row of a dataframe in a compiled set.
+
+        Parameters
+        ----------
+        df : pandas DataFrame
+            Dataframe with a gene name column.
+        name : str
+            Name of the set.
+        gene_key : str
+            Key identifying the genes.
+
+        Returns
+        -------
+        in_set : pandas Series of bools
+            Whether the gene of each row belongs to the set.
+        """
+        self._check_compiled()
+        idx = self.genes.get_indexer(df[gene_key])
+        in_set = np.where(idx >= 0, self.mask[idx, self.names.get_loc(name)], False)
+        return pd.Series(in_set, index=df.index)
+
+    def sector_fractions(self, df, by=['dataset', 'condition', 'growth_rate_hr'],
+                         names=None, gene_key='gene_name',
+                         mass_key='fg_per_cell', count_key='tot_per_cell'):
+        """
+        Computes the mass and the count of every set and their fractions of
+        the total in every group.
+
+        Parameters
+        ----------
+        df : pandas DataFrame
+            Dataframe with proteomic information
+        by : str or list of str
+            Key(s) defining the groups, e.g. dataset and condition.
+        names : list of str or None
+            Sets to evaluate. If None, all registered sets.
+        gene_key : str
+            Key identifying the genes.
+        mass_key, count_key : str
+            Keys of the mass and the count of each protein.
+
+        Returns
+        -------
+        sectors : pandas DataFrame
+            One row per group and set, with the mass and count of the set
+            (`mass`, `count`) and their fractions of the total of the group
+            (`frac_mass`, `frac_count`).
+        """
+        self._check_compiled()
+        if type(by) == str:
+            by = [by]
+        names = self.names if names is None else pd.Index(names)
+        mask = self.mask[:, self.names.get_indexer(names)].astype(float)
+
+        df = df[df[by].notna().all(axis=1)]
+        group_codes = df.groupby(by, sort=True).ngroup().values
+        labels = df[by].drop_duplicates().sort_values(by).reset_index(drop=True)
+        gene_idx = self.genes.get_indexer(df[gene_key])
+        known = gene_idx >= 0
+
+        values = np.nan_to_num(df[[mass_key, count_key]].values.astype(float))
+        totals = np.array([np.bincount(group_codes, weights=values[:, j],
+                                       minlength=len(labels)) for j in range(2)]).T
+        dfs = []
+        for j, key in enumerate(['mass', 'count']):
+            # Groups x genes abundance matrix, summed over duplicate rows.
+            X = sparse.csr_matrix((values[known, j], (group_codes[known], gene_idx[known])),
+                                  shape=(len(labels), len(self.genes)))
+            dfs.append(X @ mask)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frac_mass = dfs[0] / totals[:, [0]]
+            frac_count = dfs[1] / totals[:, [1]]
+
+        sectors = labels.iloc[np.repeat(np.arange(len(labels)), len(names))].reset_index(drop=True)
+        sectors['gene_set'] = np.tile(names.values, len(labels))
+        sectors['mass'] = dfs[0].ravel()
+        sectors['count'] = dfs[1].ravel()
+        sectors['frac_mass'] = frac_mass.ravel()
+        sectors['frac_count'] = frac_count.ravel()
+        return sectors
+
+
+def default_genesets():
+    """
+    Returns the registry of the gene sets used throughout the analysis:
+    the ribosomal proteins (`ribosome`), elongation factor Tu (`ef_tu`), the
+    respiratory complexes (`respiration`), and the carbohydrate transporters
+    (`carbon_uptake`).
+    """
+    genesets = GeneSets()
+    genesets.add('ribosome', genes=RIBOSOME_GENES)
+    genesets.add('ef_tu', genes=EF_TU_GENES)
+    genesets.add('respiration', complexes=RESPIRATION_COMPLEXES)
+    genesets.add('carbon_uptake', go_terms=CARBON_UPTAKE_GO)
+    return genesets
@@ -1,87 +1,1051 @@
 import pandas as pd
 import numpy as np
+import copy
+import os
+import warnings
+from contextlib import contextmanager
+from functools import lru_cache
 from scipy import stats
-from scipy.optimize import curve_fit
+from . import cache
 def func(x, a, c, d):
     return a*np.exp(-c*x)+d
+
+def func2(x, a, c):
+    return a*np.exp(-c*x)
+
 #%
+# Data from Hwa lab (Dai et al. 2016, Basan et al. 2015) for RNA/Protein
+# ratios and total DNA content per cell. Note that the protein measurements
+# still have caveat that it is based on a bulk colorimetric assay, but I think
+# this is the best that we can do; I believe the ratio is a pretty reliable
+# result. The data was extracted from these papers:
+[LAMBDA_DAI, R_P_DAI] = np.array(\
+        [[0.0, 0.08853279947047754],
+        [0.03324706890845652, 0.09742834356027935],
+        [0.12844176066233703, 0.12157153165470358],
+        [0.19652012565308674, 0.12917148174069676],
+        [0.23055930814846148, 0.13297145678369332],
+        [0.2849547247405284, 0.14694954887503597],
+        [0.33601892391911736, 0.15201256530868013],
+        [0.4074068045812377, 0.17107537557577435],
+        [0.417639175984852, 0.16979497279144085],
+        [0.4517000602223341, 0.17104716331103476],
+        [0.485674137491387, 0.18249049192423916],
+        [0.5503561798423366, 0.1888187199227418],
+        [0.6727865579409387, 0.21549233114688282],
+        [0.6864152519843529, 0.21548365045003987],
+        [0.7000547968988209, 0.21420107749149564],
+        [0.7170798135820351, 0.21546411888214323],
+        [0.744196140345166, 0.2320073568905744],
+        [0.9177883754618401, 0.25227895419304786],
+        [0.9448830004828637, 0.27136997672488156],
+        [0.9926268331190284, 0.2662440252391261],
+        [0.9753630972726335, 0.29300661360590724],
+        [1.0979236858238794, 0.3043935176896325],
+        [1.1624538159800777, 0.32855623735195344],
+        [1.2677832212980895, 0.36288405301735593],
+        [1.566952587118931, 0.4404005056505911],
+        [1.7949076862145108, 0.4784718718295111]]).T
+
+# DNA measurements from Basan et al. 2015, growth rate (hr-1), dna
+# (femtogram per cell)
+LAMBDA_BASAN_DNA = np.array([0.42, 0.45, 0.7, 0.98, 1.27, 1.84])
+DNA_BASAN = 1E15*np.divide(1E-6*np.array([16.5, 14.2, 14.1, 11.9, 11.3, 11.1]),
+                      1E8*np.array([19.4, 17.1, 16.0, 10.7, 7.93, 3.43]))
+
+# Table of size coefficients fit to the Si et al. 2017, 2019 data for every
+# strain, generated by code/processing/size_data_literature/fit_si_size_coefficients.py
+SIZE_COEFFICIENTS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        '..', 'data', 'cell_size_literature',
+                        'si_size_fit_coefficients.csv')
+
+# Fit function of each size quantity.
+SIZE_MODELS = {'width': func2, 'length': func, 'volume': func2}
+
+def fit_exponential(x, y, groups, offset=False, maxiter=200, tol=1E-10):
+    """
+    Fits a*np.exp(-c*x) (or a*np.exp(-c*x)+d if `offset`) to the data of
+    every group at once by batched Levenberg-Marquardt least squares. The
+    starting point of each group is the best fit over a grid of decay rates,
+    for which the remaining coefficients are linear.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Independent and dependent variables. Entries where either is NaN are
+        ignored.
+    groups : array-like
+        Group label of each entry.
+    offset : bool
+        If True, fit the offset d as well.
+    maxiter : int
+        Maximum number of iterations.
+    tol : float
+        Relative tolerance on the change in the coefficients.
+
+    Returns
+    -------
+    labels : array
+        Unique group labels.
+    popt : array of floats
+        Coefficients (a, c[, d]) of shape (n_groups, n_coefficients).
+    pcov : array of floats
+        Covariance matrices of shape (n_groups, n_coefficients, n_coefficients)
+        scaled by the residual variance, as in scipy.optimize.curve_fit.
+    n_obs : array of ints
+        Number of data points in each group.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    codes, labels = pd.factorize(np.asarray(groups)[keep], sort=True)
+    x, y = x[keep], y[keep]
+
+    # Pad the data to an (n_groups, max_obs) array with a mask.
+    n_groups, k = len(labels), 3 if offset else 2
+    order = np.argsort(codes, kind='stable')
+    n_obs = np.bincount(codes, minlength=n_groups)
+    pos = np.arange(len(codes)) - np.repeat(np.cumsum(n_obs) - n_obs, n_obs)
+    X = np.zeros((n_groups, n_obs.max()))
+    Y = np.zeros_like(X)
+    M = np.zeros_like(X)
+    X[codes[order], pos] = x[order]
+    Y[codes[order], pos] = y[order]
+    M[codes[order], pos] = 1
+
+    # Grid search over the decay rate; a and d follow in closed form.
+    c_grid = np.linspace(-5, 5, 1001)
+    E = np.exp(-c_grid[None, :, None] * X[:, None, :]) * M[:, None, :]
+    S_ee = (E**2).sum(axis=-1)
+    S_ey = (E * Y[:, None, :]).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if offset:
+            n, S_e = n_obs[:, None], E.sum(axis=-1)
+            S_y = (Y * M).sum(axis=-1)[:, None]
+            det = S_ee * n - S_e**2
+            a = (n * S_ey - S_e * S_y) / det
+            d = (S_ee * S_y - S_e * S_ey) / det
+            ssr = ((Y * M)**2).sum(axis=-1)[:, None] - a * S_ey - d * S_y
+        else:
+            a = S_ey / S_ee
+            ssr = ((Y * M)**2).sum(axis=-1)[:, None] - a * S_ey
+    best = np.nanargmin(np.where(np.isfinite(ssr), ssr, np.nan), axis=1)
+    rows = np.arange(n_groups)
+    p = [a[rows, best], c_grid[best]]
+    if offset:
+        p.append(d[rows, best])
+    p = np.stack(p, axis=1)
+
+    def residuals(p):
+        e = np.exp(-p[:, 1:2] * X)
+        f = p[:, :1] * e + (p[:, 2:3] if offset else 0)
+        return (Y - f) * M, e
+
+    def jacobian(p, e):
+        J = [e, -p[:, :1] * X * e]
+        if offset:
+            J.append(np.ones_like(X))
+        return np.stack(J, axis=-1) * M[..., None]
+
+    r, e = residuals(p)
+    ssr = (r**2).sum(axis=1)
+    damping = np.full(n_groups, 1E-3)
+    for _ in range(maxiter):
+        J = jacobian(p, e)
+        JTJ = np.einsum('gnk,gnl->gkl', J, J)
+        g = np.einsum('gnk,gn->gk', J, r)
+        A = JTJ + damping[:, None, None] * JTJ * np.eye(k)
+        dp = np.linalg.solve(A, g[..., None])[..., 0]
+        r_new, e_new = residuals(p + dp)
+        ssr_new = (r_new**2).sum(axis=1)
+        accept = ssr_new < ssr
+        p[accept] += dp[accept]
+        r[accept], e[accept], ssr[accept] = r_new[accept], e_new[accept], ssr_new[accept]
+        damping = np.where(accept, damping / 10, damping * 10)
+        if np.all(np.abs(dp) <= tol * (np.abs(p) + tol)):
+            break
+
+    J = jacobian(p, e)
+    JTJ = np.einsum('gnk,gnl->gkl', J, J)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s2 = ssr / (n_obs - k)
+        pcov = np.linalg.pinv(JTJ) * np.where(n_obs > k, s2, np.inf)[:, None, None]
+    return labels, p, pcov, n_obs
+
+def fit_size_laws(df, groupby='strain', growth_rate='growth_rate_hr',
+                  columns={'width': 'width_um', 'length': 'length_um',
+                           'volume': 'volume_um3'}):
+    """
+    Fits the width, length, and volume growth laws (see `SIZE_MODELS`) for
+    every group of a table of condition-averaged cell dimensions at once.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Table with one row per growth condition. NaN entries are left out of
+        the fit of that quantity.
+    groupby : str
+        Column identifying the groups (e.g. strain) to fit separately.
+    growth_rate : str
+        Column with the growth rate in hr^-1.
+    columns : dict
+        Column of each size quantity.
+
+    Returns
+    -------
+    coeffs : pandas DataFrame
+        Tidy table with one row per group and quantity. Includes the
+        coefficients a, c, d (NaN without offset), their covariance as
+        columns `cov_a_a`, `cov_a_c`, ..., the number of data points, and the
+        range of growth rates they span.
+    """
+    names = ['a', 'c', 'd']
+    dfs = []
+    for quantity, col in columns.items():
+        offset = SIZE_MODELS[quantity] is func
+        data = df[[groupby, growth_rate, col]].dropna()
+        labels, popt, pcov, n_obs = fit_exponential(data[growth_rate].values,
+                    data[col].values, data[groupby].values, offset=offset)
+        lam = data.groupby(groupby)[growth_rate].agg(['min', 'max']).loc[labels]
+        _df = pd.DataFrame({groupby: labels, 'quantity': quantity,
+                            'model': SIZE_MODELS[quantity].__name__,
+                            'n_obs': n_obs,
+                            'lambda_min': lam['min'].values,
+                            'lambda_max': lam['max'].values})
+        for i, n in enumerate(names):
+            _df[n] = popt[:, i] if i < popt.shape[1] else np.nan
+        for i, n in enumerate(names):
+            for j, m in enumerate(names):
+                _df[f'cov_{n}_{m}'] = pcov[:, i, j] if max(i, j) < popt.shape[1] else np.nan
+        dfs.append(_df)
+    return pd.concat(dfs, ignore_index=True)
+
+# The functions below score candidate forms of the growth laws by k-fold
+# cross-validation. Each candidate fits every training set (all folds of all
+# repeats) in one batched call and predicts at every data point.
+
+def _weighted_line(x, y, W):
+    """
+    Weighted least-squares lines for every set of weights along the last
+    axis of W. Returns the intercepts and slopes.
+    """
+    Sw, Sx, Sy = W.sum(axis=-1), (W * x).sum(axis=-1), (W * y).sum(axis=-1)
+    Sxx, Sxy = (W * x**2).sum(axis=-1), (W * x * y).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (Sw * Sxy - Sx * Sy) / (Sw * Sxx - Sx**2)
+        intercept = (Sy - slope * Sx) / Sw
+    return intercept, slope
+
+def _cv_linear(x, y, W, **kwargs):
+    a, b = _weighted_line(x, y, W)
+    return a[:, None] + b[:, None] * x, 2, {}
+
+def _cv_piecewise(x, y, W, breakpoint=None, min_points=3, **kwargs):
+    # Candidate breakpoints lie between consecutive distinct growth rates.
+    if breakpoint is None:
+        xs = np.unique(x)
+        bps = 0.5 * (xs[1:] + xs[:-1])
+    else:
+        bps = np.array([breakpoint])
+    low = (x[None, :] <= bps[:, None])
+    W_low = W[:, None, :] * low
+    W_high = W[:, None, :] * ~low
+    a_l, b_l = _weighted_line(x, y, W_low)
+    a_h, b_h = _weighted_line(x, y, W_high)
+    pred = np.where(low, a_l[..., None] + b_l[..., None] * x,
+                         a_h[..., None] + b_h[..., None] * x)
+    ssr = (W[:, None, :] * (y - pred)**2).sum(axis=-1)
+    valid = (W_low.sum(axis=-1) >= min_points) & (W_high.sum(axis=-1) >= min_points)
+    best = np.argmin(np.where(valid & np.isfinite(ssr), ssr, np.inf), axis=1)
+    rows = np.arange(len(W))
+    return pred[rows, best], 4 if breakpoint is not None else 5, {'breakpoint': bps[best]}
+
+def _cv_hinge(x, y, W, min_points=2, **kwargs):
+    # Continuous piecewise-linear model y = a + b*x + c*max(0, x - bp).
+    xs = np.unique(x)
+    bps = 0.5 * (xs[1:] + xs[:-1])
+    phi = np.stack(np.broadcast_arrays(np.ones_like(x)[None, :], x[None, :],
+                                       np.maximum(0, x[None, :] - bps[:, None])),
+                   axis=-1)
+    A = np.einsum('bn,pni,pnj->bpij', W, phi, phi)
+    g = np.einsum('bn,pni,n->bpi', W, phi, y)
+    A = A + 1E-12 * np.eye(3)
+    coeffs = np.linalg.solve(A, g[..., None])[..., 0]
+    pred = np.einsum('pni,bpi->bpn', phi, coeffs)
+    ssr = (W[:, None, :] * (y - pred)**2).sum(axis=-1)
+    valid = (W[:, None, :] * (x[None, :] > bps[:, None])).sum(axis=-1) >= min_points
+    best = np.argmin(np.where(valid & np.isfinite(ssr), ssr, np.inf), axis=1)
+    rows = np.arange(len(W))
+    return pred[rows, best], 4, {'breakpoint': bps[best]}
+
+def _cv_exponential(x, y, W, offset=False, **kwargs):
+    rows, cols = np.nonzero(W)
+    labels, popt, _, _ = fit_exponential(x[cols], y[cols], rows, offset=offset)
+    pred = np.full(W.shape, np.nan)
+    f = func if offset else func2
+    pred[labels] = f(x[None, :], *popt.T[:, :, None])
+    return pred, 3 if offset else 2, {}
+
+# Candidate forms of the growth laws, as (cross-validation function, options).
+GROWTH_LAW_CANDIDATES = {
+    'linear': (_cv_linear, {}),
+    'exponential': (_cv_exponential, {'offset': False}),
+    'exponential_offset': (_cv_exponential, {'offset': True}),
+    'piecewise_fixed': (_cv_piecewise, {'breakpoint': 0.69}),
+    'piecewise': (_cv_piecewise, {}),
+    'hinge': (_cv_hinge, {}),
+    }
+
+def cross_validate(x, y, models=None, n_folds=5, n_repeats=20, seed=None):
+    """
+    Scores candidate growth-law forms by repeated k-fold cross-validation.
+    All folds of all repeats are fit at once for each candidate.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Growth rates (1/hr) and measured quantity. NaN entries are ignored.
+    models : list of str or None
+        Candidates to score, see `GROWTH_LAW_CANDIDATES`. If None, all
+        candidates are scored.
+    n_folds : int
+        Number of folds.
+    n_repeats : int
+        Number of random partitions into folds.
+    seed : int or None
+        Seed of the random number generator.
+
+    Returns
+    -------
+    scores : pandas DataFrame
+        One row per candidate with the number of parameters, the
+        cross-validated root mean squared error and its standard deviation
+        over the repeats, the root mean squared error of the fit to all
+        data, and the breakpoint of the fit to all data (if any). Sorted by
+        the cross-validated error.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[keep], y[keep]
+    if models is None:
+        models = list(GROWTH_LAW_CANDIDATES.keys())
+
+    # Training weights of every fold of every repeat, followed by all data.
+    rng = np.random.default_rng(seed)
+    folds = np.array([rng.permutation(len(x)) % n_folds for _ in range(n_repeats)])
+    test = (folds[:, None, :] == np.arange(n_folds)[None, :, None])
+    W = np.vstack([(~test).reshape(-1, len(x)), np.ones((1, len(x)))]).astype(float)
+    test = test.reshape(-1, len(x))
+
+    dfs = []
+    for m in models:
+        fn, options = GROWTH_LAW_CANDIDATES[m]
+        pred, n_params, extra = fn(x, y, W, **options)
+        err = np.where(np.isfinite(pred[:-1]), (y - pred[:-1])**2, np.inf)
+        mse = (err * test).sum(axis=1).reshape(n_repeats, n_folds).sum(axis=1) / len(x)
+        rmse = np.sqrt(mse)
+        _df = pd.DataFrame({'model': m, 'n_params': n_params, 'n_obs': len(x),
+                            'cv_rmse': np.sqrt(mse.mean()),
+                            'cv_rmse_std': rmse.std(),
+                            'rmse': np.sqrt(np.mean((y - pred[-1])**2)),
+                            'breakpoint': extra['breakpoint'][-1] if 'breakpoint' in extra else np.nan},
+                            index=[0])
+        dfs.append(_df)
+    scores = pd.concat(dfs, ignore_index=True).sort_values('cv_rmse')
+    scores['rank'] = np.arange(len(scores)) + 1
+    return scores.reset_index(drop=True)
+
+def model_selection(df, x, y, groupby, models=None, **kwargs):
+    """
+    Runs `cross_validate` for every group of a tidy table and returns a
+    single ranked report.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Tidy table with the data.
+    x, y : str
+        Columns with the growth rate and the measured quantity.
+    groupby : str or list of str
+        Columns identifying the datasets to score separately.
+    models : list of str or None
+        Candidates to score, see `GROWTH_LAW_CANDIDATES`.
+    **kwargs
+        Passed to `cross_validate`.
+
+    Returns
+    -------
+    report : pandas DataFrame
+        Scores of every candidate for every group, ranked within each group.
+    """
+    if type(groupby) == str:
+        groupby = [groupby]
+    dfs = []
+    for g, d in df.groupby(groupby):
+        scores = cross_validate(d[x].values, d[y].values, models, **kwargs)
+        for k, v in zip(groupby, g):
+            scores[k] = v
+        dfs.append(scores)
+    report = pd.concat(dfs, ignore_index=True)
+    return report[groupby + [c for c in report.columns if c not in groupby]]
+
+def load_size_params(strain='MG1655', version=None, path=SIZE_COEFFICIENTS):
+    """
+    Loads the size coefficients of a strain from the coefficient table.
+
+    Parameters
+    ----------
+    strain : str
+        Strain (background) to load.
+    version : int or None
+        Version of the table to load. If None, the latest version is used.
+    path : str
+        Path to the coefficient table.
+
+    Returns
+    -------
+    size_params : dict
+        Coefficients of the width, length, and volume fits.
+    size_cov : dict
+        Covariance matrices of the coefficients.
+    size_lambda_range : tuple
+        Range of growth rates (1/hr) covered by the fitted data.
+    """
+    coeffs = pd.read_csv(path)
+    if version is None:
+        version = coeffs['version'].max()
+    coeffs = coeffs[(coeffs['version'] == version) & (coeffs['strain'] == strain)]
+    if len(coeffs) == 0:
+        raise ValueError(f'No size coefficients for strain {strain} (version {version}).')
+    size_params, size_cov = {}, {}
+    for _, row in coeffs.iterrows():
+        names = ['a', 'c', 'd'] if row['model'] == 'func' else ['a', 'c']
+        size_params[row['quantity']] = tuple(row[names].astype(float))
+        size_cov[row['quantity']] = np.array([[row[f'cov_{n}_{m}'] for m in names]
+                                              for n in names])
+    size_lambda_range = (coeffs['lambda_min'].max(), coeffs['lambda_max'].min())
+    return size_params, size_cov, size_lambda_range
+
+@cache.cached
+def _linear_fit(x, y):
+    """
+    Ordinary least-squares fit of a line, returning the slope and intercept
+    along with their covariance matrix.
+    """
+    fit = stats.linregress(x, y)
+    n = len(x)
+    resid = y - (fit.slope * x + fit.intercept)
+    s2 = np.sum(resid**2) / (n - 2)
+    Sxx = np.sum((x - np.mean(x))**2)
+    xbar = np.mean(x)
+    pcov = s2 * np.array([[1 / Sxx, -xbar / Sxx],
+                          [-xbar / Sxx, 1 / n + xbar**2 / Sxx]])
+    return np.array([fit.slope, fit.intercept]), pcov
+
+
+class GrowthLaw(object):
+    """
+    Empirical growth-law model for cell size and total protein mass per cell.
+    The RNA/protein and DNA calibration fits are performed once, on first
+    use, and the piecewise model is evaluated with array operations.
+
+    Parameters
+    ----------
+    size_params : dict or None
+        Dictionary with keys `width`, `length`, and `volume` giving the
+        coefficients of the exponential size fits. If None, the coefficients
+        of `strain` are loaded from the size coefficient table on first use.
+    breakpoint : float
+        Growth rate (1/hr) separating the two linear RNA/protein regimes.
+    lambda_RP, RP : array-like
+        Growth rates (1/hr) and RNA/protein ratios used for the piecewise
+        linear fit. Defaults to Dai et al. 2016.
+    lambda_DNA, DNA : array-like
+        Growth rates (1/hr) and DNA mass per cell (fg) used for the
+        exponential fit. Defaults to Basan et al. 2015.
+    size_cov : dict or None
+        Covariance matrices of the size coefficients, keyed as
+        `size_params`. Coefficients without a covariance are held fixed when
+        drawing ensembles.
+    size_lambda_range : list or None
+        Range of growth rates (1/hr) covered by the data of the size fits.
+    strain, version : str, int or None
+        Strain and table version of the size coefficients loaded when
+        `size_params` is None. See `load_size_params`.
+
+    Notes
+    -----
+    The coefficients may also be arrays of shape (n_draws, 1), in which case
+    every growth law returns an (n_draws, n_lambda) array. See `sample`.
+    """
+    def __init__(self, size_params=None, breakpoint=0.69,
+                 lambda_RP=LAMBDA_DAI, RP=R_P_DAI,
+                 lambda_DNA=LAMBDA_BASAN_DNA, DNA=DNA_BASAN,
+                 size_cov=None, size_lambda_range=None,
+                 strain='MG1655', version=None):
+        self.strain = strain
+        self.version = version
+        self._size = None
+        if size_params is not None:
+            if size_lambda_range is None:
+                size_lambda_range = (-np.inf, np.inf)
+            self._size = (dict(size_params), dict(size_cov or {}),
+                          tuple(size_lambda_range))
+        self.breakpoint = breakpoint
+        self.lambda_RP = np.asarray(lambda_RP, dtype=float)
+        self.RP = np.asarray(RP, dtype=float)
+        self.lambda_DNA = np.asarray(lambda_DNA, dtype=float)
+        self.DNA = np.asarray(DNA, dtype=float)
+        self._params = None
+        self._cov = None
+
+    def fit(self):
+        """
+        Fits the two linear RNA/protein regimes and the exponential DNA
+        scaling, storing the coefficients on the object.
+
+        Returns
+        -------
+        params : dict
+            Dictionary with the slopes and intercepts of the RNA/protein
+            regimes (`RP_A`, `RP_B`) and the DNA fit coefficients (`DNA`).
+            The corresponding covariance matrices are stored in `cov`.
+        """
+        low = self.lambda_RP <= self.breakpoint
+        popt_A, pcov_A = _linear_fit(self.lambda_RP[low], self.RP[low])
+        popt_B, pcov_B = _linear_fit(self.lambda_RP[~low], self.RP[~low])
+        popt_dna, pcov_dna = cache.curve_fit(func, self.lambda_DNA, self.DNA,
+                                             p0=(1, 1e-6, 1))
+        self._params = {'RP_A': tuple(popt_A),
+                        'RP_B': tuple(popt_B),
+                        'DNA': tuple(popt_dna)}
+        self._cov = {'RP_A': pcov_A, 'RP_B': pcov_B, 'DNA': pcov_dna}
+        return self._params
+
+    @property
+    def size_params(self):
+        if self._size is None:
+            self._size = load_size_params(self.strain, self.version)
+        return self._size[0]
+
+    @property
+    def size_cov(self):
+        self.size_params
+        return self._size[1]
+
+    @property
+    def size_lambda_range(self):
+        self.size_params
+        return self._size[2]
+
+    @property
+    def params(self):
+        if self._params is None:
+            self.fit()
+        return self._params
+
+    @property
+    def cov(self):
+        if self._cov is None:
+            self.fit()
+        return self._cov
+
+    def sample(self, n_draws=1000, seed=None):
+        """
+        Draws parameter sets from the fit covariances and returns them as a
+        new model whose growth laws evaluate all draws at once.
+
+        The prefactor and offset of the exponential fits are drawn on a log
+        scale, with their covariances propagated to first order, so that the
+        sizes and DNA mass of every draw remain positive. The linear
+        RNA/protein coefficients are drawn as fitted.
+
+        Parameters
+        ----------
+        n_draws : int
+            Number of parameter sets to draw.
+        seed : int or None
+            Seed of the random number generator.
+
+        Returns
+        -------
+        ensemble : GrowthLaw
+            Model with coefficients of shape (n_draws, 1). Evaluating a growth
+            law on n_lambda growth rates returns an (n_draws, n_lambda) array.
+        """
+        rng = np.random.default_rng(seed)
+
+        def draw(mean, cov, positive=()):
+            mean = np.array(mean, dtype=float)
+            if cov is None:
+                draws = np.tile(mean, (n_draws, 1))
+            else:
+                log = [i for i in positive if mean[i] > 0]
+                J = np.ones(len(mean))
+                J[log] = 1 / mean[log]
+                mean[log] = np.log(mean[log])
+                draws = rng.multivariate_normal(mean, cov * np.outer(J, J),
+                                                size=n_draws)
+                draws[:, log] = np.exp(draws[:, log])
+            return tuple(draws.T[:, :, None])
+
+        def amplitudes(params):
+            # Prefactor of func2, prefactor and offset of func.
+            return (0, 2) if len(params) == 3 else (0,)
+
+        ensemble = copy.copy(self)
+        ensemble._params = {k: draw(v, self.cov[k],
+                                    amplitudes(v) if k == 'DNA' else ())
+                            for k, v in self.params.items()}
+        ensemble._size = ({k: draw(v, self.size_cov.get(k), amplitudes(v))
+                           for k, v in self.size_params.items()},
+                          {}, self.size_lambda_range)
+        return ensemble
+
+    @property
+    def fit_range(self):
+        """
+        Range of growth rates (1/hr) covered by both the size and the
+        RNA/protein calibration data.
+        """
+        return (max(self.size_lambda_range[0], self.lambda_RP.min()),
+                min(self.size_lambda_range[1], self.lambda_RP.max()))
+
+    def inverse(self, key, y, lambda_bounds=(0, 3), tol=1E-10, maxiter=50):
+        """
+        Solves the growth law `key` for the growth rate. Width and volume
+        are inverted in closed form; all other growth laws are solved with a
+        vectorized, bracketed Newton iteration.
+
+        Parameters
+        ----------
+        key : str
+            Name of the growth law, e.g. 'size', 'P', or 'SV'.
+        y : float or array of floats
+            Values of the growth law to invert.
+        lambda_bounds : list
+            Bracket of growth rates (1/hr) searched by the numerical solver.
+        tol : float
+            Absolute tolerance on the growth rate.
+        maxiter : int
+            Maximum number of solver iterations.
+
+        Returns
+        -------
+        growth_rate : float or array of floats
+            Growth rate in hr^-1. NaN where no solution exists, e.g. for
+            values outside of `lambda_bounds` or within the jump of the
+            protein mass at the RNA/protein breakpoint.
+        outside : bool or array of bools
+            True where the growth rate is NaN or lies outside of `fit_range`.
+        """
+        y = _as_array(y)
+        if key in ('size', 'width'):
+            a, c = self.size_params['volume' if key == 'size' else key]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                growth_rate = -np.log(y / a) / c
+        else:
+            growth_rate = _solve_bracketed(getattr(self, key), y, lambda_bounds,
+                                           tol, maxiter)
+        lo, hi = self.fit_range
+        outside = ~((growth_rate >= lo) & (growth_rate <= hi))
+        return growth_rate[()], outside[()]
+
+    def bands(self, key, x, q=(2.5, 50, 97.5)):
+        """
+        Evaluates the growth law `key` and returns percentiles over the draws
+        of an ensemble (see `sample`).
+
+        Parameters
+        ----------
+        key : str
+            Name of the growth law, e.g. 'P', 'size', or 'SV'.
+        x : float or array of floats
+            growth rate (1/hr)
+        q : list of floats
+            Percentiles to compute.
+
+        Returns
+        -------
+        bands : array of floats
+            Array of shape (len(q), n_lambda). Draws giving a non-finite
+            value at any growth rate (e.g. a cell narrower than a third of its
+            length, for which the rod geometry is undefined) are discarded
+            with a warning reporting their number.
+        """
+        values = np.atleast_2d(getattr(self, key)(x))
+        finite = np.isfinite(values).all(axis=1)
+        if not finite.all():
+            warnings.warn(f'{(~finite).sum()} of {len(finite)} draws give a non-finite '
+                          f'{key} within the growth rate range and were discarded; '
+                          'the bands are conditioned on the remaining draws.')
+        values = values[finite]
+        if len(values) == 0:
+            return np.full((len(q), values.shape[1]), np.nan)
+        # Percentiles are taken along contiguous rows, which is much faster.
+        return np.percentile(values.T.copy(), q, axis=1)
+
+    def width(self, x):
+        """Cell width in \mu m as a function of growth rate (1/hr)."""
+        return func2(_as_array(x), *self.size_params['width'])[()]
+
+    def length(self, x):
+        """Cell length in \mu m as a function of growth rate (1/hr)."""
+        return func(_as_array(x), *self.size_params['length'])[()]
+
+    def size(self, x):
+        """Cell volume in \mu m**3 as a function of growth rate (1/hr)."""
+        return func2(_as_array(x), *self.size_params['volume'])[()]
+
+    def SA(self, x):
+        """Rod surface area in \mu m**2 as a function of growth rate (1/hr)."""
+        return rod_SA(self.length(x), self.width(x), self.size(x))
+
+    def SV(self, x):
+        """Surface area to volume ratio in \mu m**-1."""
+        V = self.size(x)
+        return rod_SA(self.length(x), self.width(x), V) / V
+
+    def RP_ratio(self, x):
+        """Piecewise linear RNA/protein ratio as a function of growth rate."""
+        x = _as_array(x)
+        (m_A, b_A), (m_B, b_B) = self.params['RP_A'], self.params['RP_B']
+        low = x <= self.breakpoint
+        return np.where(low, m_A * x + b_A, m_B * x + b_B)[()]
+
+    def DNA_mass(self, x):
+        """Total DNA mass per cell in fg as a function of growth rate."""
+        return func(_as_array(x), *self.params['DNA'])[()]
+
+    def P(self, x):
+        """
+        Total protein mass per cell in fg as a function of growth rate. See
+        `lambda2P` for the underlying assumptions.
+        """
+        x = _as_array(x)
+
+        # predict total dry mass in fg (1.1 g/ml mass density; 30% dry mass)
+        pred_drymass = ((1.1 * 0.3)*(self.size(x)*1E-12)*1E15)
+
+        # calculate RNA + protein mass (90% dry mass - DNA mass)
+        pred_RNA_protein_mass = pred_drymass * 0.90 - self.DNA_mass(x)
+
+        # calculate total protein mass
+        return (pred_RNA_protein_mass / (1 + self.RP_ratio(x)))[()]
+
+
+class GrowthLawTable(object):
+    """
+    Dense lookup table of the growth laws of a `GrowthLaw` model, evaluated
+    with linear interpolation. Growth rates outside of the tabulated range
+    fall back to the exact model.
+
+    Parameters
+    ----------
+    model : GrowthLaw or None
+        Model to tabulate. If None, the default `growth_law` is used.
+    lambda_bounds : list
+        Lower and upper bound of the tabulated growth rates in hr^-1.
+    n_points : int
+        Number of grid points.
+
+    Attributes
+    ----------
+    max_error, max_rel_error : dict
+        Maximum absolute and relative interpolation error of each growth law,
+        evaluated at the midpoints of the grid intervals.
+    """
+    keys = ('width', 'length', 'size', 'SA', 'SV', 'P')
+
+    def __init__(self, model=None, lambda_bounds=(0, 2), n_points=2001):
+        if model is None:
+            model = growth_law
+        self.model = model
+        self.grid = np.linspace(lambda_bounds[0], lambda_bounds[1], n_points)
+        self._x0 = self.grid[0]
+        self._inv_h = (n_points - 1) / (self.grid[-1] - self.grid[0])
+        self.values = {k: getattr(model, k)(self.grid) for k in self.keys}
+        self._slopes = {k: np.diff(v) for k, v in self.values.items()}
+
+        # The protein mass jumps at the RNA/protein breakpoint; growth rates
+        # in the grid intervals next to it are evaluated exactly.
+        self._bp = None
+        if self.grid[0] < model.breakpoint < self.grid[-1]:
+            self._bp = np.searchsorted(self.grid, model.breakpoint) - 1
+
+        mid = 0.5 * (self.grid[1:] + self.grid[:-1])
+        self.max_error, self.max_rel_error = {}, {}
+        for k in self.keys:
+            exact = getattr(model, k)(mid)
+            err = np.abs(self(k, mid) - exact)
+            self.max_error[k] = err.max()
+            self.max_rel_error[k] = (err / np.abs(exact)).max()
+
+    def __call__(self, key, x):
+        """
+        Evaluates the tabulated growth law `key` at growth rates `x`.
+        """
+        x = _as_array(x)
+        shape = x.shape
+        x = x.ravel()
+
+        # The grid is uniform, so the interval index is computed directly
+        # rather than by a binary search.
+        u = (x - self._x0) * self._inv_h
+        i = u.astype(np.intp)
+        np.clip(i, 0, len(self.grid) - 2, out=i)
+        out = self.values[key][i] + (u - i) * self._slopes[key][i]
+
+        exact = (x < self.grid[0]) | (x > self.grid[-1])
+        if key == 'P' and self._bp is not None:
+            exact |= (i == self._bp) | (i == self._bp + 1)
+        if exact.any():
+            out[exact] = getattr(self.model, key)(x[exact])
+        return out.reshape(shape)[()]
+
+
+def _as_array(x):
+    return np.asarray(x, dtype=float)
+
+def _solve_bracketed(f, y, lambda_bounds, tol=1E-10, maxiter=50, h=1E-7):
+    """
+    Solves the monotonic function f(x) = y for every entry of y at once using
+    Newton steps with a finite-difference derivative, starting from a coarse
+    interpolation of f. Steps that leave the
+    current bracket are replaced by bisection; converged entries are dropped
+    from the active set.
+    """
+    shape = y.shape
+    y = y.ravel()
+    x = np.full(len(y), np.nan)
+    lo = np.full(len(y), float(lambda_bounds[0]))
+    hi = np.full(len(y), float(lambda_bounds[1]))
+    f_lo = f(lo) - y
+    f_hi = f(hi) - y
+
+    # Only targets bracketed by the search range have a solution.
+    idx = np.flatnonzero(f_lo * f_hi <= 0)
+    lo, hi, f_lo, _y = lo[idx], hi[idx], f_lo[idx], y[idx]
+
+    # Start from a linear interpolation of a coarse grid of the function.
+    grid = np.linspace(lambda_bounds[0], lambda_bounds[1], 257)
+    f_grid = f(grid)
+    if f_grid[-1] < f_grid[0]:
+        grid, f_grid = grid[::-1], f_grid[::-1]
+    xa = np.interp(_y, f_grid, grid)
+    for _ in range(maxiter):
+        fx = f(xa) - _y
+        left = np.sign(fx) == np.sign(f_lo)
+        lo = np.where(left, xa, lo)
+        f_lo = np.where(left, fx, f_lo)
+        hi = np.where(left, hi, xa)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xn = xa - fx * h / (f(xa + h) - _y - fx)
+        bisect = ~((xn >= lo) & (xn <= hi))
+        xn[bisect] = 0.5 * (lo + hi)[bisect]
+        xn[fx == 0] = xa[fx == 0]
+
+        done = (np.abs(xn - xa) < tol) | (fx == 0) | (hi - lo < tol)
+        x[idx[done]] = xn[done]
+        keep = ~done
+        idx, lo, hi, f_lo, _y, xa = (idx[keep], lo[keep], hi[keep],
+                                     f_lo[keep], _y[keep], xn[keep])
+        if len(idx) == 0:
+            break
+    x[idx] = xa
+
+    # Targets within a jump of a piecewise function converge onto the
+    # discontinuity without solving the equation.
+    solved = np.abs(f(x) - y) <= 1E-6 * np.abs(y)
+    x[~solved] = np.nan
+    return x.reshape(shape)
+
+# Default model shared by the module-level functions below. The MG1655 size
+# coefficients are loaded from the coefficient table on first use.
+growth_law = GrowthLaw()
+
+def ensemble(n_draws=1000, seed=None):
+    """
+    Draws an ensemble of the default growth laws from the fit covariances.
+
+    Parameters
+    ----------
+    n_draws : int
+        Number of parameter sets to draw.
+    seed : int or None
+        Seed of the random number generator.
+
+    Returns
+    -------
+    ensemble : GrowthLaw
+        Model evaluating all draws at once, see `GrowthLaw.sample`.
+
+    Example
+    -------
+    >>> ens = prot.size.ensemble(n_draws=10000)
+    >>> low, median, high = ens.bands('P', growth_rates)
+    """
+    return growth_law.sample(n_draws, seed)
+
+# Table used by the module-level functions when tabulation is switched on
+# through the `tabulated` context manager.
+_active_table = None
+
+@lru_cache(maxsize=8)
+def _cached_table(lambda_bounds, n_points):
+    return GrowthLawTable(growth_law, lambda_bounds, n_points)
+
+def get_table(lambda_bounds=(0, 2), n_points=2001):
+    """
+    Returns the (cached) lookup table of the default growth laws.
+
+    Parameters
+    ----------
+    lambda_bounds : list
+        Lower and upper bound of the tabulated growth rates in hr^-1.
+    n_points : int
+        Number of grid points.
+
+    Returns
+    -------
+    table : GrowthLawTable
+        Tabulated growth laws. The interpolation error is reported in
+        `table.max_error` and `table.max_rel_error`.
+    """
+    return _cached_table(tuple(lambda_bounds), n_points)
+
+@contextmanager
+def tabulated(lambda_bounds=(0, 2), n_points=2001, table=None):
+    """
+    Context manager under which the module-level growth-law functions are
+    evaluated from a lookup table rather than the exact model.
+
+    Parameters
+    ----------
+    lambda_bounds : list
+        Lower and upper bound of the tabulated growth rates in hr^-1.
+    n_points : int
+        Number of grid points.
+    table : GrowthLawTable or None
+        Table to use. If None, the cached table for the given bounds and
+        number of points is used.
+
+    Example
+    -------
+    >>> with prot.size.tabulated(lambda_bounds=[0, 2.5]) as table:
+    ...     V = prot.size.lambda2size(growth_rates)
+    """
+    global _active_table
+    previous = _active_table
+    _active_table = table if table is not None else get_table(lambda_bounds, n_points)
+    try:
+        yield _active_table
+    finally:
+        _active_table = previous
+
+def _evaluate(key, x, tabulated):
+    if tabulated is None:
+        table = _active_table
+    elif isinstance(tabulated, GrowthLawTable):
+        table = tabulated
+    elif tabulated:
+        table = _active_table if _active_table is not None else get_table()
+    else:
+        table = None
+    if table is None:
+        return getattr(growth_law, key)(x)
+    return table(key, x)
+
 # The functions below are used to estimate cell size, surface area, and
 # total protein abundance per cell as a function of growth rate. The functions
 # for calculate cell length, width, size, and surface area are empirical fits
 # based on the measurements of cell length and width for cell strain MG1655
-# in Si et al. 2017, 2019.
+# in Si et al. 2017, 2019. Each function can optionally be evaluated from a
+# precomputed lookup table (see `tabulated` and `GrowthLawTable`). All of them
+# return an array of the shape of the growth rates, and a scalar for a scalar
+# growth rate.
 
-def lambda2width(x):
+def lambda2width(x, tabulated=None):
     """
     Esimates the cell width based on the growth rate.
 
     Parameters
     ----------
-    x : float
+    x : float or array of floats
         growth rate (1/hr)
 
+    tabulated : bool, GrowthLawTable, or None
+        If True, evaluate from a lookup table. If None, a table is only used
+        within the `tabulated` context manager.
+
     Returns
     -------
-     a*np.exp(-c*x)+d : float
+     a*np.exp(-c*x)+d : float or array of floats
         Cell width \mu m
     """
-    a, c = 0.63830175, -0.24341639
-    return a*np.exp(-c*x)
+    return _evaluate('width', x, tabulated)
 
-def lambda2length(x):
+def lambda2length(x, tabulated=None):
     """
     Esimates the cell length based on the growth rate.
 
     Parameters
     ----------
-    x : float
+    x : float or array of floats
         growth rate (1/hr)
 
+    tabulated : bool, GrowthLawTable, or None
+        If True, evaluate from a lookup table. If None, a table is only used
+        within the `tabulated` context manager.
+
     Returns
     -------
-     a*np.exp(-c*x)+d : float
+     a*np.exp(-c*x)+d : float or array of floats
         Cell length \mu m
     """
-    a, c, d = 0.49656209, -1.09303027,  1.75967254
-    return a*np.exp(-c*x)+d
+    return _evaluate('length', x, tabulated)
 
-def lambda2size(x):
+def lambda2size(x, tabulated=None):
     """
     Esimates the cell volume based on the growth rate.
 
     Parameters
     ----------
-    x : float
+    x : float or array of floats
         growth rate (1/hr)
 
+    tabulated : bool, GrowthLawTable, or None
+        If True, evaluate from a lookup table. If None, a table is only used
+        within the `tabulated` context manager.
+
     Returns
     -------
-    a*np.exp(-c*x) : float
+    a*np.exp(-c*x) : float or array of floats
         Cell volume ratio in \mu m**3
     """
-    a, c = 0.53319063, -1.0372483
-    return a*np.exp(-c*x)
+    return _evaluate('size', x, tabulated)
 
-def lambda2SV(x):
+def lambda2SV(x, tabulated=None):
     """
     Esimates the surface area to volume ratio based on the growth rate.
 
     Parameters
     ----------
-    x : float
+    x : float or array of floats
         growth rate (1/hr)
 
+    tabulated : bool, GrowthLawTable, or None
+        If True, evaluate from a lookup table. If None, a table is only used
+        within the `tabulated` context manager.
+
     Returns
     -------
-    SA_data / V_data : float
+    SA_data / V_data : float or array of floats
         surface area to volume ratio in \mu m**-1
     """
-    V_data = lambda2size(x)
-    l = lambda2length(x)
-    w = lambda2width(x)
-    SA_data = rod_SA(l, w, V_data)
-
-    return SA_data / V_data
+    return _evaluate('SV', x, tabulated)
 
 def rod_SA(l, w, V):
     """
@@ -106,7 +1070,7 @@ def rod_SA(l, w, V):
     gamma = asp_ratio * np.pi * (asp_ratio * np.pi /4 - np.pi/12)**(-2/3)
     return gamma * V**(2/3)
 
-def lambda2SA(x):
+def lambda2SA(x, tabulated=None):
     """
     Computes the cellular surface area as a function of the growth rate. It is
     assumed that the cell is cylinder capped with hemispherical ends.
@@ -116,115 +1080,242 @@ def lambda2SA(x):
     x : int, float, or list/array of ints and floats
         The growth rate in units of hr^-1
 
+    tabulated : bool, GrowthLawTable, or None
+        If True, evaluate from a lookup table. If None, a table is only used
+        within the `tabulated` context manager.
+
     Returns
     -------
-    SA: int, float, or list/array of ints and floats
+    SA: float or array of floats
         The computed surface area in units of square microns for the provided
         growth rates
     """
+    return _evaluate('SA', x, tabulated)
+
+
+def size2lambda(V):
+    """
+    Estimates the growth rate from the cell volume by inverting `lambda2size`
+    in closed form.
+
+    Parameters
+    ----------
+    V : float or array of floats
+        Cell volume in \mu m**3
+
+    Returns
+    -------
+    growth_rate : float or array of floats
+        growth rate (1/hr)
+    outside : bool or array of bools
+        True where the growth rate lies outside of the range of the
+        calibration data.
+    """
+    return growth_law.inverse('size', V)
+
+def SV2lambda(SV, lambda_bounds=(0, 3)):
+    """
+    Estimates the growth rate from the surface area to volume ratio by
+    numerically inverting `lambda2SV`.
+
+    Parameters
+    ----------
+    SV : float or array of floats
+        surface area to volume ratio in \mu m**-1
+    lambda_bounds : list
+        Range of growth rates (1/hr) searched for a solution.
+
+    Returns
+    -------
+    growth_rate : float or array of floats
+        growth rate (1/hr). NaN where no solution lies within `lambda_bounds`.
+    outside : bool or array of bools
+        True where the growth rate is NaN or lies outside of the range of the
+        calibration data.
+    """
+    return growth_law.inverse('SV', SV, lambda_bounds)
 
-    # Compute the length, width, and volume as a function of growth rate
-    length = lambda2length(x)
-    width = lambda2width(x)
-    vol = lambda2size(x)
+def P2lambda(P, lambda_bounds=(0, 3)):
+    """
+    Estimates the growth rate from the total protein mass per cell by
+    numerically inverting the piecewise `lambda2P`.
 
-    # Compute the rod surface area
-    SA = rod_SA(length, width, vol)
-    return SA
+    Parameters
+    ----------
+    P : float or array of floats
+        total protein mass per cell in fg
+    lambda_bounds : list
+        Range of growth rates (1/hr) searched for a solution.
 
+    Returns
+    -------
+    growth_rate : float or array of floats
+        growth rate (1/hr). NaN where no solution lies within `lambda_bounds`
+        or where P falls within the jump of `lambda2P` at the RNA/protein
+        breakpoint.
+    outside : bool or array of bools
+        True where the growth rate is NaN or lies outside of the range of the
+        calibration data.
+    """
+    return growth_law.inverse('P', P, lambda_bounds)
 
-def lambda2P(x):
+def lambda2P(x, tabulated=None):
     """
     Computes the total protein mass per cell in fg. This is based
     on an assumption that the mass density is relatively constant w.r.t. growth
     rate, and also assumes that the total protein + DNA + RNA account for roughly
     90 percent of the total cell mass (Basan et al. 2015).
 
+    The RNA/protein ratio follows two linear regimes (Dai et al. 2016) split
+    at 0.69 hr^-1 and the DNA mass per cell an exponential (Basan et al. 2015).
+    Both fits are computed once by `growth_law` and reused on later calls.
+
     Parameters
     ----------
-    x : float
+    x : float or array of floats
         growth rate (1/hr)
 
+    tabulated : bool, GrowthLawTable, or None
+        If True, evaluate from a lookup table. If None, a table is only used
+        within the `tabulated` context manager.
+
     Returns
     -------
-    pred_proteinmass : float
-        estimate of total protein mass in fg
-    """
-
-    # Data from Hwa lab (Dai et al. 2016, Basan et al. 2015) for RNA/Protein
-    # ratios and total DNA content per cell. Note that the protein measurements
-    # still have caveat that it is based on a bulk colorimetric assay, but I think
-    # this is the best that we can do; I believe the ratio is a pretty reliable
-    # result. The data was extracted from these papers:
-    [lambda_dai, R_P_dai] = np.array(\
-            [[0.0, 0.08853279947047754],
-            [0.03324706890845652, 0.09742834356027935],
-            [0.12844176066233703, 0.12157153165470358],
-            [0.19652012565308674, 0.12917148174069676],
-            [0.23055930814846148, 0.13297145678369332],
-            [0.2849547247405284, 0.14694954887503597],
-            [0.33601892391911736, 0.15201256530868013],
-            [0.4074068045812377, 0.17107537557577435],
-            [0.417639175984852, 0.16979497279144085],
-            [0.4517000602223341, 0.17104716331103476],
-            [0.485674137491387, 0.18249049192423916],
-            [0.5503561798423366, 0.1888187199227418],
-            [0.6727865579409387, 0.21549233114688282],
-            [0.6864152519843529, 0.21548365045003987],
-            [0.7000547968988209, 0.21420107749149564],
-            [0.7170798135820351, 0.21546411888214323],
-            [0.744196140345166, 0.2320073568905744],
-            [0.9177883754618401, 0.25227895419304786],
-            [0.9448830004828637, 0.27136997672488156],
-            [0.9926268331190284, 0.2662440252391261],
-            [0.9753630972726335, 0.29300661360590724],
-            [1.0979236858238794, 0.3043935176896325],
-            [1.1624538159800777, 0.32855623735195344],
-            [1.2677832212980895, 0.36288405301735593],
-            [1.566952587118931, 0.4404005056505911],
-            [1.7949076862145108, 0.4784718718295111]]).T
-
-    # DNA measurements from Basan et al. 2015, growth rate (hr-1), dna
-    # (femtogram per cell)
-    lambda_basan_dna = [0.42, 0.45, 0.7, 0.98, 1.27, 1.84]
-    dna_basan = 1E15*np.divide(1E-6*np.array([16.5, 14.2, 14.1, 11.9, 11.3, 11.1]),
-                          1E8*np.array([19.4, 17.1, 16.0, 10.7, 7.93, 3.43]))
-
-    # The RNA/Protein ratios exhibit two linear regimes; fit each to a line.
-    slope_dia_RP_A, intercept_dia_RP_A, r_value, p_value, std_err = stats.linregress(lambda_dai[:14],
-                                                R_P_dai[:14])
-    slope_dia_RP_B, intercept_dia_RP_B, r_value, p_value, std_err = stats.linregress(lambda_dai[14:],
-                                                R_P_dai[14:])
-
-    # The DNA shows an exponential scaling; use scipy curve fit function to
-    # fit the data to an exponential
-    popt_dna, pcov_dan = curve_fit(func, lambda_basan_dna, dna_basan, p0=(1, 1e-6, 1))
-
-    # predict cell size
-    V = lambda2size(x)
-
-    # predict total dry mass in fg (1.1 g/ml mass density; 30% dry mass)
-    pred_drymass = ((1.1 * 0.3)*(V*1E-12)*1E15)
-
-    # predict total DNA mass
-    pred_dnamass =  func(x, *popt_dna)
-
-    # calculate RNA + protein mass (90% dry mass - DNA mass)
-    pred_RNA_protein_mass = pred_drymass * 0.90 - pred_dnamass
-
-    #### predict RNA/Protein ratio:
-    pred_RNA_protein_ratio = []
-    if (isinstance(x, int)) | (isinstance(x, float)) :
-        x = [x]
-
-    for l in x:
-        if l <= 0.69:
-            pred_RNA_protein_ratio.append(slope_dia_RP_A * l + intercept_dia_RP_A)
-        else:
-            pred_RNA_protein_ratio.append(slope_dia_RP_B * l + intercept_dia_RP_B)
+    pred_proteinmass : float or array of floats
+        estimate of total protein mass in fg. A scalar growth rate gives a
+        scalar, like the other growth laws.
+    """
+    return _evaluate('P', x, tabulated)
+
+
+# The functions below compute the geometry of whole populations of cells from
+# single-cell measurements of length and width (e.g. Si et al. 2019,
+# Taheri-Araghi et al. 2015) rather than of the mean cell only.
+
+def cycle_averaged_length(l_birth, elongation_rate, generation_time):
+    """
+    Computes the length of each cell averaged over its cell cycle, assuming
+    exponential elongation.
+
+    Parameters
+    ----------
+    l_birth : array of floats
+        cell length at birth in \mu m
+    elongation_rate : array of floats
+        elongation rate in doublings per unit time
+    generation_time : array of floats
+        generation time in the same unit of time
 
-    # calculate total protein mass
-    pred_proteinmass =  (pred_RNA_protein_mass/ (1+ np.array(pred_RNA_protein_ratio)))
-    # pred_RNAmass = (pred_RNA_protein_ratio * pred_RNA_protein_mass) / (1+ pred_RNA_protein_ratio)
+    Returns
+    -------
+    length : array of floats
+        cycle-averaged cell length in \mu m
+    """
+    n_doublings = np.asarray(elongation_rate) * np.asarray(generation_time)
+    return l_birth * (2**n_doublings - 1) / (n_doublings * np.log(2))
 
-    return pred_proteinmass
+def rod_volume(l, w):
+    """
+    Computes the volume of a cylinder with two hemispherical ends. Together
+    with `rod_SA`, gives the surface area of the same rod.
+
+    Parameters
+    ----------
+    l : float or array of floats
+        cell length in \mu m
+    w : float or array of floats
+        cell width in \mu m
+
+    Returns
+    -------
+    V : float or array of floats
+        cell volume in \mu m**3
+    """
+    return np.pi * (w / 2)**2 * (l - w / 3)
+
+def population_geometry(l, w, groups=None, weights=None):
+    """
+    Computes the distribution-averaged geometry of populations of rod-shaped
+    cells from single-cell lengths and widths in a single pass.
+
+    Parameters
+    ----------
+    l, w : array of floats
+        Length and width of each cell in \mu m. Cells with a NaN entry are
+        ignored.
+    groups : array-like or None
+        Label (e.g. growth condition) of each cell. If None, all cells are
+        treated as a single population.
+    weights : array of floats or None
+        Weight of each cell, e.g. to correct for the age distribution.
+
+    Returns
+    -------
+    geometry : pandas DataFrame
+        One row per group with the number of cells, mean length and width,
+        mean volume and surface area, the ratio of total surface area to total
+        volume of the population (`SV_um`), and the mean of the single-cell
+        surface to volume ratios (`mean_SV_um`).
+    """
+    l = np.asarray(l, dtype=float)
+    w = np.asarray(w, dtype=float)
+    if groups is None:
+        groups = np.zeros(len(l), dtype=int)
+    if weights is None:
+        weights = np.ones(len(l))
+    keep = ~(np.isnan(l) | np.isnan(w))
+    codes, labels = pd.factorize(np.asarray(groups)[keep], sort=True)
+    l, w, weights = l[keep], w[keep], np.asarray(weights, dtype=float)[keep]
+
+    V = rod_volume(l, w)
+    SA = rod_SA(l, w, V)
+
+    def weighted_mean(v):
+        return np.bincount(codes, weights * v, minlength=len(labels)) / tot
+    tot = np.bincount(codes, weights, minlength=len(labels))
+    geometry = pd.DataFrame({'group': labels,
+                             'n_cells': np.bincount(codes, minlength=len(labels)),
+                             'length_um': weighted_mean(l),
+                             'width_um': weighted_mean(w),
+                             'volume_um3': weighted_mean(V),
+                             'surface_area_um2': weighted_mean(SA),
+                             'mean_SV_um': weighted_mean(SA / V)})
+    geometry['SV_um'] = geometry['surface_area_um2'] / geometry['volume_um3']
+    return geometry
+
+def interpolate_geometry(x, geometry, key='surface_area_um2',
+                         growth_rate='growth_rate_hr', extrapolate=False):
+    """
+    Interpolates a per-condition geometry table (see `population_geometry`)
+    onto new growth rates, linearly in the logarithm of the quantity.
+
+    Parameters
+    ----------
+    x : float or array of floats
+        growth rate (1/hr)
+    geometry : pandas DataFrame
+        Table with one row per growth condition.
+    key : str
+        Column of the quantity to interpolate.
+    growth_rate : str
+        Column with the growth rate of each condition in hr^-1.
+    extrapolate : bool
+        If True, growth rates outside of the range of the table take the
+        value of the nearest condition. Otherwise they are NaN, with a
+        warning.
+
+    Returns
+    -------
+    value : float or array of floats
+        Interpolated quantity.
+    """
+    geometry = geometry.sort_values(growth_rate)
+    rates = geometry[growth_rate].values
+    x = np.asarray(x, dtype=float)
+    value = np.exp(np.interp(x, rates, np.log(geometry[key].values)))
+    outside = (x < rates[0]) | (x > rates[-1])
+    if not extrapolate and np.any(outside):
+        warnings.warn(f'{np.sum(outside)} growth rate(s) outside of the range of the geometry '
+                      f'table ({rates[0]:.2f} - {rates[-1]:.2f} hr^-1) are set to NaN.')
+        value = np.where(outside, np.nan, value)
+    return value[()]
@@ -1,11 +1,16 @@
 import numpy as np
 import pandas as pd
+from functools import lru_cache
+from scipy import sparse
+from scipy.sparse.linalg import lsqr
+import scipy.stats
 
 
 
 
 # Compute the total fractional occupancy. 
-def compute_fraction(df, groupby, mass_key='fg_per_cell', count_key='tot_per_cell'):
+def compute_fraction(df, groupby, by=None, mass_key='fg_per_cell',
+                     count_key='tot_per_cell'):
     """
     Computes the fraction of the proteome occupied by each constitutent member
     both in terms of mass fraction and total copy number.
@@ -14,8 +19,12 @@ def compute_fraction(df, groupby, mass_key='fg_per_cell', count_key='tot_per_cel
     ----------
     df : pandas DataFrame
         Dataframe with proteomic information
-    groupby: str
-        Key by which to group the data to compute the fraction.
+    groupby: str or list of str
+        Key(s) by which to group the data to compute the fraction.
+    by : str, list of str, or None
+        Key(s) defining the outer groups (e.g. dataset and condition) within
+        which the fractions are computed. If None, the fractions are computed
+        relative to the whole dataframe.
     mass_key: str
         Key by which to compute the mass fraction.
     count_key: str
@@ -25,25 +34,1667 @@ def compute_fraction(df, groupby, mass_key='fg_per_cell', count_key='tot_per_cel
     -------
     frac_df: pandas DataFrame
         DataFrame with columns corresponding to the group, fraction of proteome 
-        by mass, and fraction of proteome by count. 
-    """
-    if type(groupby) != str:
-       raise TypeError(f'Groupkey must be a string. A {type(groupby)} was passed') 
-    if groupby.lower() not in df.keys():
-        raise ValueError(f'Group not found in dataframe keys')
-
-    # Compute the total mass
-    tot_mass = df[mass_key].sum()
-    tot_number = df[count_key].sum()
-
-    # Instantiate a storage list of dataframes
-    frac_df = pd.DataFrame([])
-    for g, d in df.groupby(groupby):
-        # Compute the fractional mass
-        frac_mass = d[mass_key].sum() / tot_mass
-        frac_count = d[count_key].sum() / tot_number
-        frac_df = frac_df.append({'frac_mass':frac_mass,
-                        'frac_count':frac_count,
-                        'group':g}, ignore_index=True)
+        by mass, and fraction of proteome by count. If `groupby` is a list,
+        `group` is a tuple and each key is also given as its own column. The
+        keys in `by` are given as columns.
+    """
+    if type(groupby) == str:
+        keys = [groupby]
+    elif isinstance(groupby, (list, tuple)):
+        keys = list(groupby)
+    else:
+       raise TypeError(f'Groupkey must be a string or a list of strings. A {type(groupby)} was passed') 
+    if by is None:
+        outer = []
+    elif type(by) == str:
+        outer = [by]
+    else:
+        outer = list(by)
+    for k in keys + outer:
+        if k not in df.keys():
+            raise ValueError(f'Group {k} not found in dataframe keys')
+
+    # Sum over each member and over each outer group. Totals include the
+    # entries which are not assigned to any member.
+    values = [mass_key, count_key]
+    frac_df = df.groupby(outer + keys)[values].sum().reset_index()
+    if len(outer) == 0:
+        totals = df[values].sum().values
+    else:
+        totals = df.groupby(outer)[values].sum().reset_index()
+        totals = frac_df[outer].merge(totals, on=outer, how='left')[values].values
+    frac_df['frac_mass'] = frac_df[mass_key].values / totals[..., 0]
+    frac_df['frac_count'] = frac_df[count_key].values / totals[..., 1]
+
+    if len(keys) == 1:
+        frac_df['group'] = frac_df[keys[0]]
+        cols = ['frac_mass', 'frac_count', 'group'] + outer
+    else:
+        frac_df['group'] = list(frac_df[keys].itertuples(index=False, name=None))
+        cols = ['frac_mass', 'frac_count', 'group'] + outer + keys
+    return frac_df[cols]
+
+def sector_hierarchy(df, levels, by=None, mass_key='fg_per_cell',
+                     count_key='tot_per_cell'):
+    """
+    Computes the fraction of the proteome occupied by each sector at every
+    level of a hierarchy (e.g. COG class -> COG category -> gene), both
+    relative to the parent sector and to the whole proteome.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    levels : list of str
+        Keys of the hierarchy levels, from the coarsest to the finest.
+    by : str, list of str, or None
+        Key(s) defining the outer groups (e.g. dataset and condition) within
+        which the fractions are computed. If None, the fractions are computed
+        relative to the whole dataframe.
+    mass_key: str
+        Key by which to compute the mass fraction.
+    count_key: str
+        Key by which to compute the count fraction.
+
+    Returns
+    -------
+    sectors : pandas DataFrame
+        Tidy DataFrame with one row per sector and outer group. `level` and
+        `depth` give the hierarchy level of the sector, `group` its name and
+        the level columns its parents (NaN for finer levels). `frac_mass`
+        and `frac_count` are relative to the parent sector, as given by
+        `compute_fraction`, and `frac_mass_total` and `frac_count_total` are
+        relative to the whole proteome of the outer group.
+    """
+    if type(levels) == str:
+        levels = [levels]
+    levels = list(levels)
+    if by is None:
+        outer = []
+    elif type(by) == str:
+        outer = [by]
+    else:
+        outer = list(by)
+    for k in levels + outer:
+        if k not in df.keys():
+            raise ValueError(f'Group {k} not found in dataframe keys')
+
+    # Sum over the finest sectors once. Entries without an assignment at some
+    # level are kept so that they count towards the totals of their parents,
+    # as in compute_fraction. Without outer groups, a single dummy group is
+    # used.
+    values = [mass_key, count_key]
+    if outer:
+        data = df[df[outer].notna().all(axis=1)]
+        keys = outer
+    else:
+        data = df.assign(_all=0)
+        keys = ['_all']
+    sums = data.groupby(keys + levels, dropna=False)[values].sum().reset_index()
+
+    # Roll the sums up the hierarchy, from the finest to the coarsest level.
+    rolled = [sums]
+    for i in range(len(levels) - 1, -1, -1):
+        rolled.append(rolled[-1].groupby(keys + levels[:i], dropna=False)[
+                                                  values].sum().reset_index())
+    rolled = rolled[::-1]
+
+    sectors = []
+    for i, level in enumerate(levels):
+        sector = rolled[i + 1]
+        sector = sector[sector[levels[:i + 1]].notna().all(axis=1)].copy()
+        parent = sector[keys + levels[:i]].merge(rolled[i], how='left',
+                                                 on=keys + levels[:i])
+        total = sector[keys].merge(rolled[0], how='left', on=keys)
+        sector['frac_mass'] = sector[mass_key].values / parent[mass_key].values
+        sector['frac_count'] = sector[count_key].values / parent[count_key].values
+        sector['frac_mass_total'] = sector[mass_key].values / total[mass_key].values
+        sector['frac_count_total'] = sector[count_key].values / total[count_key].values
+        sector['group'] = sector[level]
+        sector['level'] = level
+        sector['depth'] = i
+        sectors.append(sector)
+    sectors = pd.concat(sectors, ignore_index=True, sort=False)
+    return sectors[outer + ['level', 'depth', 'group'] + levels +
+                   ['frac_mass', 'frac_count', 'frac_mass_total', 'frac_count_total']]
+
+def bootstrap_fraction(df, groupby, by=None, n_boot=1000, percentiles=(2.5, 97.5),
+                       mass_key='fg_per_cell', count_key='tot_per_cell',
+                       seed=None):
+    """
+    Computes bootstrap percentile intervals of the fraction of the proteome
+    occupied by each constituent member, resampling the genes of each outer
+    group with replacement. The number of times each gene is drawn follows a
+    multinomial distribution, which is sampled for all outer groups at once.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information, one row per gene.
+    groupby: str or list of str
+        Key(s) by which to group the data to compute the fraction.
+    by : str, list of str, or None
+        Key(s) defining the outer groups (e.g. dataset and condition) within
+        which the genes are resampled and the fractions are computed. If None,
+        the whole dataframe is one group.
+    n_boot : int
+        Number of bootstrap resamples.
+    percentiles : tuple of floats
+        Lower and upper percentiles of the interval.
+    mass_key: str
+        Key by which to compute the mass fraction.
+    count_key: str
+        Key by which to compute the count fraction.
+    seed : int or None
+        Seed of the random number generator.
+
+    Returns
+    -------
+    frac_df: pandas DataFrame
+        DataFrame with the columns of `compute_fraction` and the lower and
+        upper bounds of the mass and count fractions (`frac_mass_lower`,
+        `frac_mass_upper`, `frac_count_lower`, `frac_count_upper`).
+    """
+    frac_df = compute_fraction(df, groupby, by=by, mass_key=mass_key,
+                               count_key=count_key)
+    if type(groupby) == str:
+        groupby = [groupby]
+    if by is None:
+        outer = []
+    elif type(by) == str:
+        outer = [by]
+    else:
+        outer = list(by)
+
+    # Outer group of each gene and its position within the group. The rows
+    # of frac_df are in the order of the groups of outer + groupby.
+    if len(outer) == 0:
+        group = np.zeros(len(df), dtype=int)
+    else:
+        group = df.groupby(outer, sort=True).ngroup().values
+    df = df[group >= 0]
+    group = group[group >= 0]
+    member = df.groupby(outer + list(groupby), sort=True).ngroup().values
+    position = pd.Series(group).groupby(group).cumcount().values
+    n_genes = np.bincount(group)
+    n_groups, n_members = len(n_genes), len(frac_df)
+
+    # Sparse matrices summing the mass and count of the genes of each member
+    # and of each outer group. The genes are indexed by their outer group and
+    # position, with every group padded to the size of the largest one.
+    n_max = n_genes.max()
+    genes = group * n_max + position
+    assigned = member >= 0
+    values = np.nan_to_num(df[[mass_key, count_key]].values.astype(float))
+    totals = [sparse.csr_matrix((values[:, j], (group, genes)),
+                                shape=(n_groups, n_groups * n_max)) for j in range(2)]
+    members = [sparse.csr_matrix((values[assigned, j], (member[assigned], genes[assigned])),
+                                 shape=(n_members, n_groups * n_max)) for j in range(2)]
+    member_group = np.zeros(n_members, dtype=int)
+    member_group[member[assigned]] = group[assigned]
+
+    # Every resample draws n_genes genes uniformly within each outer group.
+    pvals = np.where(np.arange(n_max) < n_genes[:, None],
+                     1 / n_genes[:, None], 0)
+    rng = np.random.default_rng(seed)
+    frac = np.empty((2, n_members, n_boot))
+    # Resamples are drawn in blocks to bound the memory of the counts.
+    block = max(1, int(1E7 // pvals.size))
+    for start in range(0, n_boot, block):
+        size = min(block, n_boot - start)
+        counts = rng.multinomial(n_genes, pvals, size=(size, n_groups))
+        weights = counts.reshape(size, -1).T.astype(float)
+        for j in range(2):
+            sums = members[j] @ weights
+            frac[j, :, start:start + size] = sums / (totals[j] @ weights)[member_group]
+    lower, upper = np.percentile(frac, percentiles, axis=-1)
+
+    for key, bound in zip(['frac_mass_lower', 'frac_mass_upper',
+                           'frac_count_lower', 'frac_count_upper'],
+                          [lower[0], upper[0], lower[1], upper[1]]):
+        frac_df[key] = bound
     return frac_df
-                    
\ No newline at end of file
+
+# Annotation values which do not assign a gene to any term.
+MISSING_ANNOTATIONS = ('Not Assigned', 'not assigned', 'nan', '')
+
+@lru_cache(maxsize=32)
+def _parse_annotations(annotations, sep):
+    """
+    Splits each distinct annotation string into its terms. Returns the
+    annotation x term incidence matrix and the terms.
+    """
+    rows, terms = [], []
+    for i, a in enumerate(annotations):
+        if a.strip() in MISSING_ANNOTATIONS:
+            continue
+        if sep is None:
+            parts = [a]
+        elif sep == '':
+            parts = list(a)
+        else:
+            parts = a.split(sep)
+        for t in parts:
+            t = t.strip()
+            if t not in MISSING_ANNOTATIONS:
+                rows.append(i)
+                terms.append(t)
+    codes, terms = pd.factorize(np.array(terms, dtype=object), sort=True)
+    incidence = sparse.csr_matrix((np.ones(len(rows)), (rows, codes)),
+                                  shape=(len(annotations), len(terms)))
+    incidence.data[:] = 1
+    return incidence, pd.Index(terms)
+
+def incidence_matrix(df, key='go_terms', gene_key='gene_name', sep=';'):
+    """
+    Builds the sparse gene x term incidence matrix of a multi-valued
+    annotation, such as the semicolon-joined GO terms or the COG letters. A
+    gene with different annotation strings in different rows is assigned the
+    union of their terms. The parsing of the annotation strings is cached.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    key : str
+        Column with the annotation strings.
+    gene_key : str
+        Column identifying the genes.
+    sep : str or None
+        Separator between the terms of an annotation string. An empty string
+        makes every character a term (e.g. for COG letters), and None takes
+        every string as a single term (e.g. for a long-form table of gene and
+        GO term pairs).
+
+    Returns
+    -------
+    incidence : scipy.sparse.csr_matrix
+        Matrix with a one for every gene (row) annotated with a term (column).
+    genes, terms : pandas Index
+        Labels of the rows and columns.
+    """
+    for k in [key, gene_key]:
+        if k not in df.keys():
+            raise ValueError(f'Group {k} not found in dataframe keys')
+    pairs = df[[gene_key, key]].dropna().drop_duplicates()
+    gene_codes, genes = pd.factorize(pairs[gene_key], sort=True)
+    ann_codes, annotations = pd.factorize(pairs[key].astype(str))
+    parsed, terms = _parse_annotations(tuple(annotations), sep)
+    genes_to_ann = sparse.csr_matrix((np.ones(len(pairs)), (gene_codes, ann_codes)),
+                                     shape=(len(genes), len(annotations)))
+    incidence = (genes_to_ann @ parsed).tocsr()
+    incidence.data[:] = 1
+    return incidence, pd.Index(genes), terms
+
+def has_annotation(df, terms, key='go_terms', sep=';'):
+    """
+    Finds the rows annotated with any of the given terms. Unlike
+    `str.contains`, only whole terms are matched.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    terms : str or list of str
+        Term(s) to look for.
+    key : str
+        Column with the annotation strings.
+    sep : str
+        Separator between the terms of an annotation string.
+
+    Returns
+    -------
+    mask : numpy array of bools
+        True for the rows annotated with at least one of the terms.
+    """
+    if type(terms) == str:
+        terms = [terms]
+    codes, annotations = pd.factorize(df[key].astype(str))
+    parsed, all_terms = _parse_annotations(tuple(annotations), sep)
+    cols = all_terms.get_indexer(terms)
+    found = np.asarray(parsed[:, cols[cols >= 0]].sum(axis=1)).ravel() > 0
+    return np.where(codes >= 0, found[codes], False) & df[key].notna().values
+
+def annotation_fraction(df, key='go_terms', by=None, gene_key='gene_name',
+                        mass_key='fg_per_cell', count_key='tot_per_cell',
+                        sep=';', split=False):
+    """
+    Computes the fraction of the proteome annotated with each term of a
+    multi-valued annotation, for every outer group, with a single sparse
+    term x gene by gene x group product.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    key : str
+        Column with the annotation strings.
+    by : str, list of str, or None
+        Key(s) defining the outer groups (e.g. dataset and condition) within
+        which the fractions are computed. If None, the fractions are computed
+        relative to the whole dataframe.
+    gene_key : str
+        Column identifying the genes.
+    mass_key: str
+        Key by which to compute the mass fraction.
+    count_key: str
+        Key by which to compute the count fraction.
+    sep : str
+        Separator between the terms of an annotation string. An empty string
+        makes every character a term (e.g. for COG letters).
+    split : bool
+        If True, the mass and count of a gene are split evenly across its
+        terms, so the fractions of all terms add up to the annotated fraction
+        of the proteome. If False, a gene counts fully towards each of its
+        terms.
+
+    Returns
+    -------
+    frac_df: pandas DataFrame
+        DataFrame with the columns of `compute_fraction`, with the terms as
+        groups. Only terms with at least one gene in the outer group are
+        listed.
+    """
+    if by is None:
+        outer = []
+    elif type(by) == str:
+        outer = [by]
+    else:
+        outer = list(by)
+    incidence, genes, terms = incidence_matrix(df, key, gene_key, sep)
+    if split:
+        n_terms = np.asarray(incidence.sum(axis=1)).ravel()
+        incidence = sparse.diags(1 / np.maximum(n_terms, 1)) @ incidence
+
+    # Gene x group matrices of mass, count, and presence.
+    if outer:
+        data = df[df[outer].notna().all(axis=1)]
+        group_codes = data.groupby(outer, sort=True).ngroup().values
+        labels = data[outer].drop_duplicates().sort_values(outer)
+    else:
+        data = df
+        group_codes = np.zeros(len(df), dtype=int)
+        labels = pd.DataFrame(index=[0])
+    n_groups = len(labels)
+    gene_codes = genes.get_indexer(data[gene_key])
+    values = np.nan_to_num(data[[mass_key, count_key]].values.astype(float))
+    totals = np.array([np.bincount(group_codes, weights=values[:, j],
+                                   minlength=n_groups) for j in range(2)])
+    keep = gene_codes >= 0
+    flat = gene_codes[keep] * n_groups + group_codes[keep]
+    size = len(genes) * n_groups
+    mass = np.bincount(flat, weights=values[keep, 0], minlength=size)
+    count = np.bincount(flat, weights=values[keep, 1], minlength=size)
+    present = np.bincount(flat, minlength=size) > 0
+    X = np.stack([mass, count, present], axis=1).reshape(len(genes), 3 * n_groups)
+
+    sums = (incidence.T @ X).reshape(len(terms), n_groups, 3)
+    term_idx, group_idx = np.nonzero(sums[..., 2] > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac_mass = sums[term_idx, group_idx, 0] / totals[0, group_idx]
+        frac_count = sums[term_idx, group_idx, 1] / totals[1, group_idx]
+    frac_df = pd.DataFrame({'frac_mass': frac_mass, 'frac_count': frac_count,
+                            'group': terms.values[term_idx]})
+    for k in outer:
+        frac_df[k] = labels[k].values[group_idx]
+    return frac_df.sort_values(outer + ['group']).reset_index(drop=True)
+
+def consensus_abundance(df, by='condition', value_key='tot_per_cell',
+                        gene_key='gene_name', dataset_key='dataset',
+                        growth_rate_key='growth_rate_hr', k=1.345,
+                        maxiter=50, tol=1E-8):
+    """
+    Merges the measurements of several datasets into one consensus
+    abundance per gene and condition. The measurements are arranged as a
+    gene x condition x dataset array of log10 abundances, from which the
+    median and a Huber M-estimate across datasets are computed for all genes
+    at once.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    by : str or list of str
+        Key(s) identifying the conditions which are matched across datasets
+        (e.g. a binned growth rate).
+    value_key : str
+        Key of the abundance. Only positive values are used.
+    gene_key : str
+        Key identifying the genes.
+    dataset_key : str
+        Key identifying the datasets. Several measurements of a gene in one
+        dataset and condition are first averaged (in log space).
+    growth_rate_key : str or None
+        If given, the mean growth rate of each condition is reported.
+    k : float
+        Tuning constant of the Huber weights, in units of the robust scale.
+    maxiter : int
+        Maximum number of reweighting iterations.
+    tol : float
+        Convergence tolerance on the Huber estimate (log10 units).
+
+    Returns
+    -------
+    consensus : pandas DataFrame
+        One row per gene and condition with the number of datasets, the
+        median and Huber estimates of the abundance, and the dispersion
+        across datasets as the scaled median absolute deviation
+        (`log10_mad`) and the standard deviation (`log10_std`) of the log10
+        abundances.
+    """
+    if type(by) == str:
+        by = [by]
+    by = list(by)
+    for key in by + [value_key, gene_key, dataset_key]:
+        if key not in df.keys():
+            raise ValueError(f'Group {key} not found in dataframe keys')
+    data = df[(df[value_key] > 0) & df[by + [gene_key, dataset_key]].notna().all(axis=1)]
+
+    gene_codes, genes = pd.factorize(data[gene_key], sort=True)
+    cond_codes = data.groupby(by, sort=True).ngroup().values
+    conditions = data[by].drop_duplicates().sort_values(by)
+    dset_codes, datasets = pd.factorize(data[dataset_key], sort=True)
+    n_genes, n_cond, n_dset = len(genes), len(conditions), len(datasets)
+
+    # Gene x condition x dataset array of mean log10 abundances.
+    flat = (gene_codes * n_cond + cond_codes) * n_dset + dset_codes
+    size = n_genes * n_cond * n_dset
+    n = np.bincount(flat, minlength=size)
+    sums = np.bincount(flat, weights=np.log10(data[value_key].values), minlength=size)
+    with np.errstate(invalid='ignore'):
+        values = (sums / n).reshape(n_genes * n_cond, n_dset)
+
+    # Keep the gene/condition pairs measured in at least one dataset.
+    n_datasets = (n.reshape(n_genes * n_cond, n_dset) > 0).sum(axis=1)
+    pairs = np.flatnonzero(n_datasets > 0)
+    values, n_datasets = values[pairs], n_datasets[pairs]
+    median = np.nanmedian(values, axis=1)
+    mad = 1.4826 * np.nanmedian(np.abs(values - median[:, None]), axis=1)
+    std = np.full(len(pairs), np.nan)
+    multi = n_datasets > 1
+    std[multi] = np.nanstd(values[multi], axis=1, ddof=1)
+
+    # Huber M-estimate by iteratively reweighted averaging. The scale of
+    # each gene is its MAD, floored at the typical MAD of genes measured in
+    # at least three datasets (or, failing that, of any gene) so that pairs
+    # of measurements are not scaled by a spurious zero.
+    positive = mad > 0
+    well_measured = (n_datasets >= 3) & positive
+    if well_measured.any():
+        floor = np.median(mad[well_measured])
+    elif positive.any():
+        floor = np.median(mad[positive])
+    else:
+        floor = 1.0
+    scale = np.fmax(mad, floor)[:, None]
+    measured = ~np.isnan(values)
+    filled = np.where(measured, values, 0)
+    huber = median.copy()
+    for _ in range(maxiter):
+        r = np.abs(filled - huber[:, None]) / scale
+        w = np.where(r <= k, 1, k / np.maximum(r, k)) * measured
+        updated = (w * filled).sum(axis=1) / w.sum(axis=1)
+        converged = np.max(np.abs(updated - huber)) < tol
+        huber = updated
+        if converged:
+            break
+
+    gene_idx, cond_idx = np.divmod(pairs, n_cond)
+    consensus = pd.DataFrame({gene_key: genes[gene_idx]})
+    for key in by:
+        consensus[key] = conditions[key].values[cond_idx]
+    if growth_rate_key is not None and growth_rate_key in data.keys() and \
+       growth_rate_key not in by:
+        growth_rates = np.bincount(cond_codes, weights=data[growth_rate_key].values,
+                                   minlength=n_cond) / np.bincount(cond_codes, minlength=n_cond)
+        consensus[growth_rate_key] = growth_rates[cond_idx]
+    consensus['n_datasets'] = n_datasets
+    consensus[f'{value_key}_median'] = 10**median
+    consensus[f'{value_key}_huber'] = 10**huber
+    consensus['log10_mad'] = mad
+    consensus['log10_std'] = std
+    return consensus
+
+class AbundanceGrid(object):
+    """
+    Dense gene x dataset x growth rate array of abundances, as returned by
+    `interpolate_abundance`. Entries outside the measured range of a gene
+    (beyond the extrapolation guard) are NaN.
+
+    Parameters
+    ----------
+    values : 3d-array
+        Abundances, with shape (genes, datasets, growth rates).
+    genes, datasets : list-like
+        Labels of the first two axes.
+    growth_rate : 1d-array
+        Growth rates (hr^-1) of the last axis.
+    """
+    def __init__(self, values, genes, datasets, growth_rate):
+        self.values = np.asarray(values)
+        self.genes = pd.Index(genes)
+        self.datasets = pd.Index(datasets)
+        self.growth_rate = np.asarray(growth_rate)
+        self._gene_idx = {g: i for i, g in enumerate(self.genes)}
+        self._dataset_idx = {d: i for i, d in enumerate(self.datasets)}
+
+    def get(self, gene, dataset=None):
+        """
+        Returns the abundances of a gene on the growth-rate grid, for one
+        dataset (1d-array) or for all datasets (2d-array). The result is a
+        view into the grid.
+        """
+        row = self.values[self._gene_idx[gene]]
+        if dataset is None:
+            return row
+        return row[self._dataset_idx[dataset]]
+
+    def to_frame(self, value_key='value', gene_key='gene_name',
+                 dataset_key='dataset', growth_rate_key='growth_rate_hr'):
+        """
+        Returns the grid as a tidy DataFrame, without the NaN entries.
+        """
+        g, d, l = np.nonzero(~np.isnan(self.values))
+        return pd.DataFrame({gene_key: self.genes.values[g],
+                             dataset_key: self.datasets.values[d],
+                             growth_rate_key: self.growth_rate[l],
+                             value_key: self.values[g, d, l]})
+
+    def save(self, path):
+        """
+        Saves the grid to a .npz file.
+        """
+        np.savez(path, values=self.values,
+                 genes=np.asarray(self.genes, dtype=str),
+                 datasets=np.asarray(self.datasets, dtype=str),
+                 growth_rate=self.growth_rate)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a grid saved with `save`.
+        """
+        with np.load(path) as stored:
+            return cls(stored['values'], stored['genes'], stored['datasets'],
+                       stored['growth_rate'])
+
+    def __repr__(self):
+        return (f'AbundanceGrid(genes={len(self.genes)}, datasets={len(self.datasets)}, '
+                f'growth_rate=[{self.growth_rate[0]}, ..., {self.growth_rate[-1]}] '
+                f'({len(self.growth_rate)} points))')
+
+
+def _pchip_slopes(x, y, n):
+    """
+    Monotone (Fritsch-Carlson) slopes for packed rows of knots. x and y have
+    shape (rows, K) with the first n knots of each row valid.
+    """
+    h = np.diff(x, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = np.diff(y, axis=1) / h
+    slopes = np.zeros_like(y)
+    if x.shape[1] < 2:
+        return slopes
+    # Interior knots, as weighted harmonic means of the adjacent secants.
+    h0, h1 = h[:, :-1], h[:, 1:]
+    d0, d1 = delta[:, :-1], delta[:, 1:]
+    w0, w1 = 2 * h1 + h0, h1 + 2 * h0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interior = (w0 + w1) / (w0 / d0 + w1 / d1)
+    interior = np.where(d0 * d1 > 0, interior, 0)
+    slopes[:, 1:-1] = interior
+    # End knots take the slope of the adjacent secant.
+    rows = np.arange(len(x))
+    slopes[:, 0] = delta[:, 0]
+    last = np.maximum(n - 1, 1)
+    slopes[rows, np.minimum(n - 1, x.shape[1] - 1)] = delta[rows, last - 1]
+    return np.nan_to_num(slopes)
+
+def interpolate_abundance(df, growth_rate=None, value_key='tot_per_cell',
+                          gene_key='gene_name', dataset_key='dataset',
+                          growth_rate_key='growth_rate_hr', method='linear',
+                          max_extrapolation=0.1):
+    """
+    Interpolates the log abundance of every gene in every dataset onto a
+    common growth-rate grid, for all gene x dataset pairs at once.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    growth_rate : 1d-array or None
+        Growth-rate grid (hr^-1). If None, 201 points spanning the measured
+        growth rates are used.
+    value_key : str
+        Key of the abundance. Only positive values are used, and measurements
+        of a gene at the same growth rate in one dataset are averaged in log
+        space.
+    gene_key, dataset_key, growth_rate_key : str
+        Keys identifying the genes, datasets, and growth rates.
+    method : str
+        'linear' for piecewise-linear interpolation of the log abundance, or
+        'pchip' for monotone piecewise-cubic interpolation.
+    max_extrapolation : float
+        Distance (hr^-1) beyond the lowest and highest measured growth rates
+        of a gene in a dataset over which the abundance is held at its value
+        at the end point. Further away, the abundance is NaN.
+
+    Returns
+    -------
+    grid : AbundanceGrid
+        Interpolated abundances, with shape (genes, datasets, growth rates).
+    """
+    if method not in ['linear', 'pchip']:
+        raise ValueError(f"method must be 'linear' or 'pchip', not {method}")
+    data = df[(df[value_key] > 0) &
+              df[[gene_key, dataset_key, growth_rate_key]].notna().all(axis=1)]
+    gene_codes, genes = pd.factorize(data[gene_key], sort=True)
+    dset_codes, datasets = pd.factorize(data[dataset_key], sort=True)
+    if growth_rate is None:
+        growth_rate = np.linspace(data[growth_rate_key].min(),
+                                  data[growth_rate_key].max(), 201)
+    growth_rate = np.asarray(growth_rate, dtype=float)
+
+    # Mean log abundance of every gene x dataset pair at each of its growth
+    # rates, packed into (pairs, K) arrays of knots sorted by growth rate.
+    knots = pd.DataFrame({'pair': gene_codes * len(datasets) + dset_codes,
+                          'x': data[growth_rate_key].values,
+                          'y': np.log10(data[value_key].values)})
+    knots = knots.groupby(['pair', 'x'], sort=True)['y'].mean().reset_index()
+    pairs, starts, n = np.unique(knots['pair'].values, return_index=True,
+                                 return_counts=True)
+    pos = np.arange(len(knots)) - np.repeat(starts, n)
+    row = np.repeat(np.arange(len(pairs)), n)
+    K = n.max()
+    x = np.full((len(pairs), K), np.inf)
+    y = np.zeros((len(pairs), K))
+    x[row, pos] = knots['x'].values
+    y[row, pos] = knots['y'].values
+    x_min, x_max = x[:, 0], x[row[starts + n - 1], pos[starts + n - 1]]
+
+    # Clamp the grid to the range of each pair and find the interval of each
+    # grid point, (pairs, L).
+    xq = np.clip(growth_rate[None, :], x_min[:, None], x_max[:, None])
+    j = (x[:, None, :] <= xq[:, :, None]).sum(axis=-1) - 1
+    j = np.minimum(j, np.maximum(n - 2, 0)[:, None])
+    rows = np.arange(len(pairs))[:, None]
+    jr = np.minimum(j + 1, (n - 1)[:, None])
+    xl, xr = x[rows, j], x[rows, jr]
+    yl, yr = y[rows, j], y[rows, jr]
+    h = xr - xl
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(h > 0, (xq - xl) / h, 0)
+    if method == 'linear':
+        logv = yl + t * (yr - yl)
+    else:
+        slopes = _pchip_slopes(np.where(np.isinf(x), np.nan, x), y, n)
+        dl, dr = slopes[rows, j], slopes[rows, jr]
+        t2, t3 = t**2, t**3
+        logv = (2 * t3 - 3 * t2 + 1) * yl + (t3 - 2 * t2 + t) * h * dl + \
+               (-2 * t3 + 3 * t2) * yr + (t3 - t2) * h * dr
+
+    # Extrapolation guard.
+    outside = (growth_rate[None, :] < x_min[:, None] - max_extrapolation) | \
+              (growth_rate[None, :] > x_max[:, None] + max_extrapolation)
+    logv[outside] = np.nan
+
+    values = np.full((len(genes) * len(datasets), len(growth_rate)), np.nan)
+    values[pairs] = 10**logv
+    values = values.reshape(len(genes), len(datasets), len(growth_rate))
+    return AbundanceGrid(values, genes, datasets, growth_rate)
+
+def growth_scaling(df, value_key='tot_per_cell', gene_key='gene_name',
+                   dataset_key='dataset', growth_rate_key='growth_rate_hr',
+                   alpha=0.05, min_points=3):
+    """
+    Regresses the log abundance of every gene in every dataset against the
+    growth rate, using closed-form least squares for all gene x dataset pairs
+    at once, and classifies the growth-rate dependence of each pair.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    value_key : str
+        Key of the abundance. Only positive values are used.
+    gene_key, dataset_key, growth_rate_key : str
+        Keys identifying the genes, datasets, and growth rates.
+    alpha : float
+        Significance level of the slope used for the classification.
+    min_points : int
+        Minimum number of measurements for a pair to be classified.
+
+    Returns
+    -------
+    scaling : pandas DataFrame
+        One row per gene and dataset with the number of measurements
+        (`n_obs`), the number of distinct growth rates, the slope (hr) and
+        intercept of the natural log of the abundance, their standard errors,
+        R^2, the two-sided p-value of the slope, and the classification:
+        'ribosome-like' (significantly increasing with growth rate),
+        'decreasing' (significantly decreasing), 'constant' (no significant
+        slope), or 'undetermined' (fewer than `min_points` measurements or
+        fewer than three growth rates).
+    """
+    data = df[(df[value_key] > 0) &
+              df[[gene_key, dataset_key, growth_rate_key]].notna().all(axis=1)]
+    gene_codes, genes = pd.factorize(data[gene_key], sort=True)
+    dset_codes, datasets = pd.factorize(data[dataset_key], sort=True)
+    size = len(genes) * len(datasets)
+    pair = gene_codes * len(datasets) + dset_codes
+    x = data[growth_rate_key].values.astype(float)
+    y = np.log(data[value_key].values.astype(float))
+
+    # Sums over the measurements of every pair.
+    n = np.bincount(pair, minlength=size).astype(float)
+    present = np.flatnonzero(n > 0)
+    n = n[present]
+    Sx, Sy, Sxx, Sxy, Syy = [np.bincount(pair, weights=w, minlength=size)[present]
+                             for w in [x, y, x * x, x * y, y * y]]
+    n_rates = pd.DataFrame({'pair': pair, 'x': x}).groupby('pair')['x'].nunique()
+    n_rates = n_rates.reindex(present).values
+
+    # Centered sums of squares. Pairs with a single growth rate have no
+    # slope; pairs with a constant abundance have a slope of exactly zero.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xbar, ybar = Sx / n, Sy / n
+        sxx = np.maximum(Sxx - n * xbar**2, 0)
+        sxy = Sxy - n * xbar * ybar
+        syy = np.maximum(Syy - n * ybar**2, 0)
+        flat = syy <= 1E-12 * np.maximum(Syy, 1)
+        sxy = np.where(flat, 0, sxy)
+        syy = np.where(flat, 0, syy)
+        sxx = np.where(sxx > 1E-12 * np.maximum(Sxx, 1), sxx, np.nan)
+        slope = sxy / sxx
+        intercept = ybar - slope * xbar
+        ssr = np.maximum(syy - slope * sxy, 0)
+        r_squared = np.where(syy > 0, 1 - ssr / syy, np.nan)
+        dof = n - 2
+        s2 = np.where(dof > 0, ssr / dof, np.nan)
+        slope_err = np.sqrt(s2 / sxx)
+        intercept_err = np.sqrt(s2 * (1 / n + xbar**2 / sxx))
+        t = slope / slope_err
+    p_value = np.where(dof > 0, 2 * scipy.stats.t.sf(np.abs(t), np.maximum(dof, 1)), np.nan)
+    # An exact fit has a zero standard error: the slope is certain if it is
+    # non-zero, and there is no dependence at all if the abundance is flat.
+    p_value = np.where((slope_err == 0) & (slope != 0), 0, p_value)
+    p_value = np.where(flat & (dof > 0), 1, p_value)
+
+    classification = np.where(p_value < alpha,
+                              np.where(slope > 0, 'ribosome-like', 'decreasing'),
+                              'constant')
+    undetermined = (n < min_points) | (n_rates < 3) | np.isnan(p_value)
+    classification = np.where(undetermined, 'undetermined', classification)
+
+    gene_idx, dset_idx = np.divmod(present, len(datasets))
+    return pd.DataFrame({gene_key: genes[gene_idx],
+                         dataset_key: datasets[dset_idx],
+                         'n_obs': n.astype(int),
+                         'n_growth_rates': n_rates,
+                         'slope': slope,
+                         'slope_err': slope_err,
+                         'intercept': intercept,
+                         'intercept_err': intercept_err,
+                         'r_squared': r_squared,
+                         'p_value': p_value,
+                         'classification': classification})
+
+def correlation_neighbors(df, k=10, value_key='tot_per_cell', gene_key='gene_name',
+                          condition_key=['dataset', 'condition', 'growth_rate_hr'],
+                          min_overlap=5, block_size=1024, absolute=False):
+    """
+    Finds the k genes whose log abundance correlates best with each gene
+    across conditions. The Pearson correlations are computed block by block
+    on the standardized gene x condition matrix, using for each pair of
+    genes only the conditions in which both were measured, and only the
+    running top k partners of every gene are kept.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    k : int
+        Number of partners to keep per gene.
+    value_key : str
+        Key of the abundance. Only positive values are used.
+    gene_key : str
+        Key identifying the genes.
+    condition_key : str or list of str
+        Key(s) identifying the conditions. The growth rate is needed to tell
+        apart the chemostat conditions, which share the same condition name.
+    min_overlap : int
+        Minimum number of shared conditions for a correlation to be
+        considered.
+    block_size : int
+        Number of genes per block. Memory use scales with its square.
+    absolute : bool
+        If True, partners are ranked by the absolute value of the
+        correlation, so that anticorrelated genes are included.
+
+    Returns
+    -------
+    neighbors : pandas DataFrame
+        One row per gene and partner with the rank of the partner, the
+        correlation coefficient, and the number of shared conditions.
+    """
+    if type(condition_key) == str:
+        condition_key = [condition_key]
+    data = df[(df[value_key] > 0) & df[[gene_key] + condition_key].notna().all(axis=1)]
+    gene_codes, genes = pd.factorize(data[gene_key], sort=True)
+    cond_codes = data.groupby(condition_key, sort=True).ngroup().values
+    n_genes, n_cond = len(genes), cond_codes.max() + 1
+
+    # Gene x condition matrix of mean log abundances, standardized per gene.
+    flat = gene_codes * n_cond + cond_codes
+    counts = np.bincount(flat, minlength=n_genes * n_cond)
+    sums = np.bincount(flat, weights=np.log(data[value_key].values),
+                       minlength=n_genes * n_cond)
+    with np.errstate(invalid='ignore'):
+        X = (sums / counts).reshape(n_genes, n_cond)
+    mask = ~np.isnan(X)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        X = (X - np.nanmean(X, axis=1)[:, None]) / np.nanstd(X, axis=1)[:, None]
+    X = np.where(mask & np.isfinite(X), X, 0)
+    M = mask.astype(float)
+    X2 = X**2
+
+    best_score = np.full((n_genes, k), -np.inf)
+    best_idx = np.zeros((n_genes, k), dtype=int)
+    best_r = np.full((n_genes, k), np.nan)
+    best_n = np.zeros((n_genes, k), dtype=int)
+    for a in range(0, n_genes, block_size):
+        rows = slice(a, min(a + block_size, n_genes))
+        Xa, Ma, X2a = X[rows], M[rows], X2[rows]
+        for b in range(0, n_genes, block_size):
+            cols = slice(b, min(b + block_size, n_genes))
+            Xb, Mb, X2b = X[cols], M[cols], X2[cols]
+            # Sums over the shared conditions of each pair.
+            n = Ma @ Mb.T
+            Sa, Sb = Xa @ Mb.T, Ma @ Xb.T
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = Xa @ Xb.T - Sa * Sb / n
+                var_a = X2a @ Mb.T - Sa**2 / n
+                var_b = Ma @ X2b.T - Sb**2 / n
+                r = cov / np.sqrt(var_a * var_b)
+            score = np.abs(r) if absolute else r
+            score = np.where((n >= min_overlap) & np.isfinite(score), score, -np.inf)
+            if a == b:
+                np.fill_diagonal(score, -np.inf)
+
+            # Merge the block into the running top k of each gene.
+            idx = np.broadcast_to(np.arange(cols.start, cols.stop), score.shape)
+            all_score = np.hstack([best_score[rows], score])
+            all_idx = np.hstack([best_idx[rows], idx])
+            all_r = np.hstack([best_r[rows], r])
+            all_n = np.hstack([best_n[rows], n.astype(int)])
+            keep = np.argpartition(-all_score, k - 1, axis=1)[:, :k] \
+                        if all_score.shape[1] > k else np.argsort(-all_score, axis=1)[:, :k]
+            take = lambda v: np.take_along_axis(v, keep, axis=1)
+            best_score[rows], best_idx[rows] = take(all_score), take(all_idx)
+            best_r[rows], best_n[rows] = take(all_r), take(all_n)
+
+    # Sort the partners of each gene and drop empty slots.
+    order = np.argsort(-best_score, axis=1, kind='stable')
+    take = lambda v: np.take_along_axis(v, order, axis=1)
+    best_score, best_idx, best_r, best_n = [take(v) for v in
+                                            [best_score, best_idx, best_r, best_n]]
+    gene_idx, rank = np.nonzero(np.isfinite(best_score))
+    return pd.DataFrame({gene_key: genes[gene_idx],
+                         'neighbor': genes[best_idx[gene_idx, rank]],
+                         'rank': rank + 1,
+                         'correlation': best_r[gene_idx, rank],
+                         'n_overlap': best_n[gene_idx, rank]})
+
+def top_genes(df, by=['dataset', 'condition', 'growth_rate_hr'],
+              value_key='fg_per_cell', fraction=0.1):
+    """
+    Selects the most abundant genes of each group, e.g. as query sets for
+    `enrichment`.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    by : str or list of str
+        Key(s) defining the groups. The growth rate is needed to tell apart
+        the chemostat conditions, which share the same condition name.
+    value_key : str
+        Key of the abundance by which the genes are ranked.
+    fraction : float
+        Fraction of the measured genes of each group to select.
+
+    Returns
+    -------
+    top : pandas DataFrame
+        The rows of the selected genes.
+    """
+    rank = df.groupby(by)[value_key].rank(ascending=False, pct=True, method='first')
+    return df[rank <= fraction]
+
+def _benjamini_hochberg(p, groups, n_tests):
+    """
+    Benjamini-Hochberg adjusted p-values within each group, with n_tests
+    hypotheses per group of which only those in p are given (the others
+    have p = 1).
+    """
+    order = np.lexsort((p, groups))
+    p_sorted, g_sorted = p[order], groups[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(g_sorted)) + 1]
+    rank = np.arange(len(p)) - np.repeat(starts, np.diff(np.r_[starts, len(p)])) + 1
+    q = p_sorted * n_tests[g_sorted] / rank
+    # Cumulative minimum from the largest p-value down, within each group.
+    q = pd.Series(q[::-1]).groupby(g_sorted[::-1]).cummin().values[::-1]
+    adjusted = np.empty(len(p))
+    adjusted[order] = np.minimum(q, 1)
+    return adjusted
+
+def enrichment(queries, incidence, genes, terms,
+               query_key=['dataset', 'condition', 'growth_rate_hr'],
+               gene_key='gene_name', universe=None, min_term_size=2):
+    """
+    Tests every term for over-representation in every query gene set at once
+    with the hypergeometric distribution, from the sparse gene x term
+    incidence matrix. P-values are adjusted by Benjamini-Hochberg within each
+    query.
+
+    Parameters
+    ----------
+    queries : pandas DataFrame
+        Long-form table of the query gene sets, e.g. from `top_genes`.
+    incidence : scipy.sparse matrix
+        Gene x term incidence matrix, see `incidence_matrix`.
+    genes, terms : pandas Index
+        Labels of the rows and columns of the incidence matrix.
+    query_key : str or list of str
+        Key(s) identifying the query sets.
+    gene_key : str
+        Key identifying the genes.
+    universe : list-like or None
+        Genes against which the enrichment is tested. If None, all genes of
+        the incidence matrix. Genes of the queries outside the universe are
+        ignored.
+    min_term_size : int
+        Minimum number of universe genes annotated with a term for it to be
+        tested.
+
+    Returns
+    -------
+    enriched : pandas DataFrame
+        One row per query and term with at least one annotated query gene,
+        with the number of annotated query genes (`n_hits`), the query size,
+        the term size, the universe size, the fold enrichment, the p-value,
+        and the adjusted p-value (`q_value`).
+    """
+    if type(query_key) == str:
+        query_key = [query_key]
+    genes = pd.Index(genes)
+    in_universe = np.ones(len(genes), dtype=bool) if universe is None else \
+                    genes.isin(universe)
+    incidence = sparse.csr_matrix(incidence)
+    incidence = sparse.diags(in_universe.astype(float)) @ incidence
+    term_size = np.asarray(incidence.sum(axis=0)).ravel()
+    tested = term_size >= min_term_size
+    incidence = incidence[:, tested]
+    terms, term_size = pd.Index(terms)[tested], term_size[tested]
+    N = in_universe.sum()
+
+    # Sparse gene x query membership matrix.
+    queries = queries[queries[query_key].notna().all(axis=1)]
+    gene_idx = genes.get_indexer(queries[gene_key])
+    keep = gene_idx >= 0
+    keep[keep] = in_universe[gene_idx[keep]]
+    query_codes = queries.groupby(query_key, sort=True).ngroup().values
+    labels = queries[query_key].drop_duplicates().sort_values(query_key)
+    membership = sparse.csr_matrix((np.ones(keep.sum()),
+                                    (gene_idx[keep], query_codes[keep])),
+                                   shape=(len(genes), len(labels)))
+    # Genes listed twice in a query count once.
+    membership.sum_duplicates()
+    membership.data[:] = 1
+    query_size = np.asarray(membership.sum(axis=0)).ravel()
+
+    # Number of annotated query genes for every term and query.
+    hits = (incidence.T @ membership).tocoo()
+    t, q, k = hits.row, hits.col, hits.data
+    p = scipy.stats.hypergeom.sf(k - 1, N, term_size[t], query_size[q])
+    q_value = _benjamini_hochberg(p, q, np.full(len(labels), len(terms)))
+
+    enriched = pd.DataFrame({'term': terms.values[t]})
+    for key in query_key:
+        enriched[key] = labels[key].values[q]
+    expected = query_size[q] * term_size[t] / N
+    enriched['n_hits'] = k.astype(int)
+    enriched['query_size'] = query_size[q].astype(int)
+    enriched['term_size'] = term_size[t].astype(int)
+    enriched['universe_size'] = N
+    enriched['fold_enrichment'] = k / expected
+    enriched['p_value'] = p
+    enriched['q_value'] = q_value
+    enriched = enriched[query_key + [c for c in enriched.columns if c not in query_key]]
+    return enriched.sort_values(query_key + ['p_value']).reset_index(drop=True)
+
+def _popcount(x):
+    """
+    Number of set bits of each element of an unsigned integer array.
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x).astype(int)
+    x = x.astype(np.uint64)
+    count = np.zeros(x.shape, dtype=int)
+    while x.any():
+        count += (x & np.uint64(1)).astype(int)
+        x = x >> np.uint64(1)
+    return count
+
+def _superset_sum(f, n_bits):
+    """
+    For every bit pattern, sums `f` over all the patterns that contain it
+    (the zeta transform over supersets), along the first axis.
+    """
+    f = f.copy()
+    for i in range(n_bits):
+        view = f.reshape((-1, 2, 2**i) + f.shape[1:])
+        view[:, 0] += view[:, 1]
+    return f
+
+def _coverage(df, by, gene_key, mass_key, count_key, condition_key, sets):
+    measured = df[(df[count_key] > 0) & df[gene_key].notna()]
+    gene_codes, genes = pd.factorize(measured[gene_key])
+    set_codes = pd.Index(sets).get_indexer(pd.MultiIndex.from_frame(measured[by])
+                                           if len(by) > 1 else measured[by[0]])
+    keep = set_codes >= 0
+    gene_codes, set_codes = gene_codes[keep], set_codes[keep]
+    measured = measured[keep]
+
+    # Bitset of the sets in which each gene is measured.
+    bits = np.zeros(len(genes), dtype=np.uint64)
+    np.bitwise_or.at(bits, gene_codes, np.left_shift(np.uint64(1),
+                                                     set_codes.astype(np.uint64)))
+
+    # Mean mass fraction of each gene in each set, over the conditions.
+    conditions = measured.groupby(by + condition_key, dropna=False).ngroup().values
+    mass = np.nan_to_num(measured[mass_key].values.astype(float))
+    total = np.bincount(conditions, weights=mass)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = mass / total[conditions]
+    frac = np.nan_to_num(frac)
+    n_conditions = np.array([len(np.unique(conditions[set_codes == j]))
+                             for j in range(len(sets))])
+    weights = np.zeros((len(genes), len(sets)))
+    np.add.at(weights, (gene_codes, set_codes), frac)
+    weights /= np.maximum(n_conditions, 1)
+    return bits, weights
+
+def coverage_intersections(df, by='dataset', within=None, gene_key='gene_name',
+                           mass_key='fg_per_cell', count_key='tot_per_cell',
+                           condition_key=['condition', 'growth_rate_hr']):
+    """
+    Counts the genes measured in every combination of datasets (or any
+    other grouping), UpSet-style. The coverage of each gene is encoded as a
+    bitset over the datasets, so that the exclusive counts of all 2**k
+    combinations follow from a single bincount, and the inclusive counts
+    from a transform over the supersets.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with proteomic information
+    by : str or list of str
+        Key(s) defining the sets whose intersections are counted.
+    within : str, list of str, or None
+        Key(s) of outer groups (e.g. the condition) within which the
+        intersections are computed separately.
+    gene_key : str
+        Key identifying the genes.
+    mass_key : str
+        Key of the mass of each protein, from which the mass fractions are
+        computed.
+    count_key : str
+        Key of the copy number of each protein. A gene is covered by a set
+        if it has a positive copy number in any of its conditions.
+    condition_key : str or list of str
+        Key(s) identifying the conditions of a set, over which the mass
+        fractions are averaged.
+
+    Returns
+    -------
+    intersections : pandas DataFrame
+        One row per non-empty combination of sets (and outer group) with the
+        sets it contains (`members`, joined by ' & '), its size (`degree`),
+        the number of genes measured in exactly these sets (`n_exclusive`)
+        and in at least these sets (`n_inclusive`), and, for every set, the
+        mean mass fraction of its proteome made up by the genes of the
+        inclusive intersection (`frac_mass_<set>`).
+    """
+    if type(by) == str:
+        by = [by]
+    if type(within) == str:
+        within = [within]
+    if type(condition_key) == str:
+        condition_key = [condition_key]
+    data = df[df[by].notna().all(axis=1)]
+    sets = data[by].drop_duplicates().sort_values(by)
+    sets = pd.MultiIndex.from_frame(sets) if len(by) > 1 else pd.Index(sets[by[0]])
+    n_bits = len(sets)
+    if n_bits > 20:
+        raise ValueError(f'{n_bits} sets give too many combinations (2**{n_bits}).')
+    labels = [' / '.join(str(v) for v in s) if len(by) > 1 else str(s) for s in sets]
+
+    patterns = np.arange(1, 2**n_bits, dtype=np.uint64)
+    bit_table = (patterns[:, None] >> np.arange(n_bits, dtype=np.uint64)) & np.uint64(1)
+    members = [' & '.join(np.array(labels)[row.astype(bool)]) for row in bit_table]
+
+    groups = [((), data)] if within is None else data.groupby(within)
+    dfs = []
+    for g, d in groups:
+        bits, weights = _coverage(d, by, gene_key, mass_key, count_key,
+                                     condition_key, sets)
+        exclusive = np.bincount(bits.astype(np.int64), minlength=2**n_bits)
+        inclusive = _superset_sum(exclusive, n_bits)
+        frac = np.array([np.bincount(bits.astype(np.int64), weights=weights[:, j],
+                                     minlength=2**n_bits) for j in range(n_bits)]).T
+        frac = _superset_sum(frac, n_bits)
+        _df = pd.DataFrame({'members': members, 'degree': _popcount(patterns),
+                            'n_exclusive': exclusive[1:], 'n_inclusive': inclusive[1:]})
+        for j, label in enumerate(labels):
+            _df[f'frac_mass_{label}'] = frac[1:, j]
+        if within is not None:
+            g = g if type(g) == tuple else (g,)
+            for key, value in zip(within[::-1], g[::-1]):
+                _df.insert(0, key, value)
+        dfs.append(_df)
+    return pd.concat(dfs, ignore_index=True)
+
+def calibrate(df, reference='schmidt_2016', total=None, value_key='reported_fg_per_cell',
+              gene_key='b_number', dataset_key='dataset', condition_key='condition',
+              growth_rate_key='growth_rate_hr', condition_penalty=1.0):
+    """
+    Calibrates the abundances of several datasets against each other by
+    solving jointly, in a single sparse least-squares problem, for a scale
+    factor per dataset and per condition such that the rescaled abundances
+    of the genes shared between datasets agree. Each condition is matched to
+    the condition of the reference dataset(s) with the nearest growth rate,
+    and every gene at every matched growth rate has its own (fitted) log
+    abundance. The scales of the reference conditions are fixed.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with the measurements of all datasets.
+    reference : str or list of str
+        Dataset(s) whose scales are fixed.
+    total : callable or None
+        Function of the growth rate giving the total mass of the reference
+        conditions (e.g. `prot.size.lambda2P`), to which their abundances are
+        rescaled. If None, the reference abundances are taken as they are.
+    value_key : str
+        Key of the abundance (mass per cell if `total` is given). Only
+        positive values are used.
+    gene_key, dataset_key, condition_key, growth_rate_key : str
+        Keys identifying the genes, datasets, conditions, and growth rates.
+    condition_penalty : float
+        Weight of the ridge penalty on the log condition scales, which
+        keeps them close to the dataset scale when the data are not
+        informative.
+
+    Returns
+    -------
+    scales : pandas DataFrame
+        One row per dataset and condition with the matched reference growth
+        rate, the number of genes shared with the reference conditions, the
+        dataset and condition scales, and their product (`scale`), by which
+        the abundances are multiplied. Datasets without genes in common
+        with the reference have NaN scales.
+    residuals : pandas DataFrame
+        One row per dataset and gene with the number of observations used in
+        the fit and the mean and root mean square of their residuals (log10).
+    """
+    if type(reference) == str:
+        reference = [reference]
+    keys = [dataset_key, condition_key, growth_rate_key]
+    data = df[(df[value_key] > 0) & df[[gene_key] + keys].notna().all(axis=1)]
+    conditions = data[keys].drop_duplicates().sort_values(keys).reset_index(drop=True)
+    cond_codes = pd.MultiIndex.from_frame(conditions).get_indexer(
+                                        pd.MultiIndex.from_frame(data[keys]))
+    anchored = conditions[dataset_key].isin(reference).values
+    if not anchored.any():
+        raise ValueError('None of the reference datasets is in the data.')
+    y = np.log(data[value_key].values.astype(float))
+
+    # Fixed log scales of the reference conditions.
+    x_fixed = np.zeros(len(conditions))
+    if total is not None:
+        mass = np.bincount(cond_codes, weights=data[value_key].values, minlength=len(conditions))
+        rates = conditions[growth_rate_key].values[anchored]
+        x_fixed[anchored] = np.log(np.asarray(total(rates), dtype=float).ravel() / mass[anchored])
+
+    # Nearest reference growth rate of each condition.
+    ref_rates = np.unique(conditions[growth_rate_key].values[anchored])
+    rates = conditions[growth_rate_key].values
+    pos = np.clip(np.searchsorted(ref_rates, rates), 1, max(len(ref_rates) - 1, 1))
+    lower = ref_rates[pos - 1]
+    upper = ref_rates[np.minimum(pos, len(ref_rates) - 1)]
+    matched = np.where(np.abs(rates - lower) <= np.abs(upper - rates), lower, upper)
+    match_codes = np.searchsorted(ref_rates, matched)
+
+    # Latent log abundances of each gene at each matched growth rate, kept
+    # only if observed in at least two conditions.
+    gene_codes, genes = pd.factorize(data[gene_key])
+    latent = gene_codes * len(ref_rates) + match_codes[cond_codes]
+    n_cond = pd.Series(cond_codes).groupby(latent).nunique()
+    keep = np.isin(latent, n_cond.index[n_cond.values >= 2])
+    latent_codes, latent = pd.factorize(latent[keep])
+    obs_cond, y = cond_codes[keep], y[keep]
+    is_anchored = anchored[obs_cond]
+
+    # Shared genes with the reference, per condition.
+    has_ref = np.zeros(len(latent), dtype=bool)
+    has_ref[latent_codes[is_anchored]] = True
+    n_shared = np.bincount(obs_cond[has_ref[latent_codes] & ~is_anchored],
+                           minlength=len(conditions))
+    n_shared[anchored] = 0
+
+    # Unknowns: log scales of the free datasets, log scales of the free
+    # conditions, and the latent log abundances.
+    dataset_codes, datasets = pd.factorize(conditions[dataset_key])
+    free_datasets = np.unique(dataset_codes[~anchored])
+    dataset_col = -np.ones(len(datasets), dtype=int)
+    dataset_col[free_datasets] = np.arange(len(free_datasets))
+    cond_col = -np.ones(len(conditions), dtype=int)
+    cond_col[~anchored] = len(free_datasets) + np.arange((~anchored).sum())
+    n_scale = len(free_datasets) + (~anchored).sum()
+    n_unknowns = n_scale + len(latent)
+
+    n_obs = len(y)
+    free = ~is_anchored
+    free_rows = np.flatnonzero(free)
+    rows = np.concatenate([np.arange(n_obs), free_rows, free_rows])
+    cols = np.concatenate([n_scale + latent_codes,
+                           dataset_col[dataset_codes[obs_cond[free]]],
+                           cond_col[obs_cond[free]]])
+    vals = np.concatenate([-np.ones(n_obs), np.ones(2 * len(free_rows))])
+    rhs = -y - x_fixed[obs_cond]
+    # Ridge penalty on the free condition scales.
+    penalty_cols = cond_col[~anchored]
+    rows = np.concatenate([rows, n_obs + np.arange(len(penalty_cols))])
+    cols = np.concatenate([cols, penalty_cols])
+    vals = np.concatenate([vals, np.full(len(penalty_cols), np.sqrt(condition_penalty))])
+    rhs = np.concatenate([rhs, np.zeros(len(penalty_cols))])
+    A = sparse.csr_matrix((vals, (rows, cols)), shape=(len(rhs), n_unknowns))
+    solution = lsqr(A, rhs, atol=1E-12, btol=1E-12, iter_lim=10 * n_unknowns)[0]
+
+    # Log scales of every condition.
+    dataset_scale = np.zeros(len(datasets))
+    dataset_scale[free_datasets] = solution[:len(free_datasets)]
+    cond_scale = np.zeros(len(conditions))
+    cond_scale[~anchored] = solution[cond_col[~anchored]]
+    for d in np.unique(dataset_codes[anchored]):
+        in_d = dataset_codes == d
+        dataset_scale[d] = x_fixed[in_d].mean()
+        cond_scale[in_d] = x_fixed[in_d] - dataset_scale[d]
+    unlinked = np.bincount(dataset_codes, weights=n_shared, minlength=len(datasets)) == 0
+    unlinked[dataset_codes[anchored]] = False
+
+    scales = conditions.copy()
+    scales['reference_growth_rate'] = matched
+    scales['anchored'] = anchored
+    scales['n_shared'] = n_shared
+    scales['dataset_scale'] = np.exp(dataset_scale[dataset_codes])
+    scales['condition_scale'] = np.exp(cond_scale)
+    scales['scale'] = scales['dataset_scale'] * scales['condition_scale']
+    scales.loc[unlinked[dataset_codes], ['dataset_scale', 'condition_scale', 'scale']] = np.nan
+
+    # Residuals of the fit, per dataset and gene.
+    x = dataset_scale[dataset_codes] + cond_scale
+    resid = (y + x[obs_cond] - solution[n_scale + latent_codes]) / np.log(10)
+    resid = pd.DataFrame({dataset_key: conditions[dataset_key].values[obs_cond],
+                          gene_key: genes[gene_codes[keep]], 'residual': resid})
+    resid['residual_sq'] = resid['residual']**2
+    residuals = resid.groupby([dataset_key, gene_key]).agg(
+                    n_obs=('residual', 'size'), mean_residual_log10=('residual', 'mean'),
+                    rms_residual_log10=('residual_sq', 'mean')).reset_index()
+    residuals['rms_residual_log10'] = np.sqrt(residuals['rms_residual_log10'])
+    residuals = residuals[~residuals[dataset_key].isin(datasets[unlinked])]
+    return scales, residuals.reset_index(drop=True)
+
+def complex_abundance(df, by=['dataset', 'dataset_name', 'condition', 'growth_rate_hr'],
+                      complex_key='complex', gene_key='gene_name',
+                      count_key='tot_per_cell', subunit_key='n_subunits',
+                      n_boot=1000, percentiles=(2.5, 97.5), max_draws=5000000,
+                      seed=None):
+    """
+    Estimates the copy number of every complex in every group from the copy
+    numbers of its measured subunits, each divided by its stoichiometry.
+    Bootstrap percentile intervals are obtained by resampling the subunits
+    of each complex with replacement.
+
+    Parameters
+    ----------
+    df : pandas DataFrame
+        Dataframe with one row per subunit of each complex, e.g. the compiled
+        annotated complexes.
+    by : str or list of str
+        Key(s) defining the groups (e.g. dataset and condition). Keys that
+        are constant within a complex, such as its annotation, may be added.
+    complex_key, gene_key : str
+        Keys identifying the complexes and the subunits.
+    count_key : str
+        Key of the copy number of each subunit.
+    subunit_key : str
+        Key of the number of copies of the subunit per complex.
+    n_boot : int
+        Number of bootstrap resamples. If 0, no intervals are computed.
+    percentiles : tuple of floats
+        Lower and upper percentiles of the intervals.
+    max_draws : int
+        Maximum number of bootstrap draws held in memory at once. The
+        complexes are processed in chunks accordingly.
+    seed : int or None
+        Seed of the random number generator.
+
+    Returns
+    -------
+    cplx_df : pandas DataFrame
+        One row per group and complex with the number of measured subunits,
+        and the minimum, maximum, mean, and median of the copy number per
+        complex implied by each subunit (`n_units_*`), together with the
+        stoichiometry-weighted estimate (total subunit copies over total
+        stoichiometry, `n_units_weighted`). If `n_boot` > 0, the intervals of
+        the mean and of the weighted estimate are given by the `_lower` and
+        `_upper` columns.
+    """
+    if type(by) == str:
+        by = [by]
+    keys = by + [complex_key]
+    data = df[(df[count_key] >= 0) & (df[subunit_key] > 0) &
+              df[keys + [gene_key]].notna().all(axis=1)]
+    data = data.drop_duplicates(subset=keys + [gene_key])
+    data = data.assign(_n_units=data[count_key] / data[subunit_key])
+    grouped = data.groupby(keys, sort=True)
+    cplx_df = grouped['_n_units'].agg(['size', 'min', 'max', 'mean', 'median']).reset_index()
+    cplx_df.columns = keys + ['n_measured_subunits', 'n_units_min', 'n_units_max',
+                              'n_units_mean', 'n_units_median']
+    sums = grouped[[count_key, subunit_key]].sum().values
+    cplx_df['n_units_weighted'] = sums[:, 0] / sums[:, 1]
+    if n_boot == 0:
+        return cplx_df
+
+    # Subunits sorted by complex, so that each complex is a contiguous block.
+    codes = grouped.ngroup().values
+    order = np.argsort(codes, kind='stable')
+    x = data['_n_units'].values[order]
+    count = data[count_key].values[order].astype(float)
+    stoich = data[subunit_key].values[order].astype(float)
+    sizes = cplx_df['n_measured_subunits'].values
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+
+    rng = np.random.default_rng(seed)
+    bounds = np.empty((len(cplx_df), 4))
+    # Complexes with a single measured subunit have no spread.
+    single = sizes == 1
+    bounds[single] = np.repeat(cplx_df[['n_units_mean', 'n_units_weighted']].values[single], 2, axis=1)
+    multi = np.flatnonzero(~single)
+    # Chunks of complexes with at most max_draws draws each.
+    rows_per_chunk = max(max_draws // n_boot, 1)
+    chunk_id = np.cumsum(sizes[multi]) // rows_per_chunk
+    for c in np.unique(chunk_id):
+        cplxs = multi[chunk_id == c]
+        n, s = sizes[cplxs], starts[cplxs]
+        # One slot per subunit of each complex, each drawing a random subunit
+        # of the same complex in every resample.
+        slot_start = np.repeat(s, n)
+        slot_size = np.repeat(n, n)
+        draws = slot_start[:, None] + (rng.random((len(slot_start), n_boot)) *
+                                       slot_size[:, None]).astype(int)
+        offsets = np.r_[0, np.cumsum(n)[:-1]]
+        mean = np.add.reduceat(x[draws], offsets, axis=0) / n[:, None]
+        weighted = np.add.reduceat(count[draws], offsets, axis=0) / \
+                   np.add.reduceat(stoich[draws], offsets, axis=0)
+        lower, upper = np.percentile(mean, percentiles, axis=1)
+        bounds[cplxs, 0], bounds[cplxs, 1] = lower, upper
+        lower, upper = np.percentile(weighted, percentiles, axis=1)
+        bounds[cplxs, 2], bounds[cplxs, 3] = lower, upper
+
+    for i, key in enumerate(['n_units_mean_lower', 'n_units_mean_upper',
+                             'n_units_weighted_lower', 'n_units_weighted_upper']):
+        cplx_df[key] = bounds[:, i]
+    return cplx_df
+
+
+class RunningMoments(object):
+    """
+    Running count, mean, variance, minimum, and maximum of one or more
+    quantities per key (e.g. per gene, or per sector), updated batch by
+    batch with the parallel form of Welford's algorithm (Chan et al. 1979),
+    so that adding measurements takes time proportional to the size of the
+    batch rather than to all the data seen so far.
+
+    Parameters
+    ----------
+    keys : str or list of str
+        Key(s) identifying the rows of the summary, e.g. 'gene_name'.
+    values : str or list of str
+        Quantities to summarize. NaN values are ignored.
+    sum_by : str, list of str, or None
+        If given, the values are first summed per key within these groups
+        (e.g. dataset and condition), so that every group contributes one
+        observation per key. Each group must then be contained in a single
+        batch.
+    """
+    def __init__(self, keys='gene_name', values=['tot_per_cell', 'fg_per_cell'],
+                 sum_by=None):
+        self.keys = [keys] if type(keys) == str else list(keys)
+        self.values = [values] if type(values) == str else list(values)
+        self.sum_by = [sum_by] if type(sum_by) == str else sum_by
+        # The state arrays are allocated with spare capacity, of which the
+        # first _n rows are used; the row of each key is looked up in a dict
+        # and the index of the summary is only built when it is requested.
+        self._n = 0
+        self._key_list = []
+        self._row_of = {}
+        self._index = None
+        shape = (0, len(self.values))
+        self._count = np.zeros(shape, dtype=np.int64)
+        self._mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+        self._min = np.zeros(shape)
+        self._max = np.zeros(shape)
+        self.batches = []
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def index(self):
+        if self._index is None or len(self._index) != self._n:
+            self._index = pd.MultiIndex.from_tuples(self._key_list, names=self.keys)
+        return self._index
+
+    @property
+    def count(self):
+        return self._count[:self._n]
+
+    @property
+    def mean(self):
+        return self._mean[:self._n]
+
+    @property
+    def m2(self):
+        return self._m2[:self._n]
+
+    @property
+    def min(self):
+        return self._min[:self._n]
+
+    @property
+    def max(self):
+        return self._max[:self._n]
+
+    def __repr__(self):
+        return (f'RunningMoments(keys={self.keys}, values={self.values}, '
+                f'rows={len(self)}, batches={len(self.batches)})')
+
+    def _grow(self, n_new):
+        """
+        Makes room for n_new more rows, doubling the capacity when it is
+        exhausted so that the arrays are reallocated O(log n) times.
+        """
+        capacity = len(self._count)
+        if self._n + n_new <= capacity:
+            return
+        pad = ((0, max(2 * capacity, self._n + n_new) - capacity), (0, 0))
+        self._count = np.pad(self._count, pad)
+        self._mean = np.pad(self._mean, pad)
+        self._m2 = np.pad(self._m2, pad)
+        self._min = np.pad(self._min, pad, constant_values=np.inf)
+        self._max = np.pad(self._max, pad, constant_values=-np.inf)
+
+    def _combine(self, rows, count, mean, m2, vmin, vmax):
+        """
+        Merges the moments of a batch into the given rows. Rows may not
+        repeat.
+        """
+        n_a, mean_a = self._count[rows], self._mean[rows]
+        n = n_a + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = mean - mean_a
+            new_mean = mean_a + delta * np.where(n > 0, count / n, 0)
+            new_m2 = self._m2[rows] + m2 + delta**2 * np.where(n > 0, n_a * count / n, 0)
+        self._count[rows] = n
+        self._mean[rows] = np.where(count > 0, new_mean, mean_a)
+        self._m2[rows] = np.where(count > 0, new_m2, self._m2[rows])
+        self._min[rows] = np.fmin(self._min[rows], vmin)
+        self._max[rows] = np.fmax(self._max[rows], vmax)
+
+    def _rows(self, index):
+        """
+        Rows of the given keys, adding the keys not seen before.
+        """
+        rows = np.empty(len(index), dtype=np.int64)
+        new = []
+        for i, key in enumerate(index):
+            row = self._row_of.get(key)
+            if row is None:
+                row = self._n + len(new)
+                self._row_of[key] = row
+                new.append(key)
+            rows[i] = row
+        if len(new) > 0:
+            self._grow(len(new))
+            self._key_list.extend(new)
+            self._n += len(new)
+        return rows
+
+    def update(self, df, label=None):
+        """
+        Adds a batch of measurements.
+
+        Parameters
+        ----------
+        df : pandas DataFrame
+            Dataframe with the key and value columns (and the `sum_by`
+            columns, if given).
+        label : str or None
+            Name of the batch (e.g. the dataset), recorded in `batches`.
+
+        Returns
+        -------
+        self : RunningMoments
+        """
+        data = df[df[self.keys].notna().all(axis=1)]
+        if self.sum_by is not None:
+            data = data.groupby(self.sum_by + self.keys, sort=False)[self.values].sum(min_count=1)
+            data = data.reset_index()
+        codes, index = pd.factorize(pd.MultiIndex.from_frame(data[self.keys]))
+        index = pd.MultiIndex.from_tuples(index, names=self.keys)
+        n_keys = len(index)
+        x = data[self.values].values.astype(float)
+        valid = ~np.isnan(x)
+        x0 = np.where(valid, x, 0)
+
+        # Moments of the batch, per key.
+        count = np.stack([np.bincount(codes, weights=valid[:, j], minlength=n_keys)
+                          for j in range(len(self.values))], axis=1)
+        total = np.stack([np.bincount(codes, weights=x0[:, j], minlength=n_keys)
+                          for j in range(len(self.values))], axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, 0)
+        dev = np.where(valid, x - mean[codes], 0)
+        m2 = np.stack([np.bincount(codes, weights=dev[:, j]**2, minlength=n_keys)
+                       for j in range(len(self.values))], axis=1)
+        vmin = np.full((n_keys, len(self.values)), np.inf)
+        vmax = np.full((n_keys, len(self.values)), -np.inf)
+        np.fmin.at(vmin, codes, np.where(valid, x, np.inf))
+        np.fmax.at(vmax, codes, np.where(valid, x, -np.inf))
+
+        self._combine(self._rows(index), count.astype(np.int64), mean, m2, vmin, vmax)
+        if label is not None:
+            self.batches.append(label)
+        return self
+
+    def merge(self, other):
+        """
+        Adds the moments accumulated by another RunningMoments with the same
+        keys and values.
+
+        Returns
+        -------
+        self : RunningMoments
+        """
+        if other.keys != self.keys or other.values != self.values:
+            raise ValueError('Only accumulators with the same keys and values can be merged.')
+        self._combine(self._rows(other.index), other.count, other.mean, other.m2,
+                      other.min, other.max)
+        self.batches += other.batches
+        return self
+
+    def to_frame(self, ddof=1):
+        """
+        Returns the summary as a DataFrame, with one row per key and, for
+        each value, its count, mean, standard deviation, minimum, and
+        maximum (`<value>_count`, `<value>_mean`, ...).
+        """
+        summary = self.index.to_frame(index=False)
+        seen = self.count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(self.m2 / np.where(self.count > ddof, self.count - ddof, np.nan))
+        for j, v in enumerate(self.values):
+            summary[f'{v}_count'] = self.count[:, j]
+            summary[f'{v}_mean'] = np.where(seen[:, j], self.mean[:, j], np.nan)
+            summary[f'{v}_std'] = std[:, j]
+            summary[f'{v}_min'] = np.where(seen[:, j], self.min[:, j], np.nan)
+            summary[f'{v}_max'] = np.where(seen[:, j], self.max[:, j], np.nan)
+        return summary
+
+    def save(self, path):
+        """
+        Saves the accumulated state to a .npz file.
+        """
+        keys = {f'key_{i}': np.asarray(self.index.get_level_values(i),
+                                       dtype=None if self.index.levels[i].dtype.kind in 'iufb' else str)
+                for i in range(len(self.keys))}
+        np.savez(path, count=self.count, mean=self.mean, m2=self.m2,
+                 min=self.min, max=self.max,
+                 keys=np.asarray(self.keys, dtype=str),
+                 values=np.asarray(self.values, dtype=str),
+                 sum_by=np.asarray(self.sum_by if self.sum_by is not None else [], dtype=str),
+                 batches=np.asarray(self.batches, dtype=str), **keys)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a state saved with `save`.
+        """
+        with np.load(path) as stored:
+            sum_by = [str(k) for k in stored['sum_by']]
+            moments = cls([str(k) for k in stored['keys']],
+                          [str(v) for v in stored['values']],
+                          sum_by if len(sum_by) > 0 else None)
+            index = pd.MultiIndex.from_arrays(
+                        [stored[f'key_{i}'] for i in range(len(moments.keys))],
+                        names=moments.keys)
+            moments._rows(index)
+            for attr in ['count', 'mean', 'm2', 'min', 'max']:
+                setattr(moments, f'_{attr}', stored[attr])
+            moments.batches = [str(b) for b in stored['batches']]
+        return moments
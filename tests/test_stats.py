@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+import prot.stats
+
+
+def test_growth_scaling_flat_gene_is_constant():
+    growth_rates = [0.2, 0.5, 0.8, 1.1, 1.4]
+    df = pd.DataFrame({'gene_name': ['flat'] * 5 + ['rising'] * 5,
+                       'dataset': 'test',
+                       'growth_rate_hr': growth_rates * 2,
+                       'tot_per_cell': [300.0] * 5 +
+                                       list(100 * np.exp(np.array(growth_rates)))})
+    scaling = prot.stats.growth_scaling(df).set_index('gene_name')
+    assert scaling.loc['flat', 'classification'] == 'constant'
+    assert scaling.loc['flat', 'slope'] == 0
+    assert scaling.loc['flat', 'p_value'] == 1
+    assert scaling.loc['rising', 'classification'] == 'ribosome-like'